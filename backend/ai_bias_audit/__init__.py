@@ -2,6 +2,8 @@
 Essay Bias Audit package
 """
 from .auditor import Auditor
+from .cache import GradeCache, PerturbationCache, TranslationCache
+from .grading import ScriptModel
 from .variations import get_variation
 
 __version__ = "0.1.0"
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""
+Shared NLP annotations (tokens, POS tags, sentences) computed once per unique text,
+either on demand or for a whole corpus in batches.
+"""
+import contextlib
+import contextvars
+import functools
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import nltk
+
+# Texts kept by the store used outside of an audit
+DEFAULT_MAX_TEXTS = 10000
+
+# Texts per batch annotated by annotate(), and per task handed to a worker process
+DEFAULT_ANNOTATION_BATCH = 1000
+
+# Words (with inner apostrophes or hyphens), numbers, and single punctuation marks
+_TOKEN_PATTERN = re.compile(r"\w+(?:['\u2019-]\w+)*|[^\w\s]")
+
+_active_store = contextvars.ContextVar('ai_bias_audit_annotations', default=None)
+
+
+@functools.lru_cache(maxsize=None)
+def load_tagger():
+    """
+    Return a POS tagging function backed by a single PerceptronTagger, loaded once per
+    process (nltk.pos_tag reloads its tagger on every call). If the tagger data is not
+    installed, falls back to calling nltk.pos_tag.
+    """
+    try:
+        from nltk.tag import PerceptronTagger
+        return PerceptronTagger().tag
+    except LookupError:
+        return lambda tokens: nltk.pos_tag(tokens)
+
+
+def nltk_tokenize(text: str) -> list:
+    """
+    Tokenize a text with nltk.word_tokenize.
+    """
+    return nltk.word_tokenize(text)
+
+
+def regex_tokenize(text: str) -> list:
+    """
+    Fast approximation of nltk.word_tokenize using one precompiled regex. Punctuation
+    marks become separate tokens, but contractions stay whole ("don't" rather than
+    "do", "n't").
+    """
+    return _TOKEN_PATTERN.findall(text)
+
+
+TOKENIZERS = {
+    'nltk': nltk_tokenize,
+    'regex': regex_tokenize,
+}
+
+
+def _annotate_batch(texts: list, tokenize, tagger, tags: bool, sentences: bool) -> tuple:
+    # Runs in the calling process or in a pool worker; the default tagger is loaded
+    # once per process and reused for every batch
+    tokens = [tokenize(text) for text in texts]
+    tagged = None
+    if tags:
+        tag = tagger if tagger is not None else load_tagger()
+        tagged = [tag(text_tokens) for text_tokens in tokens]
+    split = [nltk.sent_tokenize(text) for text in texts] if sentences else None
+    return tokens, tagged, split
+
+
+class AnnotationStore:
+    """
+    Memo of tokens, POS tags and sentences per unique text, shared by the feature
+    functions and variations so each text is tokenized and tagged at most once.
+    Returned lists are shared between callers and must not be modified. Safe to use
+    from several threads; call close() to shut down its worker processes.
+    """
+    def __init__(self, tagger=None, max_texts: int = None, tokenizer='nltk', n_jobs: int = None,
+                 batch_size: int = DEFAULT_ANNOTATION_BATCH):
+        """
+        Args:
+            tagger: Optional function tagging a list of tokens, returning (token, tag) pairs.
+                Defaults to the persistent tagger from load_tagger().
+            max_texts: Optional number of texts to keep per annotation; the oldest are
+                dropped beyond it.
+            tokenizer: 'nltk' (nltk.word_tokenize), 'regex' (regex_tokenize, much faster) or a
+                function returning the tokens of a text.
+            n_jobs: Optional int. If > 1, annotate() spreads batches over a pool of this many
+                processes, started on first use and kept until close(). A custom tagger or
+                tokenizer must then be picklable (e.g. a module-level function).
+            batch_size: Number of texts per batch in annotate().
+        """
+        if isinstance(tokenizer, str):
+            if tokenizer not in TOKENIZERS:
+                raise ValueError(f"Unknown tokenizer '{tokenizer}'. Use one of {sorted(TOKENIZERS)} or a function.")
+            tokenizer = TOKENIZERS[tokenizer]
+        if n_jobs is not None and n_jobs < 1:
+            raise ValueError("n_jobs must be a positive integer.")
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+        self._tagger = tagger
+        self._tokenize = tokenizer
+        self.max_texts = max_texts
+        self.n_jobs = n_jobs
+        self.batch_size = batch_size
+        self._tokens = {}
+        self._tags = {}
+        self._sentences = {}
+        # Guards the memos and the pool, as threads grading in parallel share a store
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def tokens(self, text: str) -> list:
+        """
+        Return the word tokens of a text, split by the store's tokenizer.
+        """
+        tokens = self._tokens.get(text)
+        if tokens is None:
+            tokens = self._remember(self._tokens, text, self._tokenize(text))
+        return tokens
+
+    def tags(self, text: str) -> list:
+        """
+        Return the (token, POS tag) pairs of a text.
+        """
+        tags = self._tags.get(text)
+        if tags is None:
+            if self._tagger is None:
+                self._tagger = load_tagger()
+            tags = self._remember(self._tags, text, self._tagger(self.tokens(text)))
+        return tags
+
+    def sentences(self, text: str) -> list:
+        """
+        Return the sentences of a text (nltk.sent_tokenize).
+        """
+        sentences = self._sentences.get(text)
+        if sentences is None:
+            sentences = self._remember(self._sentences, text, nltk.sent_tokenize(text))
+        return sentences
+
+    def annotate(self, texts, tags: bool = True, sentences: bool = False):
+        """
+        Annotate a corpus up front: tokenize every text not yet stored and, optionally,
+        POS-tag and sentence-split it, in batches with one tagger instance. With n_jobs > 1,
+        the batches are annotated on a pool of worker processes.
+
+        Args:
+            texts: Iterable of texts; duplicates are annotated once.
+            tags: Whether to POS-tag the texts.
+            sentences: Whether to split the texts into sentences.
+        """
+        todo = [text for text in dict.fromkeys(texts)
+                if text not in self._tokens or (tags and text not in self._tags)
+                or (sentences and text not in self._sentences)]
+        if not todo:
+            return
+        batches = [todo[start:start + self.batch_size] for start in range(0, len(todo), self.batch_size)]
+        if self.n_jobs and self.n_jobs > 1 and len(batches) > 1:
+            pool = self._worker_pool()
+            futures = [pool.submit(_annotate_batch, batch, self._tokenize, self._tagger, tags, sentences)
+                       for batch in batches]
+            annotated = [future.result() for future in futures]
+        else:
+            annotated = [_annotate_batch(batch, self._tokenize, self._tagger, tags, sentences) for batch in batches]
+        for batch, (tokens, tagged, split) in zip(batches, annotated):
+            for i, text in enumerate(batch):
+                self._remember(self._tokens, text, tokens[i])
+                if tagged is not None:
+                    self._remember(self._tags, text, tagged[i])
+                if split is not None:
+                    self._remember(self._sentences, text, split[i])
+
+    def clear(self):
+        """
+        Drop all stored annotations.
+        """
+        with self._lock:
+            self._tokens.clear()
+            self._tags.clear()
+            self._sentences.clear()
+
+    def close(self):
+        """
+        Shut down the worker process pool, if one was started.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def __len__(self) -> int:
+        return len(self._tokens.keys() | self._tags.keys() | self._sentences.keys())
+
+    def _remember(self, memo: dict, text: str, value):
+        with self._lock:
+            if self.max_texts is not None and len(memo) >= self.max_texts and text not in memo:
+                # Dicts keep insertion order, so the first key is the oldest
+                memo.pop(next(iter(memo)), None)
+            memo[text] = value
+        return value
+
+    def _worker_pool(self) -> ProcessPoolExecutor:
+        # The pool is kept across calls so each worker loads the tagger only once.
+        # Workers are spawned rather than forked, as the parent may be multi-threaded.
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.n_jobs,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+
+_default_store = AnnotationStore(max_texts=DEFAULT_MAX_TEXTS)
+
+
+def current_annotations() -> AnnotationStore:
+    """
+    Return the store activated by use_annotations(), or a shared bounded default store.
+    """
+    store = _active_store.get()
+    return store if store is not None else _default_store
+
+
+@contextlib.contextmanager
+def use_annotations(store: AnnotationStore):
+    """
+    Make store the annotation store of the feature functions and variations within
+    the with block (including threads started with asyncio.to_thread).
+    """
+    token = _active_store.set(store)
+    try:
+        yield store
+    finally:
+        _active_store.reset(token)
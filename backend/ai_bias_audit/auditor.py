@@ -1,7 +1,25 @@
+import asyncio
+import numpy as np
 import pandas as pd
-from .variations import get_variation
+from pandas.api.types import union_categoricals
+from .variations import get_variation, takes_rng
 from .features import count_words, count_nouns, count_cognates
-from scipy.stats import skew
+from .annotations import AnnotationStore, use_annotations
+from .cache import perturbation_key
+from .checkpoint import AuditCheckpoint
+from .grading import Grader
+from .moments import BIAS_COLUMNS, MomentTable, bootstrap_ci, grouped_moments
+from .rng import derive_key, new_seed, rng_from_key
+from .stats import group_significance
+from .translation import DEFAULT_PREFETCH_WORKERS, cached, current_translator, get_translator, use_translator
+
+# Feature column that measures how much of a text each variation can perturb
+VARIATION_FEATURES = {
+    'spelling': 'num_words',
+    'spanglish': 'num_words',
+    'noun_transfer': 'num_nouns',
+    'cognates': 'num_cognates',
+}
 
 class Auditor:
     """
@@ -9,19 +27,75 @@ class Auditor:
     computes accuracy if true grades are provided, applies text variations,
     and audits how variations impact model grades.
     """
-    def __init__(self, model, data: pd.DataFrame):
+    def __init__(self, model, data: pd.DataFrame, batch_size: int = None, max_workers: int = None,
+                 executor: str = 'thread', grade_cache=None, model_fingerprint: str = None,
+                 compact_results: bool = False, float32_results: bool = False, perturbation_cache=None,
+                 annotations: AnnotationStore = None, translator=None, translation_cache=None,
+                 translation_workers: int = DEFAULT_PREFETCH_WORKERS, prefetch_progress=None):
         """
         Initialize the Auditor.
 
         Args:
             model: Callable[[str], Any], a function that takes (text) and returns a grade.
+                May expose a grade_batch(list[str]) method to grade texts in batches.
             data: pd.DataFrame with column 'text', and optional 'true_grade'.
+            batch_size: Optional int. If provided (or if the model has grade_batch), texts are
+                graded in chunks of this size.
+            max_workers: Optional int. If > 1, texts are graded concurrently on this many threads
+                (useful for I/O-bound models such as LLM APIs) or processes.
+            executor: 'thread' (default) or 'process'. The process executor suits CPU-bound models
+                and requires a picklable model such as a ScriptModel.
+            grade_cache: Optional GradeCache. Texts already graded by the same model are read
+                from the cache instead of being graded again.
+            model_fingerprint: Optional str identifying the model in the grade cache. Defaults to
+                model.fingerprint (set by ScriptModel).
+            compact_results: If True, audit results use categorical 'variation' and 'group'
+                columns and int16 magnitudes, and omit 'original_text'; the original texts are
+                kept once in self.original_texts (see expand_results()).
+            float32_results: If True, grades and bias measures in audit results are float32.
+            perturbation_cache: Optional PerturbationCache. In audits and perturb() calls given an
+                explicit seed, perturbations already computed for the same text, variation version,
+                magnitude and generator are read from the cache instead of being recomputed.
+            annotations: Optional AnnotationStore holding the tokens, POS tags and sentences of
+                each text, shared by the feature functions and variations. Audits annotate the
+                texts in batches before perturbing them. Defaults to a new store.
+            translator: Optional Translator, or specification accepted by get_translator() such as
+                'dictionary:words.tsv', used by the translation-based variations and features.
+                Defaults to the current translator (Google Translate unless set by
+                use_translator()).
+            translation_cache: Optional TranslationCache shared by all translations. Without it,
+                an uncached translator is backed by a new in-memory cache.
+            translation_workers: Number of batches translated concurrently when an audit prefetches
+                the words and phrases its translation-based variations may translate, before
+                perturbing. 0 disables prefetching, so texts are translated as they are perturbed.
+            prefetch_progress: Optional callable(done, total) reporting the prefetch's progress.
         """
         self.model = model
+        self.grader = Grader(model, batch_size=batch_size, max_workers=max_workers, executor=executor,
+                             cache=grade_cache, fingerprint=model_fingerprint)
         self.data = data.copy()
         if 'text' not in self.data.columns:
             raise ValueError("DataFrame must contain 'text' columns.")
+        self.compact_results = compact_results
+        self.float32_results = float32_results
+        self.perturbation_cache = perturbation_cache
+        self.annotations = annotations if annotations is not None else AnnotationStore()
+        translator = get_translator(translator) if translator is not None else current_translator()
+        self.translator = cached(translator, translation_cache)
+        if translation_workers < 0:
+            raise ValueError("translation_workers must be a non-negative integer.")
+        self.translation_workers = translation_workers
+        self.prefetch_progress = prefetch_progress
         self.results = None
+        # Audited original texts indexed by the results' 'index' column (compact results only)
+        self.original_texts = None
+        # Moments accumulated as the last audit graded each variation. They are served while the
+        # audit runs and after audit_iter(); moments of kept results are computed from the rows
+        self._moment_table = None
+        self._moments_live = False
+        # Grading statistics of the last audit (texts, duplicates_skipped, cache_hits, graded)
+        # and the seed its perturbations were derived from
+        self.metadata = {}
         # Add feature columns if not present
         if 'num_words' not in self.data.columns:
             self.data['num_words'] = self.data['text'].apply(count_words)
@@ -36,26 +110,34 @@ class Auditor:
             DataFrame with an added 'predicted_grade' column.
         """
         df = self.data if texts is None else texts.copy()
-        preds = []
-        for _, row in df.iterrows():
-            try:
-                pred = self.model(row['text'])
-                # Ensure the prediction is numeric
-                if isinstance(pred, (int, float)):
-                    preds.append(float(pred))
-                else:
-                    # Try to convert to float, if it fails, use NaN
-                    try:
-                        preds.append(float(pred))
-                    except (ValueError, TypeError):
-                        print(f"Warning: Model returned non-numeric value '{pred}' for text. Using NaN.")
-                        preds.append(float('nan'))
-            except Exception as e:
-                print(f"Warning: Model failed to grade text: {str(e)}. Using NaN.")
-                preds.append(float('nan'))
+        preds = self.grader.grade(df['text'].tolist())
         df['predicted_grade'] = preds
         return df
 
+    async def grade_async(self, texts: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Grade texts using the model, driving it from the running event loop.
+
+        Async models (``async def grade(text)``) are awaited directly, with at most
+        ``max_workers`` requests in flight; synchronous models run in worker threads.
+
+        Args:
+            texts: Optional DataFrame to grade; if None, grades self.data.
+        Returns:
+            DataFrame with an added 'predicted_grade' column.
+        """
+        df = self.data if texts is None else texts.copy()
+        preds = await self.grader.grade_async(df['text'].tolist())
+        df['predicted_grade'] = preds
+        return df
+
+    def close(self):
+        """
+        Release grading and annotation resources such as worker processes.
+        """
+        self.grader.close()
+        self.annotations.close()
+
     def accuracy(self) -> float:
         """
         Compute accuracy of predictions against true grades.
@@ -69,54 +151,403 @@ class Auditor:
         correct = scored['predicted_grade'] == scored['true_grade']
         return float(correct.mean())
 
-    def perturb(self, variation_name: str, magnitude: int) -> pd.DataFrame:
+    def perturb(self, variation_name: str, magnitude: int, seed: int = None) -> pd.DataFrame:
         """
         Apply a text variation to all texts.
 
         Args:
             variation_name: Name of the variation to apply.
             magnitude: Variation magnitude (0-100).
+            seed: Optional int. If provided, each row is perturbed as in audit(seed=seed) without
+                a score cutoff, and the perturbation cache (if any) is used.
         Returns:
             DataFrame with perturbed 'text' column.
         """
-        variation = get_variation(variation_name)
-        df = self.data.copy()
-        df['text'] = df['text'].apply(lambda text: variation.apply(text, magnitude))
-        return df
+        if seed is None:
+            return self._perturb_frame(self.data, variation_name, magnitude)
+        keys = self._task_keys(seed, variation_name, magnitude, 0, range(len(self.data)))
+        return self._perturb_frame(self.data, variation_name, magnitude, keys=keys, cache=self.perturbation_cache)
 
-    def audit(self, variations: list, magnitudes: list, score_cutoff: float = None, group_col: str = None) -> pd.DataFrame:
+    def audit(self, variations: list, magnitudes: list, score_cutoff: float = None, group_col: str = None,
+              checkpoint: str = None, resume: bool = False, checkpoint_every: int = 100, n_replicates: int = 1,
+              seed: int = None) -> pd.DataFrame:
         """
         Run the bias audit by applying each variation and recording grade changes.
 
         Args:
             variations: List of variation names.
-            magnitudes: List of magnitudes corresponding to each variation.
+            magnitudes: List of magnitudes corresponding to each variation. An entry may be a list
+                of magnitudes to sweep; each text's perturbation plan is then computed once and
+                reused for every magnitude.
             score_cutoff: Optional float. If provided, only texts with original grades >= this value are audited.
             group_col: Optional str. Name of the column to use for group/demographic analysis.
+            checkpoint: Optional path of a checkpoint file. Completed (row, variation, magnitude)
+                results are written to it every checkpoint_every rows.
+            resume: If True, skip the work already recorded in the checkpoint file and only
+                perturb and grade what is left. Requires checkpoint, written by an audit with the
+                same settings, texts and model fingerprint.
+            checkpoint_every: Number of rows perturbed and graded between checkpoint writes.
+            n_replicates: Number of independent perturbations of each text per (variation,
+                magnitude). With more than one, results gain a 'replicate' column.
+            seed: Optional int. Every perturbation draws from its own generator derived from
+                (seed, input row position, variation, magnitude, replicate), so results are
+                reproducible and independent of chunking, execution order and score_cutoff.
+                Defaults to a fresh seed drawn from the random module, recorded in
+                self.metadata['seed'] and in the checkpoint, from which a resumed audit reads it.
+                Only audits given a seed use the perturbation cache.
         Returns:
-            DataFrame summarizing original and perturbed grades, including additional bias measures and group info if provided.
+            DataFrame summarizing original and perturbed grades, including additional bias
+            measures and group info if provided.
         """
+        if resume and checkpoint is None:
+            raise ValueError("resume=True requires a checkpoint path.")
+        variations, magnitudes, replicates = self._expand_tasks(variations, magnitudes, n_replicates)
+        self._prepare_audit(self.data, variations, magnitudes)
+        # Perturbations drawn from a fresh seed would never be looked up again, so only audits
+        # given a seed use the perturbation cache
+        cache = self.perturbation_cache if seed is not None else None
+        if seed is None and resume:
+            # Resumed rows must draw from the same generators as the interrupted run
+            seed = (AuditCheckpoint.saved_config(checkpoint) or {}).get('seed')
+        seed = new_seed() if seed is None else seed
+        ckpt = None
+        if checkpoint is not None:
+            config = {
+                'variations': list(variations),
+                'magnitudes': [int(mag) for mag in magnitudes],
+                'score_cutoff': score_cutoff,
+                'group_col': group_col,
+                'n_replicates': n_replicates,
+                'seed': seed,
+                'texts': AuditCheckpoint.fingerprint_texts(self.data['text']),
+                'model': self.grader.fingerprint,
+            }
+            ckpt = AuditCheckpoint(checkpoint, config, resume=resume, every=checkpoint_every)
+        self._moment_table = MomentTable()
+        self._moments_live = True
+        self.grader.reset_stats()
+        # Identical texts (e.g. perturbations that left a text unchanged) are graded once per run
+        self.grader.start_run()
+        try:
+            if ckpt is not None and ckpt.original_grades is not None:
+                self.data['predicted_grade'] = ckpt.original_grades
+                scored = self.data
+            else:
+                scored = self.grade()
+                if ckpt is not None:
+                    ckpt.save_original(scored['predicted_grade'].tolist())
+            self.results = self._audit_frame(self.data, scored, variations, magnitudes, score_cutoff, group_col,
+                                             checkpoint=ckpt, replicates=replicates, seed=seed, cache=cache)
+            self._moments_live = False
+        finally:
+            self.grader.end_run()
+        self.metadata = dict(self.grader.stats, seed=seed)
+        return self.results
+
+    async def audit_async(self, variations: list, magnitudes: list, score_cutoff: float = None,
+                          group_col: str = None, n_replicates: int = 1, seed: int = None) -> pd.DataFrame:
+        """
+        Asynchronous version of audit(). Grading is driven by grade_async(), and
+        perturbation runs in a worker thread so the event loop stays responsive.
+
+        Args:
+            variations: List of variation names.
+            magnitudes: List of magnitudes corresponding to each variation. An entry may be a list
+                of magnitudes to sweep; each text's perturbation plan is then computed once and
+                reused for every magnitude.
+            score_cutoff: Optional float. If provided, only texts with original grades >= this value are audited.
+            group_col: Optional str. Name of the column to use for group/demographic analysis.
+            n_replicates: Number of independent perturbations of each text, as in audit().
+            seed: Optional int seeding the perturbations, as in audit().
+        Returns:
+            DataFrame summarizing original and perturbed grades, as returned by audit().
+        """
+        variations, magnitudes, replicates = self._expand_tasks(variations, magnitudes, n_replicates)
+        await asyncio.to_thread(self._prepare_audit, self.data, variations, magnitudes)
+        cache = self.perturbation_cache if seed is not None else None
+        seed = new_seed() if seed is None else seed
+        self._moment_table = MomentTable()
+        self._moments_live = True
+        self.grader.reset_stats()
+        self.grader.start_run()
+        try:
+            scored = await self.grade_async()
+            filtered_data, original, group_vals, row_ids = self._filter_original(self.data, scored, score_cutoff,
+                                                                                 group_col)
+            self._keep_original_texts(filtered_data)
+            await asyncio.to_thread(self._prepare_perturbation, filtered_data['text'],
+                                    self._uncached(variations, cache))
+            frames = []
+            plans = _PlanStore(variations)
+            for variation_name, mag, replicate in zip(variations, magnitudes, replicates):
+                variation_plans = await asyncio.to_thread(plans.get, self, filtered_data, variation_name)
+                df_to_perturb = await asyncio.to_thread(self._perturb_task, filtered_data, variation_name, mag,
+                                                        variation_plans, seed, replicate, row_ids, cache)
+                scored = await self.grade_async(texts=df_to_perturb)
+                frames.append(self._record_task(original, filtered_data, group_vals,
+                                                (variation_name, mag, df_to_perturb, scored),
+                                                replicate=replicate if n_replicates > 1 else None))
+        finally:
+            self.grader.end_run()
+        self.metadata = dict(self.grader.stats, seed=seed)
+        self.results = self._concat_results(frames)
+        self._moments_live = False
+        return self.results
+
+    def audit_iter(self, variations: list, magnitudes: list, chunk_size: int = 1000, score_cutoff: float = None,
+                   group_col: str = None, chunks=None, n_replicates: int = 1, seed: int = None):
+        """
+        Run the bias audit chunk by chunk, yielding the results of each chunk.
+
+        Only one chunk of texts and results is held in memory at a time. Moments are
+        accumulated incrementally, so audit_moments() is available once iteration
+        finishes, while self.results is left as None.
+
+        Args:
+            variations: List of variation names.
+            magnitudes: List of magnitudes corresponding to each variation. An entry may be a list
+                of magnitudes to sweep; each text's perturbation plan is then computed once and
+                reused for every magnitude.
+            chunk_size: Number of input rows per chunk when chunking self.data.
+            score_cutoff: Optional float. If provided, only texts with original grades >= this value are audited.
+            group_col: Optional str. Name of the column to use for group/demographic analysis.
+            chunks: Optional iterable of DataFrames to audit instead of self.data, e.g.
+                pd.read_csv(path, chunksize=...).
+            n_replicates: Number of independent perturbations of each text, as in audit().
+            seed: Optional int seeding the perturbations, as in audit(). Rows are perturbed
+                identically whatever the chunk size.
+        Yields:
+            DataFrames in the format returned by audit(); 'index' counts audited rows across chunks.
+        """
+        variations, magnitudes, replicates = self._expand_tasks(variations, magnitudes, n_replicates)
+        if chunks is None:
+            chunks = (self.data.iloc[start:start + chunk_size] for start in range(0, len(self.data), chunk_size))
+        cache = self.perturbation_cache if seed is not None else None
+        seed = new_seed() if seed is None else seed
+        self.results = None
+        self._moment_table = MomentTable()
+        self._moments_live = True
+        self.grader.reset_stats()
+        offset = 0
+        row_offset = 0
+        for chunk in chunks:
+            chunk = chunk.copy()
+            if 'text' not in chunk.columns:
+                raise ValueError("DataFrame must contain 'text' columns.")
+            if 'num_words' not in chunk.columns:
+                chunk['num_words'] = chunk['text'].apply(count_words)
+            self._prepare_audit(chunk, variations, magnitudes)
+            # Duplicates are collapsed within a chunk, keeping memory bounded by the chunk size
+            self.grader.start_run()
+            try:
+                scored = self.grade(texts=chunk)
+                results = self._audit_frame(chunk, scored, variations, magnitudes, score_cutoff, group_col, offset,
+                                            replicates=replicates, seed=seed, row_offset=row_offset, cache=cache)
+            finally:
+                self.grader.end_run()
+                # Annotations of this chunk's texts are not needed by later chunks
+                self.annotations.clear()
+            if score_cutoff is not None:
+                offset += int((scored['predicted_grade'] >= score_cutoff).sum())
+            else:
+                offset += len(chunk)
+            row_offset += len(chunk)
+            self.metadata = dict(self.grader.stats, seed=seed)
+            yield results
+        # The table holds the moments of every chunk, and no results are kept
+        self._moments_live = False
+
+    @staticmethod
+    def _expand_tasks(variations: list, magnitudes: list, n_replicates: int = 1) -> tuple:
+        # Flatten magnitude sweeps and replicates into parallel (variation, magnitude, replicate)
+        # lists, e.g. (['spelling'], [[10, 20]]) -> (['spelling', 'spelling'], [10, 20], [0, 0])
+        if len(variations) != len(magnitudes):
+            raise ValueError("Variations and magnitudes must have the same length.")
+        if n_replicates < 1:
+            raise ValueError("n_replicates must be a positive integer.")
+        expanded_variations, expanded_magnitudes, replicates = [], [], []
+        for variation_name, mag in zip(variations, magnitudes):
+            sweep = list(mag) if isinstance(mag, (list, tuple, range, np.ndarray)) else [mag]
+            for sweep_mag in sweep:
+                expanded_variations.extend([variation_name] * n_replicates)
+                expanded_magnitudes.extend([sweep_mag] * n_replicates)
+                replicates.extend(range(n_replicates))
+        return expanded_variations, expanded_magnitudes, replicates
+
+    def _prepare_audit(self, data: pd.DataFrame, variations: list, magnitudes: list):
         if len(variations) != len(magnitudes):
             raise ValueError("Variations and magnitudes must have the same length.")
 
         # Conditionally compute num_nouns and num_cognates if needed
-        if ('noun_transfer' in variations) and ('num_nouns' not in self.data.columns):
-            self.data['num_nouns'] = self.data['text'].apply(count_nouns)
-        if ('cognates' in variations) and ('num_cognates' not in self.data.columns):
-            self.data['num_cognates'] = self.data['text'].apply(count_cognates)
+        nouns = ('noun_transfer' in variations) and ('num_nouns' not in data.columns)
+        cognates = ('cognates' in variations) and ('num_cognates' not in data.columns)
+        if nouns or cognates:
+            self.annotations.annotate(data['text'], tags=nouns)
+        if cognates:
+            self._prefetch_translations(data['text'], ['cognates'])
+        with use_annotations(self.annotations), use_translator(self.translator):
+            if nouns:
+                data['num_nouns'] = data['text'].apply(count_nouns)
+            if cognates:
+                data['num_cognates'] = data['text'].apply(count_cognates)
+
+    @staticmethod
+    def _uncached(variations: list, cache) -> list:
+        # Variations whose perturbations are not read from the perturbation cache
+        return [variation_name for variation_name in dict.fromkeys(variations)
+                if cache is None or not takes_rng(get_variation(variation_name).apply)]
+
+    def _prepare_perturbation(self, texts, variations: list):
+        # Annotate the texts in batches and prefetch their translations before the variations
+        # perturb them; with a perturbation cache, this is only done for the cache misses
+        tags = 'noun_transfer' in variations
+        sentences = 'spanglish' in variations
+        if tags or sentences or 'cognates' in variations:
+            self.annotations.annotate(texts, tags=tags, sentences=sentences)
+        self._prefetch_translations(texts, variations)
 
-        # Grade original texts 
-        original = self.grade()
-        original = original[['predicted_grade']].rename(columns={'predicted_grade': 'original_grade'})
+    def _prefetch_translations(self, texts, variations: list):
+        # Translate the vocabulary of the translation-based variations for all texts in one
+        # concurrent, batched step, so perturbing them reads translations from the cache
+        if not self.translation_workers:
+            return
+        units = []
+        with use_annotations(self.annotations):
+            for variation_name in dict.fromkeys(variations):
+                variation = get_variation(variation_name)
+                if variation.translates:
+                    for text in dict.fromkeys(texts):
+                        units.extend(variation.translation_units(text))
+        if units:
+            self.translator.prefetch(units, max_workers=self.translation_workers, progress=self.prefetch_progress)
+
+    def _audit_frame(self, data: pd.DataFrame, scored: pd.DataFrame, variations: list, magnitudes: list,
+                     score_cutoff: float, group_col: str, offset: int = 0, checkpoint=None, replicates: list = None,
+                     seed: int = None, row_offset: int = 0, cache=None) -> pd.DataFrame:
+        filtered_data, original, group_vals, row_ids = self._filter_original(data, scored, score_cutoff, group_col,
+                                                                             row_offset)
+        self._keep_original_texts(filtered_data, offset)
+        self._prepare_perturbation(filtered_data['text'], self._uncached(variations, cache))
+        if replicates is None:
+            replicates = [0] * len(variations)
+        replicated = max(replicates, default=0) > 0
+        frames = []
+        plans = _PlanStore(variations)
+        for task, (variation_name, mag, replicate) in enumerate(zip(variations, magnitudes, replicates)):
+            # Use filtered data for perturbation
+            variation_plans = plans.get(self, filtered_data, variation_name)
+            if checkpoint is None:
+                df_to_perturb = self._perturb_task(filtered_data, variation_name, mag, variation_plans, seed,
+                                                   replicate, row_ids, cache)
+                graded = (variation_name, mag, df_to_perturb, self.grade(texts=df_to_perturb))
+            else:
+                keys = self._task_keys(seed, variation_name, mag, replicate, row_ids)
+                graded = (variation_name, mag) + self._perturb_and_grade_checkpointed(
+                    filtered_data, task, variation_name, mag, checkpoint, variation_plans, keys, cache)
+            frames.append(self._record_task(original, filtered_data, group_vals, graded, offset,
+                                            replicate=replicate if replicated else None))
+        return self._concat_results(frames)
+
+    @staticmethod
+    def _task_keys(seed: int, variation_name: str, magnitude: int, replicate: int, row_ids) -> list:
+        # One counter-based generator key per audited row, derived from the row's position in the
+        # input data, so a row's perturbation does not depend on chunking, task order, the worker
+        # that runs it or which other rows the score cutoff dropped
+        return [derive_key(seed, int(row), variation_name, magnitude, replicate) for row in row_ids]
+
+    def _perturb_task(self, df: pd.DataFrame, variation_name: str, magnitude: int, plans: list, seed: int,
+                      replicate: int, row_ids, cache=None) -> pd.DataFrame:
+        keys = self._task_keys(seed, variation_name, magnitude, replicate, row_ids)
+        return self._perturb_frame(df, variation_name, magnitude, plans, keys, cache=cache)
+
+    def _record_task(self, original: pd.DataFrame, filtered_data: pd.DataFrame, group_vals: list,
+                     graded: tuple, offset: int = 0, replicate: int = None) -> pd.DataFrame:
+        # Assemble one variation's rows and fold them into the running moments right away
+        results = self._assemble_results(original, filtered_data, group_vals, [graded], offset)
+        if replicate is not None and not results.empty:
+            replicate_values = np.full(len(results), replicate, dtype=np.int16 if self.compact_results else int)
+            results.insert(results.columns.get_loc('magnitude') + 1, 'replicate', replicate_values)
+        if self._moment_table is not None:
+            self._moment_table.update(results)
+        return results
+
+    @staticmethod
+    def _concat_results(frames: list) -> pd.DataFrame:
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        categorical = [col for col, dtype in frames[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+        results = pd.concat([frame.drop(columns=categorical) for frame in frames], ignore_index=True)
+        # Frames of different variations have different categories; union them instead of
+        # letting concat fall back to object strings
+        for col in categorical:
+            values = union_categoricals([frame[col] for frame in frames])
+            results.insert(frames[0].columns.get_loc(col), col, values)
+        return results
+
+    def _keep_original_texts(self, filtered_data: pd.DataFrame, offset: int = 0):
+        if self.compact_results:
+            texts = filtered_data['text']
+            self.original_texts = pd.Series(texts.to_numpy(dtype=object), name='original_text',
+                                            index=pd.RangeIndex(offset, offset + len(texts), name='index'))
+
+    def expand_results(self, results: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Return compact audit results with the 'original_text' column restored.
+
+        Args:
+            results: Compact results of the last audit (or of the last audit_iter() chunk).
+                Defaults to self.results.
+        Returns:
+            DataFrame in the column layout of non-compact results.
+        """
+        results = self.results if results is None else results
+        if results is None or results.empty or 'original_text' in results.columns:
+            return results
+        if self.original_texts is None:
+            raise ValueError("No original texts available. Run audit() with compact_results=True first.")
+        results = results.copy()
+        original_text = self.original_texts.reindex(results['index'].to_numpy()).to_numpy()
+        results.insert(results.columns.get_loc('perturbed_text'), 'original_text', original_text)
+        return results
+
+    def _perturb_and_grade_checkpointed(self, filtered_data: pd.DataFrame, task: int, variation_name: str,
+                                        magnitude: int, checkpoint: AuditCheckpoint, plans: list = None,
+                                        keys: list = None, cache=None) -> tuple:
+        completed = checkpoint.completed(task)
+        texts = [None] * len(filtered_data)
+        grades = [float('nan')] * len(filtered_data)
+        for idx, (text, grade) in completed.items():
+            texts[idx], grades[idx] = text, grade
+        todo = [idx for idx in range(len(filtered_data)) if idx not in completed]
+        for start in range(0, len(todo), checkpoint.every):
+            block = todo[start:start + checkpoint.every]
+            block_scored = self.grade(texts=self._perturb_frame(filtered_data, variation_name, magnitude, plans,
+                                                                keys, rows=block, cache=cache))
+            rows = list(zip(block, block_scored['text'], block_scored['predicted_grade']))
+            checkpoint.save_rows(task, rows)
+            for idx, text, grade in rows:
+                texts[idx], grades[idx] = text, grade
+        df_to_perturb = filtered_data.copy()
+        df_to_perturb['text'] = texts
+        scored = df_to_perturb.copy()
+        scored['predicted_grade'] = grades
+        return df_to_perturb, scored
+
+    def _filter_original(self, data: pd.DataFrame, scored: pd.DataFrame, score_cutoff: float, group_col: str,
+                         row_offset: int = 0):
+        original = scored[['predicted_grade']].rename(columns={'predicted_grade': 'original_grade'})
 
         # Apply score cutoff filter if specified
         if score_cutoff is not None:
-            keep_idx = original[original['original_grade'] >= score_cutoff].index
-            original = original.loc[keep_idx].reset_index(drop=True)
-            filtered_data = self.data.loc[keep_idx].reset_index(drop=True)
+            keep = (original['original_grade'] >= score_cutoff).to_numpy()
+            original = original[keep].reset_index(drop=True)
+            filtered_data = data[keep].reset_index(drop=True)
+            row_ids = row_offset + np.flatnonzero(keep)
         else:
-            filtered_data = self.data.copy().reset_index(drop=True)
+            filtered_data = data.copy().reset_index(drop=True)
             original = original.reset_index(drop=True)
+            row_ids = range(row_offset, row_offset + len(filtered_data))
 
         # Prepare group values if needed
         group_vals = None
@@ -125,70 +556,109 @@ class Auditor:
             group_vals = filtered_data[group_col].fillna('unknown').apply(lambda x: str(x).strip()).tolist()
         elif group_col is not None:
             group_vals = ['unknown'] * len(filtered_data)
+        # row_ids are the input positions of the kept rows, from which their generator keys derive
+        return filtered_data, original, group_vals, row_ids
 
-        results = []
-        for variation_name, mag in zip(variations, magnitudes):
-            # Use filtered data for perturbation
-            df_to_perturb = filtered_data.copy()
-            variation = get_variation(variation_name)
-            df_to_perturb['text'] = df_to_perturb['text'].apply(lambda text: variation.apply(text, mag))
-            scored = self.grade(texts=df_to_perturb)
-            for idx, orig_row in original.iterrows():
-                pert_grade = scored.loc[idx, 'predicted_grade']
-                orig_grade = orig_row['original_grade']
-                row = {
-                    'index': idx,
-                    'variation': variation_name,
-                    'magnitude': mag,
-                    'original_grade': orig_grade,
-                    'perturbed_grade': pert_grade,
-                    'original_text': filtered_data.loc[idx, 'text'],
-                    'perturbed_text': df_to_perturb.loc[idx, 'text'],
-                }
-                if group_vals is not None:
-                    row['group'] = group_vals[idx] if idx < len(group_vals) else 'unknown'
-                results.append(row)
-        self.results = pd.DataFrame(results)
+    def _perturb_frame(self, df: pd.DataFrame, variation_name: str, magnitude: int, plans=None,
+                       keys: list = None, rows: list = None, cache=None) -> pd.DataFrame:
+        # plans and generator keys are indexed by position in df; rows selects the positions to perturb,
+        # and cache is the PerturbationCache to read and write, if any
+        variation = get_variation(variation_name)
+        if rows is None:
+            rows = range(len(df))
+            df = df.copy()
+        else:
+            df = df.iloc[rows].copy()
+        texts = df['text'].tolist()
+        # Variations whose apply() takes no rng argument are neither reproducible nor cached
+        seeded = keys is not None and takes_rng(variation.apply)
+        perturbed = [None] * len(texts)
+        cache_keys = None
+        if seeded and cache is not None:
+            translator = self.translator.fingerprint if variation.translates else None
+            cache_keys = [perturbation_key(text, variation_name, variation.version, magnitude, keys[row], translator)
+                          for text, row in zip(texts, rows)]
+            cached = cache.get_many(cache_keys)
+            perturbed = [cached.get(key) for key in cache_keys]
+        # Only uncached rows are perturbed (and planned, as plans are computed on first use)
+        todo = [i for i, text in enumerate(perturbed) if text is None]
+        if cache_keys is not None and todo:
+            self._prepare_perturbation([texts[i] for i in todo], [variation_name])
+        if todo:
+            rngs = [rng_from_key(keys[rows[i]]) for i in todo] if seeded else None
+            with use_annotations(self.annotations), use_translator(self.translator):
+                todo_plans = [plans[rows[i]] for i in todo] if plans is not None else None
+                batch = variation.apply_batch([texts[i] for i in todo], magnitude, rngs, plans=todo_plans)
+            for i, text in zip(todo, batch):
+                perturbed[i] = text
+        if cache_keys is not None and todo:
+            cache.put_many({cache_keys[i]: perturbed[i] for i in todo})
+        df['text'] = perturbed
+        return df
+
+    @staticmethod
+    def _plan_texts(df: pd.DataFrame, variation_name: str) -> '_Plans':
+        return _Plans(get_variation(variation_name), df['text'].tolist())
+
+    def _assemble_results(self, original: pd.DataFrame, filtered_data: pd.DataFrame, group_vals: list,
+                          perturbed: list, offset: int = 0) -> pd.DataFrame:
+        n = len(original)
+        if n == 0 or not perturbed:
+            return pd.DataFrame()
+        # Build each column by concatenating one array per variation
+        index = np.arange(n)
+        orig_grade = original['original_grade'].to_numpy(dtype=float)
+        orig_text = filtered_data['text'].to_numpy(dtype=object)
+        ones = np.ones(n)
+        num_words = filtered_data['num_words'].to_numpy(dtype=float) if 'num_words' in filtered_data.columns else ones
+        columns = {name: [] for name in ['index', 'variation', 'magnitude', 'original_grade', 'perturbed_grade',
+                                         'original_text', 'perturbed_text', 'feature_val']}
+        for variation_name, mag, df_to_perturb, scored in perturbed:
+            # Use filtered_data for the feature relevant to each variation
+            feature_col = VARIATION_FEATURES.get(variation_name)
+            if feature_col in filtered_data.columns:
+                feature_val = filtered_data[feature_col].to_numpy(dtype=float)
+            else:
+                feature_val = ones
+            columns['index'].append(index)
+            columns['variation'].append(np.full(n, variation_name, dtype=object))
+            columns['magnitude'].append(np.full(n, mag))
+            columns['original_grade'].append(orig_grade)
+            columns['perturbed_grade'].append(scored['predicted_grade'].to_numpy(dtype=float))
+            columns['original_text'].append(orig_text)
+            columns['perturbed_text'].append(df_to_perturb['text'].to_numpy(dtype=object))
+            columns['feature_val'].append(feature_val)
+        columns = {name: np.concatenate(arrays) for name, arrays in columns.items()}
+        if group_vals is not None:
+            columns['group'] = np.tile(np.asarray(group_vals, dtype=object), len(perturbed))
 
         # --- Additional bias measures ---
-        if not self.results.empty:
-            m = self.results['magnitude'] / 100
-            err = self.results['original_grade'] - self.results['perturbed_grade']
-            orig = self.results['original_grade']
-            # Map variation to feature column
-            var_to_col = {
-                'spelling': 'num_words',
-                'spanglish': 'num_words',
-                'noun_transfer': 'num_nouns',
-                'cognates': 'num_cognates'
-            }
-            # Get the relevant feature for each row
-            self.results['feature_col'] = self.results['variation'].map(var_to_col)
-            # Use filtered_data for feature values
-            self.results['feature_val'] = [
-                filtered_data.loc[idx, col] if col in filtered_data.columns else 1
-                for idx, col in zip(self.results['index'], self.results['feature_col'])
-            ]
-            self.results['num_words_val'] = [
-                filtered_data.loc[idx, 'num_words'] if 'num_words' in filtered_data.columns else 1
-                for idx in self.results['index']
-            ]
-            self.results['pert'] = self.results['feature_val'] / self.results['num_words_val']
-            # Compute bias measures
-            self.results['bias_0'] = err
-            self.results['bias_1'] = err / m.replace(0, 1e-8)
-            self.results['bias_2'] = err / ((m * self.results['pert']).replace(0, 1e-8))
-            self.results['bias_3'] = err / (1 - orig.replace(1, 1-1e-8))
-            # Drop helper columns
-            self.results.drop(columns=['feature_col', 'feature_val', 'num_words_val', 'pert'], inplace=True)
-            
-            # Round numeric columns to 3 decimal places
-            numeric_columns = ['original_grade', 'perturbed_grade', 'bias_0', 'bias_1', 'bias_2', 'bias_3']
-            for col in numeric_columns:
-                if col in self.results.columns:
-                    self.results[col] = self.results[col].round(3)
-        return self.results
-    
+        m = columns['magnitude'] / 100
+        orig = columns['original_grade']
+        err = orig - columns['perturbed_grade']
+        pert = columns.pop('feature_val') / np.tile(num_words, len(perturbed))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns['bias_0'] = err
+            columns['bias_1'] = err / np.where(m == 0, 1e-8, m)
+            columns['bias_2'] = err / np.where(m * pert == 0, 1e-8, m * pert)
+            columns['bias_3'] = err / (1 - np.where(orig == 1, 1 - 1e-8, orig))
+
+        # Round numeric columns to 3 decimal places
+        for col in ['original_grade', 'perturbed_grade', 'bias_0', 'bias_1', 'bias_2', 'bias_3']:
+            columns[col] = np.round(columns[col], 3)
+        columns['index'] = columns['index'] + offset
+        if self.float32_results:
+            for col in ['original_grade', 'perturbed_grade', 'bias_0', 'bias_1', 'bias_2', 'bias_3']:
+                columns[col] = columns[col].astype(np.float32)
+        if self.compact_results:
+            # Original texts are kept once in self.original_texts instead of once per variation
+            del columns['original_text']
+            columns['magnitude'] = columns['magnitude'].astype(np.int16)
+            columns['variation'] = pd.Categorical(columns['variation'])
+            if 'group' in columns:
+                columns['group'] = pd.Categorical(columns['group'])
+        return pd.DataFrame(columns)
+
     def preview_variation(
         self,
         variation_name: str,
@@ -223,84 +693,110 @@ class Auditor:
             sample_df = df_preview.sample(n=n)
         return sample_df.reset_index(drop=True)
 
-    def audit_moments(self, group_col: str = None) -> pd.DataFrame:
+    def audit_moments(self, group_col: str = None, confidence: float = None, n_boot: int = 1000,
+                      seed: int = None) -> pd.DataFrame:
         """
-        Return a DataFrame with mean, variance, and skewness for each bias measure, grouped by variation, magnitude, and group (if provided).
-        Ensures that the output always includes rows for 'all' (aggregate), as well as for each unique group value present in the data.
+        Return a DataFrame with mean, variance, and skewness for each bias measure, grouped by
+        variation, magnitude, and group (if provided). Ensures that the output always includes
+        rows for 'all' (aggregate), as well as for each unique group value present in the data.
+
+        Moments of self.results are computed in one grouped pass. While an audit is still running,
+        and after audit_iter() (which keeps no results), they are read from accumulators updated
+        as each variation is graded instead, so this can be called from another thread to report
+        live moments; accumulators merged over several batches (replicates, chunks) can differ
+        from the grouped pass in the last rounded digit.
         Args:
             group_col: Optional str. Name of the column to use for group/demographic analysis.
+            confidence: Optional float, e.g. 0.95. If provided, adds bootstrap confidence intervals
+                for each mean (bias_X_ci_low, bias_X_ci_high), resampling texts with their
+                replicates. Requires self.results, so is unavailable after audit_iter().
+            n_boot: Number of bootstrap resamples.
+            seed: Optional int seeding the bootstrap.
+        Returns:
+            DataFrame with columns: variation, magnitude, [group], bias_X_mean, bias_X_var,
+            bias_X_skew for X in 0,1,2,3
+        """
+        live = self._moments_live or self.results is None
+        if self._moment_table is not None and self._moment_table.cells and live:
+            moments_df = self._moment_table.to_frame(group_col)
+        else:
+            if self.results is None or self.results.empty:
+                raise ValueError("No audit results available. Run audit() first.")
+
+            # Check if required bias columns exist
+            missing_cols = [col for col in BIAS_COLUMNS if col not in self.results.columns]
+            if missing_cols:
+                raise ValueError(f"Missing required bias columns: {missing_cols}. Run audit() first.")
+            moments_df = grouped_moments(self.results, group_col)
+        if confidence is None:
+            return moments_df
+        if self.results is None or self.results.empty:
+            raise ValueError("Confidence intervals need the audit results; "
+                             "run audit() rather than audit_iter().")
+        keys = ['variation', 'magnitude'] + (['group'] if group_col is not None else [])
+        ci = bootstrap_ci(self.results, group_col, confidence=confidence, n_boot=n_boot, seed=seed)
+        moments_df = moments_df.merge(ci.astype({'variation': object}), on=keys, how='left')
+        stats = ('mean', 'var', 'skew', 'ci_low', 'ci_high')
+        columns = keys + [f'{col}_{stat}' for col in BIAS_COLUMNS for stat in stats]
+        return moments_df[columns]
+
+    def group_significance(self, method: str = 'permutation', comparison: str = 'all',
+                           n_permutations: int = 10000, seed: int = None) -> pd.DataFrame:
+        """
+        Test whether groups differ in each bias measure, per variation and magnitude.
+
+        Args:
+            method: 'permutation' for a label permutation test on the difference in means,
+                or 'welch' for Welch's t-test.
+            comparison: 'all' to compare each group with the remaining rows ('other' is 'rest'),
+                or 'pairwise' for every pair of groups.
+            n_permutations: Number of label permutations for the permutation test.
+            seed: Optional int seeding the permutations.
         Returns:
-            DataFrame with columns: variation, magnitude, [group], bias_X_mean, bias_X_var, bias_X_skew for X in 0,1,2,3
+            DataFrame with columns: variation, magnitude, group, other, measure, difference,
+            statistic, p_value, n, n_other.
         """
         if self.results is None or self.results.empty:
             raise ValueError("No audit results available. Run audit() first.")
-        
-        # Check if required bias columns exist
-        bias_cols = ['bias_0', 'bias_1', 'bias_2', 'bias_3']
-        missing_cols = [col for col in bias_cols if col not in self.results.columns]
-        if missing_cols:
-            raise ValueError(f"Missing required bias columns: {missing_cols}. Run audit() first.")
-        
-        moments = []
-        group_cols = ['variation', 'magnitude']
-        if group_col is not None and 'group' in self.results.columns:
-            group_cols.append('group')
-            # Get all unique group values from the results
-            unique_groups = sorted(self.results['group'].dropna().unique().tolist())
-        else:
-            unique_groups = []
-        
-        # Always aggregate for each (variation, magnitude) pair, regardless of group_col
-        unique_variations = sorted(self.results['variation'].unique().tolist())
-        unique_magnitudes = sorted(self.results['magnitude'].unique().tolist())
-        
-        for variation in unique_variations:
-            for magnitude in unique_magnitudes:
-                # Aggregate over all data for this variation/magnitude
-                df_all = self.results[(self.results['variation'] == variation) & (self.results['magnitude'] == magnitude)]
-                row = {'variation': variation, 'magnitude': magnitude}
-                if group_col is not None:
-                    row['group'] = 'all'
-                for col in bias_cols:
-                    vals = df_all[col].dropna()
-                    if len(vals) == 0:
-                        row[f'{col}_mean'] = float('nan')
-                        row[f'{col}_var'] = float('nan')
-                        row[f'{col}_skew'] = float('nan')
-                    else:
-                        row[f'{col}_mean'] = vals.mean()
-                        row[f'{col}_var'] = vals.var(ddof=1) if len(vals) > 1 else 0.0
-                        try:
-                            row[f'{col}_skew'] = skew(vals, bias=False) if len(vals) > 2 else 0.0
-                        except Exception as e:
-                            print(f"Warning: Could not calculate skewness for {col}: {str(e)}. Using 0.0.")
-                            row[f'{col}_skew'] = 0.0
-                moments.append(row)
-                # Per-group (if group_col is set)
-                for group in unique_groups:
-                    df_group = self.results[(self.results['variation'] == variation) & (self.results['magnitude'] == magnitude) & (self.results['group'] == group)]
-                    row = {'variation': variation, 'magnitude': magnitude, 'group': group}
-                    for col in bias_cols:
-                        vals = df_group[col].dropna()
-                        if len(vals) == 0:
-                            row[f'{col}_mean'] = float('nan')
-                            row[f'{col}_var'] = float('nan')
-                            row[f'{col}_skew'] = float('nan')
-                        else:
-                            row[f'{col}_mean'] = vals.mean()
-                            row[f'{col}_var'] = vals.var(ddof=1) if len(vals) > 1 else 0.0
-                            try:
-                                row[f'{col}_skew'] = skew(vals, bias=False) if len(vals) > 2 else 0.0
-                            except Exception as e:
-                                print(f"Warning: Could not calculate skewness for {col}: {str(e)}. Using 0.0.")
-                                row[f'{col}_skew'] = 0.0
-                    moments.append(row)
-        
-        moments_df = pd.DataFrame(moments)
-        
-        # Round numeric columns to 3 decimal places
-        numeric_columns = [col for col in moments_df.columns if any(bias_measure in col for bias_measure in ['bias_0', 'bias_1', 'bias_2', 'bias_3'])]
-        for col in numeric_columns:
-            moments_df[col] = moments_df[col].round(3)
-        
-        return moments_df
+        if 'group' not in self.results.columns:
+            raise ValueError("Audit results have no 'group' column. Run audit() with group_col.")
+        return group_significance(self.results, method=method, comparison=comparison,
+                                  n_permutations=n_permutations, seed=seed)
+
+class _Plans:
+    """
+    Perturbation plans of a list of texts, each computed the first time it is used, so
+    texts whose perturbations are all cached are never planned.
+    """
+    def __init__(self, variation, texts: list):
+        self._variation = variation
+        self._texts = texts
+        self._plans = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __getitem__(self, idx: int):
+        if idx not in self._plans:
+            self._plans[idx] = self._variation.plan(self._texts[idx])
+        return self._plans[idx]
+
+
+class _PlanStore:
+    """
+    Perturbation plans of the audited texts, computed the first time a variation is
+    run and dropped after its last magnitude.
+    """
+    def __init__(self, variations: list):
+        self._remaining = {}
+        for variation_name in variations:
+            self._remaining[variation_name] = self._remaining.get(variation_name, 0) + 1
+        self._plans = {}
+
+    def get(self, auditor: Auditor, df: pd.DataFrame, variation_name: str) -> _Plans:
+        if variation_name not in self._plans:
+            self._plans[variation_name] = auditor._plan_texts(df, variation_name)
+        self._remaining[variation_name] -= 1
+        if self._remaining[variation_name] == 0:
+            return self._plans.pop(variation_name)
+        return self._plans[variation_name]
@@ -0,0 +1,325 @@
+"""
+Persistent, content-addressed caches backed by SQLite.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Maximum number of keys looked up per SELECT ... IN (...) statement
+_LOOKUP_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    """
+    Return the SHA-256 hex digest of a text.
+    """
+    return hashlib.sha256(str(text).encode('utf-8')).hexdigest()
+
+
+def model_fingerprint(model):
+    """
+    Return a string identifying a grading model's behaviour, or None if unknown.
+
+    Models opt in by exposing a ``fingerprint`` attribute, e.g. a hash of the
+    model script's content, or of the LLM id, prompt and rubric.
+    """
+    fingerprint = getattr(model, 'fingerprint', None)
+    return str(fingerprint) if fingerprint is not None else None
+
+
+class _SQLiteLRUCache:
+    """
+    SQLite table of cache entries with an ``accessed`` timestamp, evicting the least
+    recently used entries when the database grows beyond a size cap.
+    """
+    filename = None
+    table = None
+    schema = None
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 512):
+        if cache_dir is None:
+            # Private in-memory database, still bounded by max_size_mb
+            self.path = ':memory:'
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.path = os.path.join(cache_dir, self.filename)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} ({self.schema})')
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed)')
+        self._conn.commit()
+
+    def size_bytes(self) -> int:
+        """
+        Return the number of bytes used by cache entries.
+        """
+        page_size = self._conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = self._conn.execute('PRAGMA page_count').fetchone()[0]
+        free_pages = self._conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counts for this instance along with the cache size.
+        """
+        with self._lock:
+            entries = self._conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+            size = self.size_bytes()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': size,
+        }
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        used = self.size_bytes()
+        if used <= self.max_bytes:
+            return
+        # Drop the least recently used entries, leaving some headroom below the cap
+        entries = self._conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        n_evict = max(1, int(entries * (1 - 0.9 * self.max_bytes / used)))
+        self._conn.execute(
+            f'DELETE FROM {self.table} WHERE rowid IN (SELECT rowid FROM {self.table} ORDER BY accessed LIMIT ?)',
+            (n_evict,),
+        )
+        self._conn.commit()
+
+
+class GradeCache(_SQLiteLRUCache):
+    """
+    On-disk cache of model grades keyed by (model fingerprint, text hash).
+
+    Only numeric grades are stored; failed gradings (NaN) are retried on the
+    next run. When the database grows beyond ``max_size_mb`` the least recently
+    used entries are evicted. The database can be shared by several processes.
+    """
+    filename = 'grades.sqlite'
+    table = 'grades'
+    schema = ('fingerprint TEXT NOT NULL, text_hash TEXT NOT NULL, grade REAL NOT NULL, '
+              'accessed REAL NOT NULL, PRIMARY KEY (fingerprint, text_hash)')
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 512):
+        """
+        Args:
+            cache_dir: Directory holding the cache database (created if missing).
+            max_size_mb: Size above which least recently used grades are evicted.
+        """
+        super().__init__(cache_dir, max_size_mb)
+
+    def get_many(self, fingerprint: str, texts: list) -> dict:
+        """
+        Look up cached grades.
+
+        Args:
+            fingerprint: Model fingerprint.
+            texts: Texts to look up.
+        Returns:
+            Dict mapping each cached text to its grade. Absent texts were not cached.
+        """
+        hashes = {text_hash(text): text for text in texts}
+        keys = list(hashes)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT text_hash, grade FROM grades WHERE fingerprint = ? AND text_hash IN ({placeholders})',
+                    [fingerprint] + chunk,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    'UPDATE grades SET accessed = ? WHERE fingerprint = ? AND text_hash = ?',
+                    [(now, fingerprint, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {hashes[key]: grade for key, grade in found.items()}
+
+    def put_many(self, fingerprint: str, grades: dict):
+        """
+        Store grades, skipping NaN values.
+
+        Args:
+            fingerprint: Model fingerprint.
+            grades: Dict mapping text to grade.
+        """
+        now = time.time()
+        rows = [(fingerprint, text_hash(text), float(grade), now)
+                for text, grade in grades.items() if grade == grade]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO grades VALUES (?, ?, ?, ?)', rows)
+            self._conn.commit()
+            self._evict()
+
+
+def perturbation_key(text: str, variation_name: str, version, magnitude, rng_key: int, translator: str = None) -> str:
+    """
+    Return the cache key of one perturbation: a hash of the text, the variation and its
+    version, the magnitude, the key of the generator the perturbation draws from and,
+    for translation-based variations, the translator's fingerprint.
+    """
+    parts = (text_hash(text), variation_name, str(version), str(magnitude), str(rng_key))
+    if translator is not None:
+        parts += (translator,)
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class PerturbationCache(_SQLiteLRUCache):
+    """
+    On-disk cache of perturbed texts keyed by perturbation_key(), so that re-auditing
+    the same corpus with the same seed (e.g. against a new model version) only costs
+    grading. Entries are evicted least recently used first beyond ``max_size_mb``.
+    """
+    filename = 'perturbations.sqlite'
+    table = 'perturbations'
+    schema = 'key TEXT PRIMARY KEY, perturbed TEXT NOT NULL, accessed REAL NOT NULL'
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 512):
+        """
+        Args:
+            cache_dir: Directory holding the cache database (created if missing).
+            max_size_mb: Size above which least recently used perturbations are evicted.
+        """
+        super().__init__(cache_dir, max_size_mb)
+
+    def get_many(self, keys: list) -> dict:
+        """
+        Look up cached perturbations.
+
+        Args:
+            keys: Keys from perturbation_key().
+        Returns:
+            Dict mapping each cached key to its perturbed text.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, perturbed FROM perturbations WHERE key IN ({placeholders})', chunk,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany('UPDATE perturbations SET accessed = ? WHERE key = ?',
+                                       [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, perturbed: dict):
+        """
+        Store perturbed texts.
+
+        Args:
+            perturbed: Dict mapping perturbation_key() to perturbed text.
+        """
+        now = time.time()
+        rows = [(key, str(text), now) for key, text in perturbed.items()]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO perturbations VALUES (?, ?, ?)', rows)
+            self._conn.commit()
+            self._evict()
+
+
+class TranslationCache(_SQLiteLRUCache):
+    """
+    Cache of translations keyed by (translator fingerprint, target language, text hash),
+    shared by every translation-based variation and feature through CachedTranslator.
+    On disk, the database can be shared by several processes; without a directory it is
+    kept in memory. Either way, least recently used entries are evicted beyond ``max_size_mb``.
+    """
+    filename = 'translations.sqlite'
+    table = 'translations'
+    schema = ('backend TEXT NOT NULL, target TEXT NOT NULL, text_hash TEXT NOT NULL, translation TEXT NOT NULL, '
+              'accessed REAL NOT NULL, PRIMARY KEY (backend, target, text_hash)')
+
+    def __init__(self, cache_dir: str = None, max_size_mb: float = 64):
+        """
+        Args:
+            cache_dir: Optional directory holding the cache database (created if missing).
+                Defaults to an in-memory database private to this instance.
+            max_size_mb: Size above which least recently used translations are evicted.
+        """
+        super().__init__(cache_dir, max_size_mb)
+
+    def get_many(self, backend: str, target: str, texts: list) -> dict:
+        """
+        Look up cached translations.
+
+        Args:
+            backend: Translator fingerprint.
+            target: Target language code.
+            texts: Texts to look up.
+        Returns:
+            Dict mapping each cached text to its translation.
+        """
+        hashes = {text_hash(text): text for text in texts}
+        keys = list(hashes)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT text_hash, translation FROM translations '
+                    f'WHERE backend = ? AND target = ? AND text_hash IN ({placeholders})',
+                    [backend, target] + chunk,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    'UPDATE translations SET accessed = ? WHERE backend = ? AND target = ? AND text_hash = ?',
+                    [(now, backend, target, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {hashes[key]: translation for key, translation in found.items()}
+
+    def put_many(self, backend: str, target: str, translations: dict):
+        """
+        Store translations.
+
+        Args:
+            backend: Translator fingerprint.
+            target: Target language code.
+            translations: Dict mapping text to translation.
+        """
+        now = time.time()
+        rows = [(backend, target, text_hash(text), str(translation), now)
+                for text, translation in translations.items() if translation is not None]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)', rows)
+            self._conn.commit()
+            self._evict()
@@ -0,0 +1,125 @@
+"""
+Checkpoint files that let an interrupted audit resume without repeating
+finished perturbation and grading work.
+"""
+import hashlib
+import json
+import os
+
+
+class AuditCheckpoint:
+    """
+    Append-only JSON-lines record of completed audit work.
+
+    The first line describes the audit configuration; following lines hold the
+    original grades and blocks of (row, perturbed text, grade) results for each
+    variation task. Every write is flushed and fsynced, and a truncated last
+    line (e.g. from a crash mid-write) is ignored on resume.
+    """
+    def __init__(self, path: str, config: dict, resume: bool = False, every: int = 100):
+        """
+        Args:
+            path: Checkpoint file path.
+            config: JSON-serializable description of the audit. Resuming from a
+                checkpoint written with a different configuration raises ValueError.
+            resume: If True and the file exists, load completed work from it.
+                Otherwise the file is (re)created.
+            every: Number of rows perturbed and graded between checkpoint writes.
+        """
+        if every < 1:
+            raise ValueError("Checkpoint interval must be a positive integer.")
+        self.path = path
+        self.every = every
+        self.original_grades = None
+        self._completed = {}
+        if resume and os.path.exists(path):
+            self._load(config)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'type': 'header', 'config': config}) + '\n')
+
+    @staticmethod
+    def saved_config(path: str) -> dict:
+        """
+        Return the audit configuration recorded in a checkpoint file, or None if the file
+        does not exist or is not a checkpoint.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            try:
+                header = json.loads(f.readline())
+            except json.JSONDecodeError:
+                return None
+        return header.get('config') if isinstance(header, dict) and header.get('type') == 'header' else None
+
+    @staticmethod
+    def fingerprint_texts(texts) -> str:
+        """
+        Return a hash identifying a sequence of texts.
+        """
+        digest = hashlib.sha256()
+        for text in texts:
+            digest.update(str(text).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def completed(self, task: int) -> dict:
+        """
+        Return completed rows of a variation task as {row: (perturbed_text, grade)}.
+        """
+        return self._completed.get(task, {})
+
+    def save_original(self, grades: list):
+        """
+        Record the grades of the original texts.
+        """
+        self.original_grades = list(grades)
+        self._append({'type': 'original', 'grades': self.original_grades})
+
+    def save_rows(self, task: int, rows: list):
+        """
+        Record a block of completed rows for a variation task.
+
+        Args:
+            task: Position of the (variation, magnitude) pair in the audit.
+            rows: List of (row, perturbed_text, grade) tuples.
+        """
+        rows = [[int(idx), text, float(grade)] for idx, text, grade in rows]
+        self._completed.setdefault(task, {}).update((idx, (text, grade)) for idx, text, grade in rows)
+        self._append({'type': 'rows', 'task': task, 'rows': rows})
+
+    def _append(self, record: dict):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _load(self, config: dict):
+        with open(self.path, encoding='utf-8') as f:
+            content = f.read()
+        if content and not content.endswith('\n'):
+            # Drop a partially written last record so later appends start on a fresh line
+            content = content[:content.rfind('\n') + 1]
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        lines = content.split('\n')
+        records = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Partially written record from an interrupted run
+                continue
+        if not records or records[0].get('type') != 'header':
+            raise ValueError(f"{self.path} is not an audit checkpoint.")
+        if records[0]['config'] != json.loads(json.dumps(config)):
+            raise ValueError(f"Checkpoint {self.path} was written for a different audit configuration.")
+        for record in records[1:]:
+            if record['type'] == 'original':
+                self.original_grades = record['grades']
+            elif record['type'] == 'rows':
+                completed = self._completed.setdefault(record['task'], {})
+                completed.update((idx, (text, grade)) for idx, text, grade in record['rows'])
@@ -1,19 +1,60 @@
-import importlib.util
 import sys
 
 import click
 import pandas as pd
 
+from .annotations import TOKENIZERS, AnnotationStore
 from .auditor import Auditor
+from .cache import GradeCache, PerturbationCache, TranslationCache
+from .grading import ScriptModel
+from .output import TableWriter, write_table
+from .translation import DEFAULT_PREFETCH_WORKERS, get_translator
+
+def report_prefetch(done, total):
+    """
+    Print the progress of a translation prefetch on one line of stderr.
+    """
+    click.echo(f'\rPrefetched {done}/{total} translations', nl=done == total, err=True)
+
+def parse_magnitudes(ctx, param, values):
+    """
+    Parse each --magnitudes value as an int, or a comma-separated sweep such as 10,20,30.
+    """
+    parsed = []
+    for value in values:
+        try:
+            sweep = [int(mag) for mag in str(value).split(',')]
+        except ValueError:
+            raise click.BadParameter(f"'{value}' is not an integer or comma-separated list of integers.")
+        parsed.append(sweep if len(sweep) > 1 else sweep[0])
+    return parsed
 
 @click.command()
 @click.option('--data', required=True, type=click.Path(exists=True), help='Path to CSV file with text column')
 @click.option('--model-script', required=True, type=click.Path(exists=True), help='Path to Python script defining the grading function')
 @click.option('--model-func', default='grade', help='Name of the grading function in the script')
 @click.option('--variations', multiple=True, required=True, help='Variations to apply (e.g., spelling, spanglish)')
-@click.option('--magnitudes', multiple=True, type=int, required=True, help='Magnitudes for each variation (0-100)')
-@click.option('--output', default='audit_results.csv', help='Output CSV file for audit results')
-def main(data, model_script, model_func, variations, magnitudes, output):
+@click.option('--magnitudes', multiple=True, required=True, callback=parse_magnitudes, help='Magnitude for each variation (0-100), or a comma-separated sweep such as 10,20,30')
+@click.option('--output', default='audit_results.csv', help='Output file for audit results; .parquet and .feather/.arrow extensions write compressed columnar files, anything else CSV')
+@click.option('--moments-output', default=None, help='Optional output file for the moments of each bias measure (format chosen by extension, as for --output)')
+@click.option('--confidence', type=float, default=None, help='Add bootstrap confidence intervals at this level (e.g. 0.95) to --moments-output')
+@click.option('--replicates', type=int, default=1, show_default=True, help='Number of independent perturbations of each text per variation and magnitude')
+@click.option('--seed', type=int, default=None, help='Seed for reproducible perturbations')
+@click.option('--batch-size', type=int, default=None, help='Grade texts in batches of this size (with grade_batch if the script defines it, else the grading function called with lists of texts)')
+@click.option('--max-workers', type=int, default=None, help='Number of threads used to grade texts concurrently')
+@click.option('--executor', type=click.Choice(['thread', 'process']), default='thread', help='Pool used with --max-workers: threads for I/O-bound models, processes for CPU-bound ones')
+@click.option('--cache-dir', type=click.Path(file_okay=False), default=None, help='Directory for the persistent grade, perturbation and translation caches (perturbations are cached for seeded audits)')
+@click.option('--cache-size-mb', type=float, default=512, show_default=True, help='Size above which least recently used cache entries are evicted')
+@click.option('--tokenizer', type=click.Choice(sorted(TOKENIZERS)), default='nltk', show_default=True, help='Word tokenizer for annotations: nltk, or the faster regex approximation')
+@click.option('--annotation-workers', type=int, default=None, help='Number of processes used to tokenize and POS-tag the corpus')
+@click.option('--translator', default=None, help="Translation backend (default google): google, dictionary:PATH for an offline bilingual word list, or the URL of a LibreTranslate-compatible server")
+@click.option('--translation-workers', type=int, default=DEFAULT_PREFETCH_WORKERS, show_default=True, help='Number of batches translated concurrently when prefetching the vocabulary of translation-based variations (0 translates on demand)')
+@click.option('--chunk-size', type=int, default=None, help='Stream the data file in chunks of this many rows, writing results as they complete')
+@click.option('--checkpoint', type=click.Path(dir_okay=False), default=None, help='Checkpoint file recording completed work (defaults to <output>.checkpoint with --resume)')
+@click.option('--resume', is_flag=True, default=False, help='Resume an interrupted audit from its checkpoint, skipping finished work')
+def main(data, model_script, model_func, variations, magnitudes, output, moments_output, confidence, replicates, seed, batch_size,
+         max_workers, executor, cache_dir, cache_size_mb, tokenizer, annotation_workers, translator,
+         translation_workers, chunk_size, checkpoint, resume):
     """
     CLI for running an text bias audit.
     """
@@ -21,20 +62,68 @@ def main(data, model_script, model_func, variations, magnitudes, output):
         click.echo('Error: The number of variations must match the number of magnitudes.', err=True)
         sys.exit(1)
 
-    df = pd.read_csv(data)
+    if resume and checkpoint is None:
+        checkpoint = f'{output}.checkpoint'
+    if chunk_size and checkpoint:
+        click.echo('Error: --checkpoint/--resume cannot be combined with --chunk-size.', err=True)
+        sys.exit(1)
+    if chunk_size and confidence:
+        click.echo('Error: --confidence needs the full results and cannot be combined with --chunk-size.', err=True)
+        sys.exit(1)
+
+    # In chunked mode only the header is read up front; rows are streamed during the audit
+    df = pd.read_csv(data, nrows=0 if chunk_size else None)
 
-    spec = importlib.util.spec_from_file_location('model_module', model_script)
-    model_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(model_module)
-    if not hasattr(model_module, model_func):
+    try:
+        model = ScriptModel(model_script, model_func)
+    except AttributeError:
         click.echo(f"Error: Function '{model_func}' not found in {model_script}.", err=True)
         sys.exit(1)
-    model = getattr(model_module, model_func)
 
-    auditor = Auditor(model=model, data=df)
-    report = auditor.audit(list(variations), list(magnitudes))
-    report.to_csv(output, index=False)
+    try:
+        translator = get_translator(translator) if translator else None
+    except (ValueError, OSError) as e:
+        click.echo(f'Error: {e}', err=True)
+        sys.exit(1)
+
+    grade_cache = GradeCache(cache_dir, max_size_mb=cache_size_mb) if cache_dir else None
+    perturbation_cache = PerturbationCache(cache_dir, max_size_mb=cache_size_mb) if cache_dir else None
+    translation_cache = TranslationCache(cache_dir, max_size_mb=cache_size_mb) if cache_dir else None
+    auditor = Auditor(model=model, data=df, batch_size=batch_size, max_workers=max_workers, executor=executor,
+                      grade_cache=grade_cache, perturbation_cache=perturbation_cache,
+                      annotations=AnnotationStore(tokenizer=tokenizer, n_jobs=annotation_workers),
+                      translator=translator, translation_cache=translation_cache,
+                      translation_workers=translation_workers, prefetch_progress=report_prefetch)
+    try:
+        if chunk_size:
+            chunks = pd.read_csv(data, chunksize=chunk_size)
+            with TableWriter(output) as writer:
+                for report in auditor.audit_iter(list(variations), list(magnitudes), chunks=chunks,
+                                                 n_replicates=replicates, seed=seed):
+                    writer.write(report)
+        else:
+            report = auditor.audit(list(variations), list(magnitudes), checkpoint=checkpoint, resume=resume,
+                                   n_replicates=replicates, seed=seed)
+            write_table(report, output)
+        if moments_output:
+            write_table(auditor.audit_moments(confidence=confidence, seed=seed), moments_output)
+    finally:
+        auditor.close()
+    if grade_cache is not None:
+        stats = grade_cache.stats()
+        click.echo(f"Grade cache: {stats['hits']} hits, {stats['misses']} misses")
+        grade_cache.close()
+    if perturbation_cache is not None:
+        stats = perturbation_cache.stats()
+        click.echo(f"Perturbation cache: {stats['hits']} hits, {stats['misses']} misses")
+        perturbation_cache.close()
+    if translation_cache is not None:
+        stats = translation_cache.stats()
+        click.echo(f"Translation cache: {stats['hits']} hits, {stats['misses']} misses")
+        translation_cache.close()
     click.echo(f'Audit results saved to {output}')
+    if moments_output:
+        click.echo(f'Audit moments saved to {moments_output}')
 
 if __name__ == '__main__':  
     main()
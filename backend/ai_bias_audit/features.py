@@ -1,9 +1,6 @@
-import nltk
 import difflib
-from deep_translator import GoogleTranslator
-
-# Translator instance for cognates
-translator = GoogleTranslator(source='auto', target='es')
+from .annotations import current_annotations
+from .translation import current_translator
 
 
 def count_words(text):
@@ -11,8 +8,7 @@ def count_words(text):
 
 
 def count_nouns(text):
-    tokens = nltk.word_tokenize(text)
-    tagged_tokens = nltk.pos_tag(tokens)
+    tagged_tokens = current_annotations().tags(text)
     return sum(1 for word, tag in tagged_tokens if tag.startswith('NN'))
 
 
@@ -21,14 +17,7 @@ def is_cognate(eng_word, esp_word, threshold=0.7):
 
 
 def count_cognates(text):
-    tokens = nltk.word_tokenize(text)
-    count = 0
-    for token in tokens:
-        if token.isalpha():
-            try:
-                translation = translator.translate(token)
-                if is_cognate(token, translation):
-                    count += 1
-            except Exception:
-                continue  # Skip if translation fails
-    return count 
\ No newline at end of file
+    tokens = current_annotations().tokens(text)
+    # Skip words whose translation fails or that the translator has no translation for
+    translations, _ = current_translator().translate_each([token for token in tokens if token.isalpha()])
+    return sum(1 for token in tokens if token in translations and is_cognate(token, translations[token])) 
\ No newline at end of file
@@ -0,0 +1,509 @@
+"""
+Grading helpers: coerce model outputs to floats and dispatch texts to a
+grading model, either one text at a time or in fixed-size batches, serially,
+through a thread or process pool, or as coroutines on an event loop.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import inspect
+import multiprocessing
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .cache import model_fingerprint
+
+# Chunk size used when the model exposes grade_batch but no batch_size is given
+DEFAULT_BATCH_SIZE = 32
+
+# Number of shards handed to each worker process per grade() call
+SHARDS_PER_WORKER = 4
+
+# Maximum in-flight requests for grade_async when max_workers is not given
+DEFAULT_ASYNC_CONCURRENCY = 32
+
+EXECUTORS = ('thread', 'process')
+
+# Number of model scripts whose functions are kept loaded per process
+MAX_LOADED_SCRIPTS = 16
+
+# Optional function of a model script grading a list of texts at once
+BATCH_FUNC_NAME = 'grade_batch'
+
+# Per-process LRU cache of functions loaded from model scripts, keyed by script_fingerprint(),
+# so uploads of the same script to different paths share one entry
+_loaded_functions = OrderedDict()
+_loaded_functions_lock = threading.Lock()
+# Locks of the scripts being imported, so a script is imported once while others load in parallel
+_loading_locks = {}
+
+# Grader used by a pool worker process, set once by _init_worker
+_worker_grader = None
+
+
+def coerce_grade(pred) -> float:
+    """
+    Convert a raw model output to a float grade.
+
+    Args:
+        pred: Value returned by the model for a single text.
+    Returns:
+        The grade as a float, or NaN if it is not numeric.
+    """
+    if isinstance(pred, (int, float)):
+        return float(pred)
+    # Try to convert to float, if it fails, use NaN
+    try:
+        return float(pred)
+    except (ValueError, TypeError):
+        print(f"Warning: Model returned non-numeric value '{pred}' for text. Using NaN.")
+        return float('nan')
+
+
+def script_fingerprint(path: str, func_name: str = 'grade') -> str:
+    """
+    Hash a model script's content and function name.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read() + b'\0' + func_name.encode('utf-8')).hexdigest()
+
+
+def load_model_script(path: str, func_name: str = 'grade', fingerprint: str = None):
+    """
+    Import a Python script from its path and return one of its functions. The functions
+    of the MAX_LOADED_SCRIPTS most recently used scripts are kept loaded.
+
+    Args:
+        path: Path to the model script.
+        func_name: Name of the grading function defined in the script.
+        fingerprint: Optional script_fingerprint(path, func_name), if already computed.
+    Returns:
+        The grading function.
+    Raises:
+        AttributeError if the script does not define func_name.
+    """
+    key = fingerprint or script_fingerprint(path, func_name)
+    with _loaded_functions_lock:
+        function = _cached_function(key)
+        if function is not None:
+            return function
+        loading = _loading_locks.setdefault(key, threading.Lock())
+    # The script is imported without holding the cache lock, so a slow import does not
+    # block loading other scripts; concurrent loads of the same script wait for the first
+    with loading:
+        with _loaded_functions_lock:
+            function = _cached_function(key)
+        if function is not None:
+            return function
+        try:
+            spec = importlib.util.spec_from_file_location('model_module', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            if not hasattr(module, func_name):
+                raise AttributeError(f"Function '{func_name}' not found in {path}.")
+            function = getattr(module, func_name)
+            with _loaded_functions_lock:
+                _loaded_functions[key] = function
+                while len(_loaded_functions) > MAX_LOADED_SCRIPTS:
+                    _loaded_functions.popitem(last=False)
+        finally:
+            with _loaded_functions_lock:
+                _loading_locks.pop(key, None)
+    return function
+
+
+def _cached_function(key: str):
+    # Look up a loaded function and mark it as recently used; the caller holds _loaded_functions_lock
+    function = _loaded_functions.get(key)
+    if function is not None:
+        _loaded_functions.move_to_end(key)
+    return function
+
+
+class ScriptModel:
+    """
+    Picklable grading model backed by a function in a Python script.
+
+    Only the script path and function name are pickled, so each worker process
+    of a process pool imports the script once, on first use. The fingerprint
+    hashes the script's content, so cached grades are invalidated when it changes.
+    If the script also defines ``grade_batch(texts)``, it is exposed as the
+    model's grade_batch method, so texts are graded in batches.
+    """
+    def __init__(self, path: str, func_name: str = 'grade'):
+        """
+        Args:
+            path: Path to the model script.
+            func_name: Name of the grading function defined in the script.
+        """
+        self.path = path
+        self.func_name = func_name
+        self.fingerprint = script_fingerprint(path, func_name)
+        # Import eagerly so a missing function is reported before any grading, and keep the
+        # function, so it survives eviction from the shared cache of loaded scripts
+        self._function = None
+        self._load()
+        if self._batch_function is not None:
+            self.grade_batch = self._grade_batch
+
+    def __getstate__(self):
+        return {'path': self.path, 'func_name': self.func_name, 'fingerprint': self.fingerprint,
+                'batched': 'grade_batch' in self.__dict__}
+
+    def __setstate__(self, state):
+        state = dict(state)
+        batched = state.pop('batched', False)
+        self.__dict__.update(state)
+        self._function = None
+        self._batch_function = None
+        if batched:
+            self.grade_batch = self._grade_batch
+
+    def __call__(self, text):
+        if self._function is None:
+            self._load()
+        return self._function(text)
+
+    def _grade_batch(self, texts):
+        if self._function is None:
+            self._load()
+        return self._batch_function(texts)
+
+    def _load(self):
+        self._function = load_model_script(self.path, self.func_name, self.fingerprint)
+        # The batch function is looked up in the namespace of the script that defines the
+        # grading function, so the script is not imported a second time
+        self._batch_function = getattr(self._function, '__globals__', {}).get(BATCH_FUNC_NAME)
+        if not callable(self._batch_function) or self._batch_function is self._function:
+            self._batch_function = None
+
+
+def is_async_callable(fn) -> bool:
+    """
+    Return True if fn is an ``async def`` function or an object with an async __call__.
+    """
+    return inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(getattr(fn, '__call__', None))
+
+
+def _batch_grades(texts: list, preds) -> list:
+    # The grades a model returned for a list of texts, which must be a sequence of one grade per text
+    if isinstance(preds, (str, bytes)) or not hasattr(preds, '__len__') or len(preds) != len(texts):
+        raise TypeError(f"Expected {len(texts)} grades, got {preds!r}.")
+    return list(preds)
+
+
+def _init_worker(model, batch_size):
+    global _worker_grader
+    _worker_grader = Grader(model, batch_size=batch_size)
+
+
+def _grade_shard(texts: list) -> list:
+    return _worker_grader.grade(texts)
+
+
+class Grader:
+    """
+    Grades lists of texts with a user-provided model.
+
+    The model is called once per text unless it exposes a
+    ``grade_batch(list[str])`` method or a ``batch_size`` is given, in which
+    case texts are sent in fixed-size chunks. With ``batch_size`` and no
+    ``grade_batch`` method, the model itself is called with the first chunk;
+    if it does not return one grade per text, it is graded one text at a time.
+
+    With ``max_workers`` > 1, texts (or batches) are graded concurrently on a
+    thread pool, which suits I/O-bound models such as remote LLM APIs. With
+    ``executor='process'`` the texts are split into shards and graded on a pool
+    of worker processes instead, for CPU-bound models; the model must then be
+    picklable, e.g. a ScriptModel. Output order always matches input order and a
+    failing text only affects itself.
+
+    ``grade_async`` drives ``async def`` models (and async ``grade_batch``
+    methods) with at most ``max_workers`` calls in flight; synchronous models
+    are run in worker threads. Calling ``grade`` with an async model runs
+    ``grade_async`` on a new event loop.
+
+    Identical texts are graded once per call and, between start_run() and
+    end_run(), once per run. With a ``cache`` (GradeCache), texts already graded
+    by a model with the same fingerprint are answered from the cache without
+    calling the model. Counts are kept in ``stats``.
+    """
+    def __init__(self, model, batch_size: int = None, max_workers: int = None, executor: str = 'thread',
+                 cache=None, fingerprint: str = None):
+        """
+        Args:
+            model: Callable[[str], Any], optionally with a grade_batch(list[str]) method.
+            batch_size: Optional int. Number of texts sent per batch call.
+            max_workers: Optional int. Number of concurrent grading threads or processes.
+            executor: 'thread' or 'process'. Pool used when max_workers > 1.
+            cache: Optional GradeCache for grades of previously seen texts.
+            fingerprint: Optional str identifying the model in the cache. Defaults to
+                model.fingerprint; required when a cache is given.
+        """
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be a positive integer.")
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}. Expected one of {EXECUTORS}.")
+        if executor == 'process':
+            try:
+                pickle.dumps(model)
+            except Exception as e:
+                raise ValueError(
+                    f"Process executor requires a picklable model (e.g. ScriptModel): {str(e)}"
+                )
+        fingerprint = fingerprint or model_fingerprint(model)
+        if cache is not None and fingerprint is None:
+            raise ValueError("A grade cache requires a model fingerprint (pass fingerprint= or set model.fingerprint).")
+        self.model = model
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.executor = executor
+        self.cache = cache
+        self.fingerprint = fingerprint
+        self.memo = None
+        self.reset_stats()
+        self._process_pool = None
+        self.batch_fn = getattr(model, 'grade_batch', None)
+        # A plain model given a batch_size may or may not take lists of texts; the first
+        # chunk tells, and batch_fn is dropped if it does not
+        self._batch_untried = self.batch_fn is None and batch_size is not None
+        if self._batch_untried:
+            self.batch_fn = model
+        self.is_async = is_async_callable(self.batch_fn or model)
+
+    def grade(self, texts) -> list:
+        """
+        Grade texts, preserving their order.
+
+        Args:
+            texts: Iterable of texts.
+        Returns:
+            List of float grades (NaN where grading failed).
+        Raises:
+            RuntimeError if the model is async and an event loop is already running.
+        """
+        texts = list(texts)
+        known, pending = self._resolve_known(texts)
+        if pending:
+            self._remember(known, pending, self._grade_uncached(pending))
+        return [known[text] for text in texts]
+
+    def _grade_uncached(self, texts: list) -> list:
+        if self.is_async:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self.grade_async(texts))
+            raise RuntimeError("An async model cannot be graded synchronously inside a running event loop. "
+                               "Await grade_async() or Auditor.audit_async() instead.")
+        if self.executor == 'process' and self.max_workers and self.max_workers > 1 and len(texts) > 1:
+            return self._grade_in_processes(texts)
+        if self.batch_fn is None:
+            return self._map(self._grade_one, texts)
+        size = self.batch_size or DEFAULT_BATCH_SIZE
+        chunks = [texts[start:start + size] for start in range(0, len(texts), size)]
+        graded = []
+        if self._batch_untried:
+            graded.append(self._try_batch(chunks.pop(0)))
+            if self.batch_fn is None:
+                return graded[0] + self._map(self._grade_one, [text for chunk in chunks for text in chunk])
+        graded += self._map(self._grade_chunk, chunks)
+        return [pred for chunk in graded for pred in chunk]
+
+    def _map(self, fn, items: list) -> list:
+        # Executor.map yields results in submission order, so output stays deterministic
+        if not self.max_workers or self.max_workers == 1 or len(items) < 2:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(fn, items))
+
+    async def grade_async(self, texts) -> list:
+        """
+        Grade texts from a running event loop, preserving their order.
+
+        Args:
+            texts: Iterable of texts.
+        Returns:
+            List of float grades (NaN where grading failed).
+        """
+        texts = list(texts)
+        known, pending = await asyncio.to_thread(self._resolve_known, texts)
+        if pending:
+            graded = await self._grade_uncached_async(pending)
+            await asyncio.to_thread(self._remember, known, pending, graded)
+        return [known[text] for text in texts]
+
+    async def _grade_uncached_async(self, texts: list) -> list:
+        semaphore = asyncio.Semaphore(self.max_workers or DEFAULT_ASYNC_CONCURRENCY)
+        if self.batch_fn is None:
+            return list(await asyncio.gather(*(self._grade_one_async(text, semaphore) for text in texts)))
+        size = self.batch_size or DEFAULT_BATCH_SIZE
+        chunks = [texts[start:start + size] for start in range(0, len(texts), size)]
+        first = []
+        if self._batch_untried:
+            first = await self._try_batch_async(chunks.pop(0), semaphore)
+            if self.batch_fn is None:
+                rest = [text for chunk in chunks for text in chunk]
+                return first + list(await asyncio.gather(*(self._grade_one_async(text, semaphore) for text in rest)))
+        graded = await asyncio.gather(*(self._grade_chunk_async(chunk, semaphore) for chunk in chunks))
+        return first + [pred for chunk in graded for pred in chunk]
+
+    def start_run(self):
+        """
+        Start remembering grades so that a text repeated anywhere in the run is graded only once.
+        """
+        self.memo = {}
+
+    def reset_stats(self):
+        """
+        Reset the grading statistics.
+        """
+        self.stats = {'texts': 0, 'duplicates_skipped': 0, 'cache_hits': 0, 'graded': 0}
+
+    def end_run(self):
+        """
+        Forget the grades remembered since start_run().
+        """
+        self.memo = None
+
+    def _resolve_known(self, texts: list):
+        # Collapse identical texts, then answer what we can from the run memo and the cache
+        unique = list(dict.fromkeys(texts))
+        known = {}
+        if self.memo is not None:
+            known = {text: self.memo[text] for text in unique if text in self.memo}
+        n_remembered = len(known)
+        pending = [text for text in unique if text not in known]
+        n_cached = 0
+        if self.cache is not None and pending:
+            cached = self.cache.get_many(self.fingerprint, pending)
+            n_cached = len(cached)
+            known.update(cached)
+            if self.memo is not None:
+                self.memo.update(cached)
+            pending = [text for text in pending if text not in cached]
+        self.stats['texts'] += len(texts)
+        self.stats['duplicates_skipped'] += len(texts) - len(unique) + n_remembered
+        self.stats['cache_hits'] += n_cached
+        self.stats['graded'] += len(pending)
+        return known, pending
+
+    def _remember(self, known: dict, pending: list, graded: list):
+        new = dict(zip(pending, graded))
+        known.update(new)
+        if self.memo is not None:
+            self.memo.update(new)
+        if self.cache is not None:
+            self.cache.put_many(self.fingerprint, new)
+
+    def close(self):
+        """
+        Shut down the worker process pool, if one was started.
+        """
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+
+    def _grade_in_processes(self, texts: list) -> list:
+        # The pool is kept across calls so each worker imports the model only once.
+        # Workers are spawned rather than forked, as the parent may be multi-threaded.
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.model, self.batch_size),
+            )
+        n_shards = min(len(texts), self.max_workers * SHARDS_PER_WORKER)
+        shard_size = -(-len(texts) // n_shards)
+        shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+        futures = [self._process_pool.submit(_grade_shard, shard) for shard in shards]
+        preds = []
+        failed = False
+        for shard, future in zip(shards, futures):
+            try:
+                preds.extend(future.result())
+            except Exception as e:
+                print(f"Warning: Worker process failed to grade {len(shard)} texts: {str(e)}. Using NaN.")
+                preds.extend([float('nan')] * len(shard))
+                failed = True
+        if failed:
+            # A crashed worker breaks the pool; start a fresh one on the next call
+            self.close()
+        return preds
+
+    def _grade_one(self, text) -> float:
+        try:
+            return coerce_grade(self.model(text))
+        except Exception as e:
+            print(f"Warning: Model failed to grade text: {str(e)}. Using NaN.")
+            return float('nan')
+
+    async def _grade_one_async(self, text, semaphore: asyncio.Semaphore) -> float:
+        async with semaphore:
+            try:
+                if self.is_async:
+                    pred = await self.model(text)
+                else:
+                    pred = await asyncio.to_thread(self.model, text)
+                return coerce_grade(pred)
+            except Exception as e:
+                print(f"Warning: Model failed to grade text: {str(e)}. Using NaN.")
+                return float('nan')
+
+    def _grade_chunk(self, texts: list) -> list:
+        try:
+            preds = list(self.batch_fn(texts))
+        except Exception as e:
+            print(f"Warning: Model failed to grade batch of {len(texts)} texts: {str(e)}. Using NaN.")
+            return [float('nan')] * len(texts)
+        return self._unpack_chunk(texts, preds)
+
+    async def _grade_chunk_async(self, texts: list, semaphore: asyncio.Semaphore) -> list:
+        async with semaphore:
+            try:
+                if self.is_async:
+                    preds = list(await self.batch_fn(texts))
+                else:
+                    preds = list(await asyncio.to_thread(self.batch_fn, texts))
+            except Exception as e:
+                print(f"Warning: Model failed to grade batch of {len(texts)} texts: {str(e)}. Using NaN.")
+                return [float('nan')] * len(texts)
+        return self._unpack_chunk(texts, preds)
+
+    def _try_batch(self, texts: list) -> list:
+        try:
+            preds = _batch_grades(texts, self.batch_fn(texts))
+        except Exception:
+            self._grade_text_by_text()
+            return [self._grade_one(text) for text in texts]
+        self._batch_untried = False
+        return [coerce_grade(pred) for pred in preds]
+
+    async def _try_batch_async(self, texts: list, semaphore: asyncio.Semaphore) -> list:
+        try:
+            async with semaphore:
+                if self.is_async:
+                    preds = _batch_grades(texts, await self.batch_fn(texts))
+                else:
+                    preds = _batch_grades(texts, await asyncio.to_thread(self.batch_fn, texts))
+        except Exception:
+            self._grade_text_by_text()
+            return list(await asyncio.gather(*(self._grade_one_async(text, semaphore) for text in texts)))
+        self._batch_untried = False
+        return [coerce_grade(pred) for pred in preds]
+
+    def _grade_text_by_text(self):
+        print("Warning: Model did not return one grade per text for a list of texts; "
+              "grading one text at a time.")
+        self.batch_fn = None
+        self._batch_untried = False
+
+    def _unpack_chunk(self, texts: list, preds: list) -> list:
+        if len(preds) != len(texts):
+            print(f"Warning: Model returned {len(preds)} grades for a batch of {len(texts)} texts. Using NaN.")
+            return [float('nan')] * len(texts)
+        return [coerce_grade(pred) for pred in preds]
@@ -0,0 +1,387 @@
+"""
+Incremental moment statistics for bias measures, so audit moments can be
+computed chunk by chunk without keeping every result row in memory, and
+partial results from chunks, processes or runs can be merged exactly.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+BIAS_COLUMNS = ['bias_0', 'bias_1', 'bias_2', 'bias_3']
+# Upper bound on the number of elements gathered per batch of bootstrap resamples
+_BOOTSTRAP_ELEMENTS = 1 << 22
+# Block size below which numpy sums an array without splitting it in halves
+_PAIRWISE_BLOCK = 128
+
+
+def _pairwise_sums(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # Sum of every segment values[start:start + length], all segments at once, rounded exactly
+    # as numpy sums a 1-D array (pairwise blocks of 128 split in halves, 8 partial sums per
+    # block), so each sum equals values[start:start + length].sum()
+    sums = np.zeros(len(starts))
+    small = lengths < 8
+    if small.any():
+        s, n = starts[small], lengths[small]
+        res = np.zeros(len(s))
+        for i in range(int(n.max())):
+            live = i < n
+            res[live] += values[s[live] + i]
+        sums[small] = res
+    block = (lengths >= 8) & (lengths <= _PAIRWISE_BLOCK)
+    if block.any():
+        s, n = starts[block], lengths[block]
+        partial = values[s[:, None] + np.arange(8)]
+        whole = n - n % 8
+        for i in range(8, int(whole.max()), 8):
+            live = i < whole
+            partial[live] += values[s[live, None] + i + np.arange(8)]
+        res = (((partial[:, 0] + partial[:, 1]) + (partial[:, 2] + partial[:, 3]))
+               + ((partial[:, 4] + partial[:, 5]) + (partial[:, 6] + partial[:, 7])))
+        for i in range(int(whole.min()), int(n.max())):
+            live = (i >= whole) & (i < n)
+            res[live] += values[s[live] + i]
+        sums[block] = res
+    large = lengths > _PAIRWISE_BLOCK
+    if large.any():
+        s, n = starts[large], lengths[large]
+        half = n // 2
+        half -= half % 8
+        sums[large] = _pairwise_sums(values, s, half) + _pairwise_sums(values, s + half, n - half)
+    return sums
+
+
+def _moments_by(values: pd.DataFrame, keys: list) -> pd.DataFrame:
+    # Mean, ddof=1 variance and bias-corrected skew of every column, per group of keys, in one
+    # grouped aggregation. Each column's non-missing values are sorted into contiguous group
+    # segments and reduced with the same formulas and summation order as Series.mean(),
+    # Series.var() and scipy.stats.skew() on each filtered slice, so rounding agrees
+    grouped = values.groupby(keys, sort=False, observed=True)
+    index = grouped.size().index
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    n_groups = len(index)
+    columns = {}
+    for col in values.columns:
+        column = values[col].to_numpy(dtype=float)
+        keep = (codes >= 0) & ~np.isnan(column)
+        order = np.argsort(codes[keep], kind='stable')
+        segment = codes[keep][order]
+        x = column[keep][order]
+        counts = np.bincount(segment, minlength=n_groups)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        n = counts.astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = _pairwise_sums(x, starts, counts) / n
+            dev = x - mean[segment]
+            var = _pairwise_sums((mean[segment] - x) ** 2, starts, counts) / (n - 1)
+            m2 = _pairwise_sums(dev ** np.asarray(2.0), starts, counts) / n
+            m3 = _pairwise_sums(dev ** np.asarray(3.0), starts, counts) / n
+            # Slices of equal values (e.g. magnitude 0) have an undefined skew, reported as NaN
+            zero = m2 <= (np.finfo(float).eps * mean) ** 2
+            sizes, size_of = np.unique(counts, return_inverse=True)
+            factor = np.array([((k - 1.0) * k) ** 0.5 / (k - 2.0) if k > 2 else np.nan
+                               for k in sizes.tolist()])[size_of]
+            skew = np.where(zero, np.nan, factor * m3 / m2 ** 1.5)
+        var[counts == 0] = np.nan
+        var[counts == 1] = 0.0
+        skew[(counts == 1) | (counts == 2)] = 0.0
+        columns[f'{col}_mean'] = mean
+        columns[f'{col}_var'] = var
+        columns[f'{col}_skew'] = skew
+    return pd.DataFrame(columns, index=index, dtype=float)
+
+
+def grouped_moments(results: pd.DataFrame, group_col: str = None) -> pd.DataFrame:
+    """
+    Compute the moments table of Auditor.audit_moments() from audit results, partitioning
+    the rows in one pass per level ('all' and, if grouping, per group).
+
+    Args:
+        results: Audit results with 'variation', 'magnitude', bias columns and optionally 'group'.
+        group_col: Optional str. If provided, include per-group rows alongside 'all'.
+    Returns:
+        DataFrame with columns: variation, magnitude, [group], bias_X_mean, bias_X_var, bias_X_skew.
+    """
+    values = results[BIAS_COLUMNS].astype(float)
+    variations = sorted(results['variation'].unique().tolist())
+    magnitudes = sorted(results['magnitude'].unique().tolist())
+    # Every (variation, magnitude) pair is reported, even ones that were not audited together
+    full_index = pd.MultiIndex.from_product([variations, magnitudes], names=['variation', 'magnitude'])
+    overall = _moments_by(values, [results['variation'], results['magnitude']])
+    overall.index.names = ['variation', 'magnitude']
+    # Labelled with full_index, whose levels hold plain values even for compact (categorical) results
+    moments_df = overall.reindex(full_index).set_axis(full_index).reset_index()
+    if group_col is not None:
+        moments_df.insert(2, 'group', 'all')
+        moments_df['_order'] = 0
+        if 'group' in results.columns:
+            groups = sorted(results['group'].dropna().unique().tolist())
+            per_group = _moments_by(values, [results['variation'], results['magnitude'], results['group']])
+            per_group.index.names = ['variation', 'magnitude', 'group']
+            group_index = pd.MultiIndex.from_product([variations, magnitudes, groups],
+                                                     names=['variation', 'magnitude', 'group'])
+            per_group = per_group.reindex(group_index).set_axis(group_index).reset_index()
+            per_group['_order'] = per_group['group'].map({group: i + 1 for i, group in enumerate(groups)})
+            moments_df = pd.concat([moments_df, per_group], ignore_index=True)
+        moments_df = (moments_df.sort_values(['variation', 'magnitude', '_order'], kind='stable')
+                      .drop(columns='_order').reset_index(drop=True))
+    # Round numeric columns to 3 decimal places
+    for col in moments_df.columns:
+        if col.startswith('bias_'):
+            moments_df[col] = moments_df[col].round(3)
+    return moments_df
+
+
+def _bootstrap_mean_ci(values: np.ndarray, clusters: np.ndarray, confidence: float, n_boot: int,
+                       rng: np.random.Generator) -> np.ndarray:
+    # Percentile interval of the mean of each column, resampling whole clusters (texts) so that
+    # replicates of the same text stay together
+    _, inverse = np.unique(clusters, return_inverse=True)
+    n_clusters = inverse.max() + 1
+    valid = ~np.isnan(values)
+    sums = np.column_stack([np.bincount(inverse, np.where(valid[:, j], values[:, j], 0), n_clusters)
+                            for j in range(values.shape[1])])
+    counts = np.column_stack([np.bincount(inverse, valid[:, j], n_clusters) for j in range(values.shape[1])])
+    means = np.empty((n_boot, values.shape[1]))
+    # Draw resamples in batches to bound the size of the (batch, clusters) arrays
+    batch = max(1, _BOOTSTRAP_ELEMENTS // n_clusters)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, n_boot, batch):
+            size = min(batch, n_boot - start)
+            idx = rng.integers(0, n_clusters, size=(size, n_clusters))
+            # How often each cluster is drawn in each resample, then weighted sums via matrix products
+            flat = (idx + np.arange(size)[:, None] * n_clusters).ravel()
+            weights = np.bincount(flat, minlength=size * n_clusters).reshape(size, n_clusters).astype(float)
+            means[start:start + size] = (weights @ sums) / (weights @ counts)
+    alpha = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanpercentile(means, [100 * alpha, 100 * (1 - alpha)], axis=0)
+
+
+def bootstrap_ci(results: pd.DataFrame, group_col: str = None, confidence: float = 0.95, n_boot: int = 1000,
+                 seed: int = None) -> pd.DataFrame:
+    """
+    Bootstrap percentile confidence intervals for the mean of each bias measure, per
+    (variation, magnitude) and, if grouping, per group. Texts (the 'index' column) are
+    resampled with all their replicates.
+
+    Args:
+        results: Audit results with 'variation', 'magnitude', bias columns and optionally 'group'.
+        group_col: Optional str. If provided, include per-group rows alongside 'all'.
+        confidence: Confidence level of the intervals, e.g. 0.95.
+        n_boot: Number of bootstrap resamples.
+        seed: Optional int seeding the resampling.
+    Returns:
+        DataFrame with columns: variation, magnitude, [group], bias_X_ci_low, bias_X_ci_high.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1.")
+    rng = np.random.default_rng(seed)
+    values = results[BIAS_COLUMNS].to_numpy(dtype=float)
+    clusters = results['index'].to_numpy() if 'index' in results.columns else np.arange(len(results))
+    levels = [(['variation', 'magnitude'], 'all')]
+    if group_col is not None and 'group' in results.columns:
+        levels.append((['variation', 'magnitude', 'group'], None))
+    rows = []
+    for keys, group in levels:
+        for key, positions in results.groupby(keys, sort=False, observed=True).indices.items():
+            low, high = _bootstrap_mean_ci(values[positions], clusters[positions], confidence, n_boot, rng)
+            row = {'variation': key[0], 'magnitude': key[1]}
+            if group_col is not None:
+                row['group'] = group if group is not None else key[2]
+            for j, col in enumerate(BIAS_COLUMNS):
+                row[f'{col}_ci_low'] = round(float(low[j]), 3)
+                row[f'{col}_ci_high'] = round(float(high[j]), 3)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class MomentAccumulator:
+    """
+    Running count, mean and central moment sums (M2, M3) of a stream of values.
+
+    Batches are folded in with the pairwise update of Chan et al., which
+    reduces to Welford's update for single values. NaN values are ignored.
+    A single batch yields exactly the moments of the filtered slice computed
+    by grouped_moments(); merged batches agree up to floating-point rounding.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+
+    def update(self, values):
+        """
+        Add a batch of values.
+
+        Args:
+            values: Array-like of floats.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        mean = values.mean()
+        dev = values - mean
+        self._combine(len(values), mean, float((dev ** 2).sum()), float((dev ** 3).sum()))
+
+    def merge(self, other: 'MomentAccumulator') -> 'MomentAccumulator':
+        """
+        Fold in another accumulator, exactly as if its values had been added here.
+
+        Args:
+            other: MomentAccumulator, e.g. from another chunk, worker process or run.
+        Returns:
+            self, to allow chaining.
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.m3)
+        return self
+
+    def _combine(self, count: int, mean: float, m2: float, m3: float):
+        if self.count == 0:
+            self.count, self.mean, self.m2, self.m3 = count, mean, m2, m3
+            return
+        n_a, n_b = self.count, count
+        n = n_a + n_b
+        delta = mean - self.mean
+        self.m3 = (self.m3 + m3 + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+                   + 3 * delta * (n_a * m2 - n_b * self.m2) / n)
+        self.m2 = self.m2 + m2 + delta ** 2 * n_a * n_b / n
+        self.mean = self.mean + delta * n_b / n
+        self.count = n
+
+    def variance(self) -> float:
+        """
+        Sample variance (ddof=1); 0.0 for a single value and NaN when empty.
+        """
+        if self.count == 0:
+            return float('nan')
+        if self.count == 1:
+            return 0.0
+        return self.m2 / (self.count - 1)
+
+    def skew(self) -> float:
+        """
+        Bias-corrected sample skewness, as scipy.stats.skew(bias=False); 0.0 for fewer
+        than three values, NaN when empty or when all values are equal.
+        """
+        n = self.count
+        if n == 0:
+            return float('nan')
+        if n < 3:
+            return 0.0
+        m2 = self.m2 / n
+        m3 = self.m3 / n
+        if m2 <= (np.finfo(float).eps * self.mean) ** 2:
+            return float('nan')
+        return float(((n - 1.0) * n) ** 0.5 / (n - 2.0) * m3 / m2 ** 1.5)
+
+    def result(self) -> tuple:
+        """
+        Return (mean, variance, skew).
+        """
+        mean = self.mean if self.count else float('nan')
+        return mean, self.variance(), self.skew()
+
+
+class MomentTable:
+    """
+    Moment accumulators for every bias measure, per (variation, magnitude) and,
+    when results carry a 'group' column, per (variation, magnitude, group).
+    """
+    def __init__(self):
+        self.cells = {}
+        self.groups = set()
+
+    def update(self, results: pd.DataFrame):
+        """
+        Fold a chunk of audit results into the accumulators.
+
+        Args:
+            results: DataFrame with 'variation', 'magnitude' and bias columns, optionally 'group'.
+        """
+        if results is None or results.empty:
+            return
+        has_group = 'group' in results.columns
+        for (variation, magnitude), rows in results.groupby(['variation', 'magnitude'], sort=False, observed=True):
+            self._cell(variation, magnitude, None).update_frame(rows)
+            if has_group:
+                for group, group_rows in rows.groupby('group', sort=False, observed=True):
+                    self.groups.add(group)
+                    self._cell(variation, magnitude, group).update_frame(group_rows)
+
+    def merge(self, other: 'MomentTable') -> 'MomentTable':
+        """
+        Fold in the accumulators of another table, e.g. one built by a worker
+        process or a previous run over different rows.
+
+        Args:
+            other: MomentTable to merge.
+        Returns:
+            self, to allow chaining.
+        """
+        for (variation, magnitude, group), cell in other.cells.items():
+            self._cell(variation, magnitude, group).merge(cell)
+        self.groups.update(other.groups)
+        return self
+
+    def to_frame(self, group_col: str = None) -> pd.DataFrame:
+        """
+        Build the same table as Auditor.audit_moments() from the accumulators.
+
+        Args:
+            group_col: Optional str. If provided, include per-group rows alongside 'all'.
+        Returns:
+            DataFrame with columns: variation, magnitude, [group], bias_X_mean, bias_X_var, bias_X_skew.
+        """
+        # Snapshot the keys so the table can be read while an audit is still adding cells
+        keys = list(self.cells)
+        variations = sorted({key[0] for key in keys})
+        magnitudes = sorted({key[1] for key in keys})
+        groups = sorted(set(self.groups)) if group_col is not None else []
+        moments = []
+        for variation in variations:
+            for magnitude in magnitudes:
+                row = {'variation': variation, 'magnitude': magnitude}
+                if group_col is not None:
+                    row['group'] = 'all'
+                row.update(self._cell_moments(variation, magnitude, None))
+                moments.append(row)
+                for group in groups:
+                    row = {'variation': variation, 'magnitude': magnitude, 'group': group}
+                    row.update(self._cell_moments(variation, magnitude, group))
+                    moments.append(row)
+        moments_df = pd.DataFrame(moments)
+        for col in moments_df.columns:
+            if col.startswith('bias_'):
+                moments_df[col] = moments_df[col].round(3)
+        return moments_df
+
+    def _cell(self, variation, magnitude, group):
+        key = (variation, magnitude, group)
+        if key not in self.cells:
+            self.cells[key] = _BiasMoments()
+        return self.cells[key]
+
+    def _cell_moments(self, variation, magnitude, group) -> dict:
+        cell = self.cells.get((variation, magnitude, group)) or _BiasMoments()
+        row = {}
+        for col in BIAS_COLUMNS:
+            row[f'{col}_mean'], row[f'{col}_var'], row[f'{col}_skew'] = cell.accumulators[col].result()
+        return row
+
+
+class _BiasMoments:
+    def __init__(self):
+        self.accumulators = {col: MomentAccumulator() for col in BIAS_COLUMNS}
+
+    def update_frame(self, rows: pd.DataFrame):
+        for col in BIAS_COLUMNS:
+            self.accumulators[col].update(rows[col].to_numpy(dtype=float))
+
+    def merge(self, other: '_BiasMoments'):
+        for col in BIAS_COLUMNS:
+            self.accumulators[col].merge(other.accumulators[col])
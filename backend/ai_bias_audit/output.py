@@ -0,0 +1,127 @@
+"""
+Writers for audit results and moments in CSV, Parquet and Arrow IPC (Feather) formats.
+"""
+import os
+
+import pandas as pd
+
+# Output format for each recognised file extension; anything else is written as CSV
+FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.ipc': 'feather',
+}
+COMPRESSION = 'zstd'
+# Rows per Parquet row group; smaller groups give finer-grained predicate pushdown
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def output_format(path: str) -> str:
+    """
+    Return 'csv', 'parquet' or 'feather' for an output path, based on its extension.
+    """
+    return FORMATS.get(os.path.splitext(str(path))[1].lower(), 'csv')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Feather output require pyarrow: pip install 'ai_bias_audit[parquet]'")
+    return pyarrow
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str = None):
+    """
+    Write a DataFrame of audit results or moments.
+
+    Parquet and Feather files are zstd-compressed and keep column types (categoricals
+    become dictionary-encoded columns). Parquet files carry per-row-group statistics, so
+    readers can skip row groups with filters such as ``[('variation', '==', 'spelling')]``.
+
+    Args:
+        df: DataFrame to write.
+        path: Output path (or writable binary file object when fmt is given).
+        fmt: 'csv', 'parquet' or 'feather'. Defaults to the format implied by the extension.
+    """
+    fmt = fmt or output_format(path)
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+    elif fmt == 'parquet':
+        _require_pyarrow()
+        df.to_parquet(path, engine='pyarrow', compression=COMPRESSION, index=False, row_group_size=ROW_GROUP_SIZE)
+    elif fmt == 'feather':
+        _require_pyarrow()
+        df.reset_index(drop=True).to_feather(path, compression=COMPRESSION)
+    else:
+        raise ValueError(f"Unknown output format '{fmt}'. Use 'csv', 'parquet' or 'feather'.")
+
+
+class TableWriter:
+    """
+    Incrementally write DataFrames with the same columns to one output file, e.g.
+    the chunks yielded by Auditor.audit_iter().
+    """
+    def __init__(self, path: str, fmt: str = None):
+        """
+        Args:
+            path: Output path.
+            fmt: 'csv', 'parquet' or 'feather'. Defaults to the format implied by the extension.
+        """
+        self.path = path
+        self.fmt = fmt or output_format(path)
+        if self.fmt not in ('csv', 'parquet', 'feather'):
+            raise ValueError(f"Unknown output format '{self.fmt}'. Use 'csv', 'parquet' or 'feather'.")
+        if self.fmt != 'csv':
+            _require_pyarrow()
+        self._writer = None
+        self._schema = None
+        self._rows = 0
+
+    def write(self, df: pd.DataFrame):
+        """
+        Append the rows of a DataFrame. Empty DataFrames are skipped.
+        """
+        if df is None or df.empty:
+            return
+        if self.fmt == 'csv':
+            df.to_csv(self.path, index=False, mode='w' if self._rows == 0 else 'a', header=(self._rows == 0))
+        else:
+            import pyarrow as pa
+            if self._writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._schema = table.schema
+                self._open()
+            else:
+                # Later chunks follow the first chunk's schema (e.g. an all-NaN column stays float)
+                table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+        self._rows += len(df)
+
+    def _open(self):
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression=COMPRESSION)
+        else:
+            import pyarrow as pa
+            self._writer = pa.ipc.new_file(self.path, self._schema,
+                                           options=pa.ipc.IpcWriteOptions(compression=COMPRESSION))
+
+    def close(self):
+        """
+        Finish the file. If nothing was written, an empty table is written instead.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self._rows == 0:
+            write_table(pd.DataFrame(), self.path, self.fmt)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
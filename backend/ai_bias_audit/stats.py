@@ -0,0 +1,235 @@
+"""
+Vectorized significance tests for differences in bias measures between groups.
+"""
+import numpy as np
+import pandas as pd
+from scipy.special import stdtr
+
+from .moments import BIAS_COLUMNS
+
+# Upper bound on the number of (permutation, row) elements drawn per batch
+_PERMUTATION_ELEMENTS = 1 << 22
+
+
+def welch_test(mean_a, var_a, n_a, mean_b, var_b, n_b) -> tuple:
+    """
+    Two-sided Welch t-test from summary statistics; all arguments may be arrays.
+
+    Args:
+        mean_a, var_a, n_a: Mean, sample variance (ddof=1) and size of the first sample.
+        mean_b, var_b, n_b: Mean, sample variance (ddof=1) and size of the second sample.
+    Returns:
+        (t, df, p_value) arrays. Undefined tests (fewer than two values on a side, or
+        zero variance on both sides) give NaN.
+    """
+    mean_a, var_a, n_a, mean_b, var_b, n_b = (np.asarray(x, dtype=float)
+                                              for x in (mean_a, var_a, n_a, mean_b, var_b, n_b))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        se_a = var_a / n_a
+        se_b = var_b / n_b
+        t = (mean_a - mean_b) / np.sqrt(se_a + se_b)
+        df = (se_a + se_b) ** 2 / (se_a ** 2 / (n_a - 1) + se_b ** 2 / (n_b - 1))
+        p_value = 2 * stdtr(df, -np.abs(t))
+    undefined = (n_a < 2) | (n_b < 2) | ~np.isfinite(t)
+    return np.where(undefined, np.nan, t), np.where(undefined, np.nan, df), np.where(undefined, np.nan, p_value)
+
+
+def permuted_group_sums(values: np.ndarray, sizes: list, n_permutations: int,
+                        rng: np.random.Generator) -> np.ndarray:
+    """
+    Column sums of each group under random permutations of the group labels.
+
+    Every permutation gives each row a random key; group g takes the rows whose key
+    ranks fall in its block of sizes[g] ranks. The block boundaries are found by
+    partitioning the keys, then cumulative group sums are 0/1 membership matrices
+    times the values, so a whole batch of permutations costs a few array operations.
+
+    Args:
+        values: (rows, columns) float array.
+        sizes: Group sizes, summing to the number of rows.
+        n_permutations: Number of permutations.
+        rng: NumPy random Generator.
+    Returns:
+        (n_permutations, len(sizes), columns) array of group sums.
+    """
+    n_rows = len(values)
+    cuts = np.cumsum(sizes)[:-1]
+    # A trailing column of ones makes each product also count the group's rows
+    values = np.column_stack([values, np.ones(n_rows)])
+    total = values.sum(axis=0)
+    sums = np.empty((n_permutations, len(sizes), values.shape[1]))
+    batch = max(1, _PERMUTATION_ELEMENTS // max(n_rows, 1))
+    for start in range(0, n_permutations, batch):
+        size = min(batch, n_permutations - start)
+        keys = rng.integers(0, 2 ** 32, size=(size, n_rows), dtype=np.uint32)
+        # Successively partition the remaining keys to find the key at each block boundary
+        ordered = keys.copy()
+        low = 0
+        previous = np.zeros((size, values.shape[1]))
+        mask = np.empty((size, n_rows))
+        for g, cut in enumerate(cuts):
+            segment = ordered[:, low:]
+            segment.partition(cut - low - 1, axis=1)
+            threshold = segment[:, cut - low - 1:cut - low]
+            np.less_equal(keys, threshold, out=mask, casting='unsafe')
+            cumulative = mask @ values
+            sums[start:start + size, g] = cumulative - previous
+            previous = cumulative
+            low = cut
+        sums[start:start + size, len(sizes) - 1] = total - previous
+    # Redraw the rare permutations where tied keys put a row on both sides of a boundary
+    redraw = (sums[:, :, -1] != np.asarray(sizes)).any(axis=1)
+    if redraw.any():
+        sums[redraw, :, :-1] = permuted_group_sums(values[:, :-1], sizes, int(redraw.sum()), rng)
+    return sums[:, :, :-1]
+
+
+def permutation_pvalues(observed: np.ndarray, permuted: np.ndarray) -> np.ndarray:
+    """
+    Two-sided permutation p-values, (1 + #{|permuted| >= |observed|}) / (1 + permutations).
+
+    Args:
+        observed: (...) array of observed statistics.
+        permuted: (n_permutations, ...) array of statistics under permutation.
+    Returns:
+        Array of p-values shaped like observed.
+    """
+    # Tolerate rounding differences between the observed and permuted statistics
+    tolerance = 1e-12 * np.maximum(np.abs(observed), 1.0)
+    extreme = (np.abs(permuted) >= np.abs(observed) - tolerance).sum(axis=0)
+    return (1 + extreme) / (1 + len(permuted))
+
+
+def group_significance(results: pd.DataFrame, method: str = 'permutation', comparison: str = 'all',
+                       n_permutations: int = 10000, seed: int = None) -> pd.DataFrame:
+    """
+    Test every bias measure for differences between groups, per (variation, magnitude).
+
+    Args:
+        results: Audit results with 'variation', 'magnitude', 'group' and bias columns.
+        method: 'permutation' (label permutation test on the difference in means) or 'welch'.
+        comparison: 'all' to compare each group with the remaining rows, or 'pairwise' for
+            every pair of groups.
+        n_permutations: Number of permutations for the permutation test.
+        seed: Optional int seeding the permutations.
+    Returns:
+        DataFrame with columns: variation, magnitude, group, other, measure, difference,
+        statistic, p_value, n, n_other. 'difference' is the group mean minus the mean of
+        'other' ('rest' for the remaining rows, or a group), and n and n_other count the
+        rows on each side; 'statistic' is the t statistic for Welch tests and the difference
+        for permutation tests. Each measure is tested on the rows where it is finite.
+    """
+    if method not in ('permutation', 'welch'):
+        raise ValueError("method must be 'permutation' or 'welch'.")
+    if comparison not in ('all', 'pairwise'):
+        raise ValueError("comparison must be 'all' or 'pairwise'.")
+    if n_permutations < 1:
+        raise ValueError("n_permutations must be a positive integer.")
+    rng = np.random.default_rng(seed)
+    values = results[BIAS_COLUMNS].to_numpy(dtype=float)
+    labels = results['group'].astype(str).to_numpy()
+    records = []
+    for (variation, magnitude), positions in sorted(
+            results.groupby(['variation', 'magnitude'], observed=True).indices.items()):
+        cell_values = values[positions]
+        cell_labels = labels[positions]
+        # Each measure is tested on its own finite rows; measures finite on the same rows are
+        # tested together
+        finite = np.isfinite(cell_values)
+        measures_by_rows = {}
+        for j in range(len(BIAS_COLUMNS)):
+            measures_by_rows.setdefault(finite[:, j].tobytes(), []).append(j)
+        cell_records = []
+        for measures in measures_by_rows.values():
+            keep = finite[:, measures[0]]
+            groups, codes = np.unique(cell_labels[keep], return_inverse=True)
+            measure_values = cell_values[keep][:, measures]
+            if comparison == 'all':
+                tests = _compare_with_all(measure_values, codes, len(groups), method, n_permutations, rng)
+            else:
+                tests = _compare_pairs(measure_values, codes, len(groups), method, n_permutations, rng)
+            for g, h, difference, statistic, p_value, n, n_other in tests:
+                other = 'rest' if h is None else groups[h]
+                for k, j in enumerate(measures):
+                    cell_records.append((groups[g], other, j, {
+                        'variation': variation,
+                        'magnitude': magnitude,
+                        'group': groups[g],
+                        'other': other,
+                        'measure': BIAS_COLUMNS[j],
+                        'difference': round(float(difference[k]), 3),
+                        'statistic': round(float(statistic[k]), 3),
+                        'p_value': float(p_value[k]),
+                        'n': int(n),
+                        'n_other': int(n_other),
+                    }))
+        records.extend(record for *_, record in sorted(cell_records, key=lambda item: item[:3]))
+    return pd.DataFrame(records, columns=['variation', 'magnitude', 'group', 'other', 'measure', 'difference',
+                                          'statistic', 'p_value', 'n', 'n_other'])
+
+
+def _summaries(values: np.ndarray, codes: np.ndarray, n_groups: int) -> tuple:
+    counts = np.bincount(codes, minlength=n_groups).astype(float)
+    sums = np.column_stack([np.bincount(codes, values[:, j], n_groups) for j in range(values.shape[1])])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = sums / counts[:, None]
+        dev = values - means[codes]
+        m2 = np.column_stack([np.bincount(codes, dev[:, j] ** 2, n_groups) for j in range(values.shape[1])])
+        variances = m2 / (counts[:, None] - 1)
+    return counts, sums, means, variances
+
+
+def _compare_with_all(values, codes, n_groups, method, n_permutations, rng) -> list:
+    # Compare each group with the remaining rows. Centring the values makes the sums of the
+    # remaining rows the negated group sums
+    n_rows = len(values)
+    if n_rows == 0:
+        return []
+    centred = values - values.mean(axis=0)
+    counts, sums, means, variances = _summaries(centred, codes, n_groups)
+    rest_counts = n_rows - counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rest_means = -sums / rest_counts[:, None]
+    difference = means - rest_means
+    if method == 'welch':
+        total_m2 = ((centred ** 2).sum(axis=0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Sum of squared deviations of the remaining rows, from the total and group sums
+            group_m2 = variances * (counts[:, None] - 1)
+            rest_m2 = (total_m2 - np.nan_to_num(group_m2) - counts[:, None] * means ** 2
+                       - rest_counts[:, None] * rest_means ** 2)
+            rest_variances = np.maximum(rest_m2, 0) / (rest_counts[:, None] - 1)
+        statistic, _, p_value = welch_test(means, variances, counts[:, None], rest_means, rest_variances,
+                                           rest_counts[:, None])
+    else:
+        permuted_sums = permuted_group_sums(centred, [int(n) for n in counts], n_permutations, rng)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Group mean minus rest mean of each permutation, from the group sum
+            permuted = permuted_sums * (1 / counts[:, None] + 1 / rest_counts[:, None])
+        statistic = difference
+        p_value = permutation_pvalues(difference, permuted)
+        # A group holding every row has nothing to be compared with
+        p_value = np.where(rest_counts[:, None] == 0, np.nan, p_value)
+    return [(g, None, difference[g], statistic[g], p_value[g], counts[g], rest_counts[g]) for g in range(n_groups)]
+
+
+def _compare_pairs(values, codes, n_groups, method, n_permutations, rng) -> list:
+    tests = []
+    for g in range(n_groups):
+        for h in range(g + 1, n_groups):
+            in_pair = (codes == g) | (codes == h)
+            pair_values = values[in_pair]
+            pair_values = pair_values - pair_values.mean(axis=0)
+            pair_codes = (codes[in_pair] == h).astype(int)
+            counts, sums, means, variances = _summaries(pair_values, pair_codes, 2)
+            difference = means[0] - means[1]
+            if method == 'welch':
+                statistic, _, p_value = welch_test(means[0], variances[0], counts[0], means[1], variances[1],
+                                                   counts[1])
+            else:
+                permuted_sums = permuted_group_sums(pair_values, [int(n) for n in counts], n_permutations, rng)
+                permuted = permuted_sums[:, 0] / counts[0] - permuted_sums[:, 1] / counts[1]
+                statistic = difference
+                p_value = permutation_pvalues(difference, permuted)
+            tests.append((g, h, difference, statistic, p_value, counts[0], counts[1]))
+    return tests
@@ -0,0 +1,519 @@
+"""
+Translation backends used by the translation-based variations and features, and the
+translator that is active while they run.
+"""
+import contextlib
+import contextvars
+from abc import ABC, abstractmethod
+import csv
+import functools
+import hashlib
+import html
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import TranslationCache
+
+GOOGLE_TRANSLATE_URL = 'https://translate.google.com/m'
+
+# Characters per Google request; the web endpoint rejects texts longer than 5000
+DEFAULT_BATCH_CHARS = 4500
+
+# Texts per request to a translation server
+DEFAULT_BATCH_SIZE = 100
+
+# Connections kept open per host, i.e. concurrent requests that reuse a connection
+DEFAULT_POOL_SIZE = 16
+
+# Concurrent batches, and texts per batch, when prefetching translations
+DEFAULT_PREFETCH_WORKERS = 8
+DEFAULT_PREFETCH_BATCH = 200
+
+# Translation in the HTML page served by the Google endpoint
+_GOOGLE_RESULT = re.compile(r'<div class="(?:t0|result-container)">(.*?)</div>', re.S)
+
+# Words (letters only, with inner apostrophes) looked up by the dictionary backend
+_WORD_PATTERN = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+
+_active_translator = contextvars.ContextVar('ai_bias_audit_translator', default=None)
+
+
+class TranslationNotFound(LookupError):
+    """
+    Reported by Translator.translate_each() for texts the backend has no translation for.
+    """
+
+
+def _pooled_session(pool_size: int, retries: int) -> requests.Session:
+    # One session per translator, so requests reuse keep-alive connections
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class Translator(ABC):
+    """
+    Abstract base class for translation backends.
+    """
+    name = None
+
+    def __init__(self, source: str = 'auto', target: str = 'es'):
+        self.source = source
+        self.target = target
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        String identifying the backend and languages, so translations from different
+        backends are never mixed up.
+        """
+        return f'{self.name}:{self.source}:{self.target}'
+
+    @abstractmethod
+    def translate(self, text: str) -> str:
+        """
+        Translate a word or phrase.
+
+        Args:
+            text: Text in the source language.
+        Returns:
+            Text in the target language, or None if the backend has no translation for it
+            (e.g. a word missing from a word list).
+        """
+        pass
+
+    def translate_batch(self, texts: list) -> list:
+        """
+        Translate many words or phrases. Backends that can translate several texts per
+        request override this; the default translates them one by one.
+
+        Args:
+            texts: Texts in the source language.
+        Returns:
+            List of translations (None where there is none), in the order of texts.
+        """
+        return [self.translate(text) for text in texts]
+
+    def translate_each(self, texts: list) -> tuple:
+        """
+        Translate many words or phrases, losing only those that fail. The texts are sent
+        with translate_batch(); if the batch fails, each text is retried on its own.
+
+        Args:
+            texts: Texts in the source language; duplicates are translated once.
+        Returns:
+            (translations, errors): dicts mapping each translated text to its translation,
+            and each text that failed to the exception raised (TranslationNotFound for texts
+            the backend has no translation for).
+        """
+        texts = list(dict.fromkeys(texts))
+        if not texts:
+            return {}, {}
+        translations, errors = {}, {}
+        try:
+            translations = dict(zip(texts, self.translate_batch(texts)))
+        except Exception:
+            for text in texts:
+                try:
+                    translations[text] = self.translate(text)
+                except Exception as e:
+                    errors[text] = e
+        for text in [text for text, translation in translations.items() if translation is None]:
+            del translations[text]
+            errors[text] = TranslationNotFound(f"No translation found for '{text}'.")
+        return translations, errors
+
+
+class GoogleTranslator(Translator):
+    """
+    Google Translate web endpoint. translate_batch() sends as many texts per request as
+    fit in batch_chars, one per line, over a pooled session.
+    """
+    name = 'google'
+
+    def __init__(self, source: str = 'auto', target: str = 'es', batch_chars: int = DEFAULT_BATCH_CHARS,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = 10, retries: int = 2):
+        """
+        Args:
+            source: Source language code, or 'auto' to detect it.
+            target: Target language code.
+            batch_chars: Maximum characters per request.
+            pool_size: Maximum number of connections kept open for concurrent requests.
+            timeout: Seconds to wait for each response.
+            retries: Number of times a failed connection is retried.
+        """
+        super().__init__(source, target)
+        if batch_chars < 1 or batch_chars > 5000:
+            raise ValueError("batch_chars must be between 1 and 5000.")
+        self.batch_chars = batch_chars
+        self.timeout = timeout
+        self.session = _pooled_session(pool_size, retries)
+
+    def translate(self, text: str) -> str:
+        text = str(text).strip()
+        if not text or self.source == self.target:
+            return text
+        return '\n'.join(self._request(text))
+
+    def translate_batch(self, texts: list) -> list:
+        texts = [str(text).strip() for text in texts]
+        translations = list(texts)
+        if self.source == self.target:
+            return translations
+        todo = [i for i, text in enumerate(texts) if text]
+        for batch in self._batches(texts, todo):
+            lines = None
+            if len(batch) > 1:
+                try:
+                    lines = self._request('\n'.join(texts[i] for i in batch))
+                except (requests.RequestException, RuntimeError):
+                    lines = None
+            if lines is None or len(lines) != len(batch):
+                # Single texts, and batches that failed or whose line breaks were not kept, are
+                # sent one by one
+                lines = [self.translate(texts[i]) for i in batch]
+            for i, line in zip(batch, lines):
+                translations[i] = line
+        return translations
+
+    def _batches(self, texts: list, todo: list) -> list:
+        batches, batch, size = [], [], 0
+        for i in todo:
+            length = len(texts[i]) + 1
+            if batch and (size + length > self.batch_chars or '\n' in texts[i]):
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append(i)
+            size += length
+            if '\n' in texts[i]:
+                # Texts spanning several lines are sent alone
+                batches.append(batch)
+                batch, size = [], 0
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _request(self, text: str) -> list:
+        if len(text) > 5000:
+            raise ValueError("Google Translate accepts at most 5000 characters per request.")
+        response = self.session.get(GOOGLE_TRANSLATE_URL, params={'sl': self.source, 'tl': self.target, 'q': text},
+                                    timeout=self.timeout)
+        response.raise_for_status()
+        match = _GOOGLE_RESULT.search(response.text)
+        if match is None:
+            raise RuntimeError(f"No translation found for '{text[:50]}'.")
+        translated = html.unescape(re.sub(r'<br\s*/?>', '\n', match.group(1)))
+        return [line.strip() for line in translated.split('\n')]
+
+
+class DictionaryTranslator(Translator):
+    """
+    Offline translator backed by a bilingual word list. Texts found in the list as a
+    whole are translated directly; otherwise each word is looked up on its own and words
+    missing from the list are kept. Texts none of whose words are in the list have no
+    translation (None). Lookups ignore case, and translations follow the capitalization
+    of the original word.
+    """
+    name = 'dictionary'
+
+    def __init__(self, path: str = None, entries: dict = None, source: str = 'en', target: str = 'es'):
+        """
+        Args:
+            path: Optional word list with one entry per line: the source word or phrase and
+                its translation, separated by a comma in .csv files and a tab otherwise.
+                Blank lines and lines starting with '#' are skipped.
+            entries: Optional dict mapping source words or phrases to translations, added
+                after the entries of path.
+            source: Source language code.
+            target: Target language code.
+        """
+        super().__init__(source, target)
+        if path is None and entries is None:
+            raise ValueError("Provide a word list path or entries.")
+        self.entries = {}
+        if path is not None:
+            delimiter = ',' if str(path).lower().endswith('.csv') else '\t'
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.reader(f, delimiter=delimiter):
+                    if len(row) < 2 or not row[0].strip() or row[0].lstrip().startswith('#'):
+                        continue
+                    self.entries[row[0].strip().casefold()] = row[1].strip()
+        for word, translation in (entries or {}).items():
+            self.entries[str(word).strip().casefold()] = str(translation)
+        digest = hashlib.sha256(json.dumps(sorted(self.entries.items())).encode('utf-8')).hexdigest()
+        self._digest = digest[:16]
+
+    @property
+    def fingerprint(self) -> str:
+        return f'{self.name}:{self.source}:{self.target}:{self._digest}'
+
+    def translate(self, text: str) -> str:
+        text = str(text).strip()
+        translation = self.entries.get(text.casefold())
+        if translation is not None:
+            return self._match_case(text, translation)
+        words = _WORD_PATTERN.findall(text)
+        if words and not any(word.casefold() in self.entries for word in words):
+            return None
+        return _WORD_PATTERN.sub(self._translate_word, text)
+
+    def _translate_word(self, match) -> str:
+        word = match.group(0)
+        translation = self.entries.get(word.casefold())
+        return word if translation is None else self._match_case(word, translation)
+
+    @staticmethod
+    def _match_case(original: str, translation: str) -> str:
+        if len(original) > 1 and original.isupper():
+            return translation.upper()
+        if original[:1].isupper():
+            return translation[:1].upper() + translation[1:]
+        return translation
+
+
+class ServerTranslator(Translator):
+    """
+    Client of a translation server speaking the LibreTranslate protocol: a POST of
+    {"q": [texts], "source": ..., "target": ...} answered with {"translatedText": [translations]}.
+    Works with a local LibreTranslate instance or the stub server of make_server(), whose
+    null answers (no translation) are returned as None.
+    """
+    name = 'server'
+
+    def __init__(self, url: str, source: str = 'auto', target: str = 'es', batch_size: int = DEFAULT_BATCH_SIZE,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = 30, retries: int = 2):
+        """
+        Args:
+            url: Translation endpoint, e.g. 'http://localhost:5000/translate'.
+            source: Source language code, or 'auto' to detect it.
+            target: Target language code.
+            batch_size: Maximum number of texts per request.
+            pool_size: Maximum number of connections kept open for concurrent requests.
+            timeout: Seconds to wait for each response.
+            retries: Number of times a failed connection is retried.
+        """
+        super().__init__(source, target)
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer.")
+        self.url = url
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = _pooled_session(pool_size, retries)
+
+    @property
+    def fingerprint(self) -> str:
+        return f'{self.name}:{self.source}:{self.target}:{self.url}'
+
+    def translate(self, text: str) -> str:
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts: list) -> list:
+        texts = [str(text) for text in texts]
+        translations = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            response = self.session.post(self.url, json={'q': batch, 'source': self.source, 'target': self.target,
+                                                         'format': 'text'}, timeout=self.timeout)
+            response.raise_for_status()
+            translated = response.json()['translatedText']
+            if isinstance(translated, str):
+                translated = [translated]
+            if len(translated) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} translations from {self.url}, got {len(translated)}.")
+            translations.extend(translated)
+        return translations
+
+
+class CachedTranslator(Translator):
+    """
+    Translator that answers from a TranslationCache and only sends texts missing from it
+    to the wrapped translator, in one batch.
+    """
+    def __init__(self, translator: Translator, cache: TranslationCache = None):
+        """
+        Args:
+            translator: Translator used for cache misses.
+            cache: Optional TranslationCache. Defaults to a new in-memory cache.
+        """
+        super().__init__(translator.source, translator.target)
+        self.translator = translator
+        self.cache = cache if cache is not None else TranslationCache()
+        self.name = translator.name
+
+    @property
+    def fingerprint(self) -> str:
+        return self.translator.fingerprint
+
+    def translate(self, text: str) -> str:
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts: list) -> list:
+        texts = [str(text) for text in texts]
+        unique = list(dict.fromkeys(texts))
+        translations = self.cache.get_many(self.fingerprint, self.target, unique)
+        missing = [text for text in unique if text not in translations]
+        if missing:
+            translated = dict(zip(missing, self.translator.translate_batch(missing)))
+            # Texts without a translation are not cached
+            self.cache.put_many(self.fingerprint, self.target,
+                                {text: translation for text, translation in translated.items()
+                                 if translation is not None})
+            translations.update(translated)
+        return [translations[text] for text in texts]
+
+    def prefetch(self, texts, max_workers: int = DEFAULT_PREFETCH_WORKERS, batch_size: int = DEFAULT_PREFETCH_BATCH,
+                 progress=None) -> int:
+        """
+        Translate the texts missing from the cache ahead of use, in batches sent
+        concurrently to the wrapped translator. Failed batches are reported and left to be
+        translated on demand.
+
+        Args:
+            texts: Iterable of texts; duplicates are translated once.
+            max_workers: Maximum number of batches translated at once.
+            batch_size: Number of texts per batch.
+            progress: Optional callable(done, total) called as batches complete, with the
+                number of texts processed so far and the number missing from the cache.
+        Returns:
+            Number of texts translated.
+        """
+        if max_workers < 1 or batch_size < 1:
+            raise ValueError("max_workers and batch_size must be positive integers.")
+        unique = list(dict.fromkeys(str(text) for text in texts))
+        found = self.cache.get_many(self.fingerprint, self.target, unique)
+        missing = [text for text in unique if text not in found]
+        if not missing:
+            return 0
+
+        def translate(batch):
+            translated = dict(zip(batch, self.translator.translate_batch(batch)))
+            self.cache.put_many(self.fingerprint, self.target,
+                                {text: translation for text, translation in translated.items()
+                                 if translation is not None})
+            return len(batch)
+
+        batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+        translated = processed = 0
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as pool:
+            futures = {pool.submit(translate, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    translated += future.result()
+                except Exception as e:
+                    print(f"Warning: failed to prefetch {len(futures[future])} translations: {e}")
+                processed += len(futures[future])
+                if progress is not None:
+                    progress(processed, len(missing))
+        return translated
+
+
+def cached(translator: Translator, cache: TranslationCache = None) -> CachedTranslator:
+    """
+    Return translator backed by cache (a new in-memory cache by default), or translator
+    itself if it is already cached and no cache is given.
+    """
+    if isinstance(translator, CachedTranslator):
+        if cache is None or cache is translator.cache:
+            return translator
+        translator = translator.translator
+    return CachedTranslator(translator, cache)
+
+
+def make_server(translator: Translator, host: str = '127.0.0.1', port: int = 5000) -> ThreadingHTTPServer:
+    """
+    Create a stub translation server answering ServerTranslator requests with a local
+    translator (e.g. a DictionaryTranslator), for air-gapped runs and deterministic
+    benchmarks. Texts the translator has no translation for are answered with null.
+    Call serve_forever() on the result to start it.
+
+    Args:
+        translator: Translator serving the requests.
+        host: Interface to listen on.
+        port: Port to listen on; 0 picks a free port (see server_address).
+    Returns:
+        ThreadingHTTPServer.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                texts = payload['q']
+                translated = translator.translate_batch([texts] if isinstance(texts, str) else texts)
+                body, status = {'translatedText': translated[0] if isinstance(texts, str) else translated}, 200
+            except Exception as e:
+                body, status = {'error': str(e)}, 400
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def get_translator(spec=None, source: str = 'auto', target: str = 'es') -> Translator:
+    """
+    Return a translator from a specification.
+
+    Args:
+        spec: A Translator (returned as is); None or 'google' for Google Translate;
+            'dictionary:PATH' for a DictionaryTranslator loading PATH; or an http(s) URL
+            for a ServerTranslator.
+        source: Source language code of new translators.
+        target: Target language code of new translators.
+    Returns:
+        Translator.
+    """
+    if isinstance(spec, Translator):
+        return spec
+    if spec is None or spec == 'google':
+        return GoogleTranslator(source=source, target=target)
+    if spec.startswith('dictionary:'):
+        return DictionaryTranslator(spec[len('dictionary:'):], source='en' if source == 'auto' else source,
+                                    target=target)
+    if spec.startswith(('http://', 'https://')):
+        return ServerTranslator(spec, source=source, target=target)
+    raise ValueError(f"Unknown translator '{spec}'. Use 'google', 'dictionary:PATH' or a server URL.")
+
+
+@functools.lru_cache(maxsize=None)
+def _default_translator() -> Translator:
+    # Created on first use rather than at import, so importing opens no session
+    return CachedTranslator(GoogleTranslator())
+
+
+def current_translator() -> Translator:
+    """
+    Return the translator activated by use_translator(), or a shared Google translator
+    backed by an in-memory cache.
+    """
+    translator = _active_translator.get()
+    return translator if translator is not None else _default_translator()
+
+
+@contextlib.contextmanager
+def use_translator(translator: Translator):
+    """
+    Make translator the translator of the variations and feature functions within the
+    with block (including threads started with asyncio.to_thread). None keeps the
+    current translator.
+    """
+    if translator is None:
+        yield None
+        return
+    token = _active_translator.set(translator)
+    try:
+        yield translator
+    finally:
+        _active_translator.reset(token)
@@ -1,7 +1,7 @@
 """
 Variations package: define and register text variations for auditing.
 """
-from .base import Variation
+from .base import Variation, takes_rng
 from .spelling import SpellingVariation
 from .pio import PioVariation
 from .cognates import CognatesVariation
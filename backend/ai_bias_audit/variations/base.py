@@ -1,18 +1,106 @@
+import inspect
 from abc import ABC, abstractmethod
 
+
+def takes_rng(method) -> bool:
+    """
+    Return True if a variation's apply() or apply_plan() accepts an rng argument. Older
+    variations with apply(text, magnitude) are still supported but are not reproducible.
+    """
+    try:
+        return 'rng' in inspect.signature(method).parameters
+    except (TypeError, ValueError):
+        return False
+
+
 class Variation(ABC):
     """
     Abstract base class for text variations.
+
+    Variations whose expensive work (tokenizing, tagging, translating) does not depend
+    on the magnitude can split apply() into plan() and apply_plan(), so a magnitude sweep
+    computes the plan for each text once and only samples from it per magnitude.
+
+    All randomness must come from the rng argument (a NumPy Generator) rather than the
+    random module, so that a perturbation depends only on the generator it is given.
+    apply_batch() perturbs many texts at once, each with its own generator.
+    Bump ``version`` whenever a change alters the output, so cached perturbations of the
+    old version are not reused. Variations that call the current translator set
+    ``translates``, so their cached perturbations are also keyed by the translator.
     """
+    version = 1
+    translates = False
+
     @abstractmethod
-    def apply(self, text: str, magnitude: int) -> str:
+    def apply(self, text: str, magnitude: int, rng=None) -> str:
         """
         Apply the variation to the input text.
 
         Args:
             text: Original text.
             magnitude: Integer in [0, 100] controlling variation strength.
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
         Returns:
             Modified text with variation applied.
         """
         pass
+
+    def plan(self, text: str):
+        """
+        Compute the magnitude-independent part of the variation for a text, such as
+        candidate positions and their replacements. Defaults to the text itself.
+
+        Args:
+            text: Original text.
+        Returns:
+            Plan object to pass to apply_plan().
+        """
+        return text
+
+    def translation_units(self, text: str) -> list:
+        """
+        Return the words or phrases of a text that apply() may send to the current
+        translator, so an audit can translate them for the whole corpus ahead of time.
+        Defaults to none.
+
+        Args:
+            text: Original text.
+        Returns:
+            List of distinct words or phrases.
+        """
+        return []
+
+    def apply_plan(self, plan, magnitude: int, rng=None) -> str:
+        """
+        Apply the variation at a given magnitude using a plan from plan().
+
+        Args:
+            plan: Result of plan(text).
+            magnitude: Integer in [0, 100] controlling variation strength.
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
+        Returns:
+            Modified text with variation applied.
+        """
+        if takes_rng(self.apply):
+            return self.apply(plan, magnitude, rng)
+        return self.apply(plan, magnitude)
+
+    def apply_batch(self, texts: list, magnitude: int, rngs: list = None, plans: list = None) -> list:
+        """
+        Apply the variation to many texts. The auditor always perturbs through this method.
+        The default loops over apply() (or apply_plan() when plans are given); variations
+        override it with batched implementations.
+
+        Args:
+            texts: Original texts.
+            magnitude: Integer in [0, 100] controlling variation strength.
+            rngs: Optional list with one NumPy random Generator per text.
+            plans: Optional list with the plan(text) of each text.
+        Returns:
+            List of modified texts.
+        """
+        rngs = rngs if rngs is not None else [None] * len(texts)
+        apply, inputs = (self.apply, texts) if plans is None else (self.apply_plan, plans)
+        if takes_rng(apply):
+            return [apply(item, magnitude, rng) for item, rng in zip(inputs, rngs)]
+        return [apply(item, magnitude) for item in inputs]
@@ -1,31 +1,41 @@
-import random
 import difflib
-import nltk
-from deep_translator import GoogleTranslator
 from .base import Variation
-
-# Cache for translations
-cognate_cache = {}
-translator = GoogleTranslator(source='auto', target='es')
+from ..annotations import current_annotations
+from ..rng import ensure_rng
+from ..translation import TranslationNotFound, current_translator
 
 class CognatesVariation(Variation):
     """
     Variation that replaces words with their cognates.
     """
-    def apply(self, text: str, magnitude: int) -> str:
+    translates = True
+
+    def apply(self, text: str, magnitude: int, rng=None) -> str:
         """
         Replace words with cognates based on magnitude.
 
         Args:
             text: Original text.
             magnitude: % of words to replace (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
         Returns:
             Text with cognate replacements.
         """
-        error_rate = magnitude / 100.0
-        def translate_word(word):
-            return translator.translate(word)
+        return self.apply_plan(self.plan(text), magnitude, rng)
 
+    def plan(self, text: str) -> tuple:
+        """
+        Tokenize the text and find the tokens that are likely cognates.
+        Every token that is alphabetic is considered a candidate.
+        The distinct words are translated in one batch by the current translator, whose
+        cache avoids repeated translations; words that fail to translate, or that the
+        translator has no translation for, are skipped.
+
+        Args:
+            text: Original text.
+        Returns:
+            (text, tokens, candidate_indices, candidate_translations).
+        """
         def is_cognate(eng_word, esp_word, threshold=0.7):
             """
             Determines if the English word and its Spanish translation are cognates,
@@ -33,31 +43,42 @@ class CognatesVariation(Variation):
             """
             return difflib.SequenceMatcher(None, eng_word.lower(), esp_word.lower()).ratio() >= threshold
 
-        """
-        Translates a percentage (error_rate) of words in the text that are likely cognates.
-        Every token that is alphabetic is considered a candidate.
-        Uses caching to avoid repeated translations and cognate checks.
-        """
-        tokens = nltk.word_tokenize(text)
+        tokens = current_annotations().tokens(text)
         candidate_indices = []
         candidate_translations = {}
 
+        translations, errors = current_translator().translate_each(self.translation_units(text))
+        for word, e in errors.items():
+            # Skip this token if an error occurs; words without a translation are skipped silently
+            if not isinstance(e, TranslationNotFound):
+                print(f"Error translating '{word}': {e}")
+        cognates = {word: translation for word, translation in translations.items() if is_cognate(word, translation)}
+
         for index, token in enumerate(tokens):
-            if token.isalpha():
-                if token in cognate_cache:
-                    translation, is_candidate = cognate_cache[token]
-                else:
-                    try:
-                        translation = translate_word(token)
-                        is_candidate = is_cognate(token, translation)
-                        cognate_cache[token] = (translation, is_candidate)
-                    except Exception as e:
-                        print(f"Error translating '{token}': {e}")
-                        continue  # Skip this token if an error occurs.
-
-                if is_candidate:
-                    candidate_indices.append(index)
-                    candidate_translations[index] = translation
+            if token in cognates:
+                candidate_indices.append(index)
+                candidate_translations[index] = cognates[token]
+        return text, tokens, candidate_indices, candidate_translations
+
+    def translation_units(self, text: str) -> list:
+        """
+        Return the distinct alphabetic tokens of the text, which plan() translates.
+        """
+        return [token for token in dict.fromkeys(current_annotations().tokens(text)) if token.isalpha()]
+
+    def apply_plan(self, plan: tuple, magnitude: int, rng=None) -> str:
+        """
+        Translate a percentage (magnitude) of the planned cognate candidates.
+
+        Args:
+            plan: Result of plan(text).
+            magnitude: % of words to replace (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
+        Returns:
+            Text with cognate replacements.
+        """
+        text, tokens, candidate_indices, candidate_translations = plan
+        error_rate = magnitude / 100.0
 
         # If no candidates were found, return the original text.
         if not candidate_indices:
@@ -68,7 +89,9 @@ class CognatesVariation(Variation):
         if num_to_translate == 0 and candidate_indices:
             num_to_translate = 1  # Ensure at least one translation if possible.
 
-        indices_to_translate = random.sample(candidate_indices, min(num_to_translate, len(candidate_indices)))
+        rng = ensure_rng(rng)
+        indices_to_translate = set(rng.choice(candidate_indices, min(num_to_translate, len(candidate_indices)),
+                                              replace=False).tolist())
 
         # Reconstruct the text with the selected translations.
         new_tokens = []
@@ -82,4 +105,3 @@ class CognatesVariation(Variation):
         new_text = " ".join(new_tokens)
 
         return new_text
-
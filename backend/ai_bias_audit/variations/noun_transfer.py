@@ -1,36 +1,64 @@
-import random
-import nltk
-from deep_translator import GoogleTranslator
 from .base import Variation
-
-# Translator instance 
-translator = GoogleTranslator(source='auto', target='es')
+from ..annotations import current_annotations
+from ..rng import ensure_rng
+from ..translation import TranslationNotFound, current_translator
 
 class NounTransferVariation(Variation):
     """
     Variation that performs noun transfer transformations.
     """
-    def apply(self, text: str, magnitude: int) -> str:
+    translates = True
+
+    def apply(self, text: str, magnitude: int, rng=None) -> str:
         """
         Apply noun transfer transformation based on magnitude.
 
         Args:
             text: Original text.
             magnitude: Strength of transformation (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
         Returns:
             Transformed text.
         """
-        def translate_word(word):
-            return translator.translate(word)
+        return self.apply_plan(self.plan(text), magnitude, rng)
+
+    def plan(self, text: str) -> tuple:
+        """
+        Tokenize and POS-tag the text. Nouns are translated as magnitudes select them,
+        and the translator's cache translates each noun at most once.
+
+        Args:
+            text: Original text.
+        Returns:
+            (text, tagged_tokens).
+        """
+        tagged_tokens = current_annotations().tags(text)
+        return text, tagged_tokens
+
+    def translation_units(self, text: str) -> list:
+        """
+        Return the distinct nouns of the text, the words apply_plan() may translate.
+        """
+        return list(dict.fromkeys(word for word, tag in current_annotations().tags(text) if tag.startswith('NN')))
 
+    def apply_plan(self, plan: tuple, magnitude: int, rng=None) -> str:
+        """
+        Translate a magnitude-dependent share of the planned nouns.
+
+        Args:
+            plan: Result of plan(text).
+            magnitude: Strength of transformation (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
+        Returns:
+            Transformed text.
+        """
         def noun(word, tag):
             return tag.startswith('NN') 
 
-        noun_cache = {}
+        text, tagged_tokens = plan
+        rng = ensure_rng(rng)
 
         error_rate = magnitude / 100.0
-        tokens = nltk.word_tokenize(text)
-        tagged_tokens = nltk.pos_tag(tokens)
         nouns = [word for word, tag in tagged_tokens if noun(word, tag)]
         num_nouns_to_translate = int(len(nouns) * error_rate)
 
@@ -38,22 +66,21 @@ class NounTransferVariation(Variation):
             num_nouns_to_translate = 1 # Translate at least one noun
 
         if len(nouns) > 0:
-            indices_to_translate = random.sample(range(len(nouns)), min(num_nouns_to_translate, len(nouns)))
+            indices_to_translate = set(rng.choice(len(nouns), min(num_nouns_to_translate, len(nouns)),
+                                                  replace=False).tolist())
+
+            # Translate the selected nouns in one batch; nouns that fail are kept untranslated
+            selected = [nouns[i] for i in sorted(indices_to_translate)]
+            translations, errors = current_translator().translate_each(selected)
+            for word, e in errors.items():
+                if not isinstance(e, TranslationNotFound):
+                    print(f"Error translating '{word}': {e}")
 
             new_text = ""
             noun_index = 0
             for word, tag in tagged_tokens:
                 if noun(word, tag) and noun_index in indices_to_translate:
-                    try:
-                        if word in noun_cache:
-                            translation = noun_cache[word]
-                        else:
-                            translation = translate_word(word)
-                            noun_cache[word] = translation
-                        new_text += translation + " "
-                    except Exception as e:
-                        print(f"Error translating '{word}': {e}")
-                        new_text += word + " "
+                    new_text += translations.get(word, word) + " "
                 else:
                     new_text += word + " "
                 if noun(word, tag):
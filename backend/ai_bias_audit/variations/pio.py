@@ -1,79 +1,181 @@
 import re
-import random
+import numpy as np
 from .base import Variation
+from ..rng import ensure_rng
+
+# Substitution rules, applied in order; each rule sees the output of the previous ones
+SUBSTITUTIONS = [
+    # Vowel substitutions
+    (r'\b(e|E)', 'i'),
+    (r'ea', 'e'),
+    (r'oo', 'u'),
+    (r'au', 'o'),
+    (r'ei', 'e'),
+    (r'ie', 'i'),
+
+    # Consonant substitutions
+    (r'\b[hH]', ''),
+    (r'th', 't'),
+    (r'v', 'b'),
+    (r'z', 's'),
+    (r'j', 'y'),
+    (r'c([eiy])', r's\1'),
+    (r'c', 'k'),
+    (r'qu', 'k'),
+    # (r'x', 'ks'),
+    (r'gn', 'ñ'),
+
+    # Consonant cluster adjustments
+    (r'\b(s[ptlrcmn])', r'es\1'),
+
+    # Double consonants
+    (r'([a-zA-Z])\1', r'\1'),
+
+    # Miscellaneous adjustments
+    (r'wr', 'r'),
+    (r'wh', 'w'),
+    (r'kn', 'n'),
+    (r'ps', 's'),
+    (r'pt', 't'),
+    (r'pn', 'n'),
+    (r'bt', 't'),
+    (r'ct', 't'),
+    (r'gh', 'g'),
+    (r'ph', 'f'),
+    (r'rt', 'r'),
+]
+
+# Joins texts in apply_batch(); never matched by a rule, as rules only match letters
+_SEPARATOR = '\x00'
+
+
+class _Rule:
+    """
+    A compiled substitution rule. Rules find matches case-insensitively, but only
+    rewrite a match that also matches the rule case-sensitively (so 'Th' is kept while
+    'th' becomes 't'); the rewrite of each distinct match is memoized.
+    """
+    def __init__(self, pattern: str, repl: str):
+        self.regex = re.compile(pattern, flags=re.IGNORECASE)
+        self._sensitive = re.compile(pattern)
+        self._repl = repl
+        self._rewrites = {}
+        # Letters every match contains, so texts without them are not scanned
+        letters = pattern.replace(r'\b', '')
+        self.literal = letters if letters.isalpha() else None
+
+    def may_match(self, folded: str) -> bool:
+        """
+        Return False if the rule cannot match a text, given the text's casefold().
+        """
+        return self.literal is None or self.literal in folded
+
+    def rewrite(self, match) -> str:
+        found = match.group(0)
+        rewritten = self._rewrites.get(found)
+        if rewritten is None:
+            rewritten = self._sensitive.sub(self._repl, found)
+            self._rewrites[found] = rewritten
+        return rewritten
+
+    def substitute(self, text: str, prob: float, rng) -> str:
+        """
+        Rewrite each match with probability prob, drawing one number per match from rng.
+        """
+        if prob >= 1:
+            # Every match is rewritten whatever the draws
+            return self.regex.sub(self.rewrite, text)
+        matches = list(self.regex.finditer(text))
+        if not matches:
+            return text
+        return self.rewrite_selected(text, matches, rng.random(len(matches)) < prob)
+
+    def rewrite_selected(self, text: str, matches: list, selected) -> str:
+        pieces = []
+        end = 0
+        for match, chosen in zip(matches, selected):
+            if chosen:
+                pieces.append(text[end:match.start()])
+                pieces.append(self.rewrite(match))
+                end = match.end()
+        if not pieces:
+            return text
+        pieces.append(text[end:])
+        return ''.join(pieces)
+
+
+# Compiled once at import and shared by every call
+RULES = [_Rule(pattern, repl) for pattern, repl in SUBSTITUTIONS]
+
 
 class PioVariation(Variation):
     """
     Variation that applies 'pio' transformation.
     """
-    def apply(self, text: str, magnitude: int) -> str:
+    def apply(self, text: str, magnitude: int, rng=None) -> str:
         """
         Apply the PIO variation to text.
 
         Args:
             text: Original text.
             magnitude: Strength of variation (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
         Returns:
             Transformed text.
         """
         error_rate = magnitude / 100.0
-        substitutions = [
-        # Vowel substitutions
-        (r'\b(e|E)', 'i'),
-        (r'ea', 'e'),
-        (r'oo', 'u'),
-        (r'au', 'o'),
-        (r'ei', 'e'),
-        (r'ie', 'i'),
-
-        # Consonant substitutions
-        (r'\b[hH]', ''),
-        (r'th', 't'),
-        (r'v', 'b'),
-        (r'z', 's'),
-        (r'j', 'y'),
-        (r'c([eiy])', r's\1'),
-        (r'c', 'k'),
-        (r'qu', 'k'),
-        # (r'x', 'ks'),
-        (r'gn', 'ñ'),
-
-        # Consonant cluster adjustments
-        (r'\b(s[ptlrcmn])', r'es\1'),
-
-        # Double consonants
-        (r'([a-zA-Z])\1', r'\1'),
-
-        # Miscellaneous adjustments
-        (r'wr', 'r'),
-        (r'wh', 'w'),
-        (r'kn', 'n'),
-        (r'ps', 's'),
-        (r'pt', 't'),
-        (r'pn', 'n'),
-        (r'bt', 't'),
-        (r'ct', 't'),
-        (r'gh', 'g'),
-        (r'ph', 'f'),
-        (r'rt', 'r'),
-        ]
-
-        def apply_with_probability(match, replacement, prob):
-            return replacement if random.random() < prob else match.group(0)
-
-        random.seed()
-
-        total_matches = 0
-
-        for pattern, repl in substitutions:
-            matches = list(re.finditer(pattern, text, flags=re.IGNORECASE))
-            total_matches += len(matches)
-
-            text = re.sub(
-                pattern,
-                lambda match: apply_with_probability(match, re.sub(pattern, repl, match.group(0)), error_rate),
-                text,
-                flags=re.IGNORECASE
-            )
-
+        if error_rate <= 0:
+            return text
+        rng = ensure_rng(rng)
+        folded = text.casefold()
+        for rule in RULES:
+            if rule.may_match(folded):
+                substituted = rule.substitute(text, error_rate, rng)
+                if substituted is not text:
+                    text = substituted
+                    folded = text.casefold()
         return text
+
+    def apply_batch(self, texts: list, magnitude: int, rngs: list = None, plans: list = None) -> list:
+        """
+        Apply the PIO variation to many texts at once. The texts are joined so each rule
+        scans them in a single pass, and every text still draws from its own generator,
+        so results equal those of apply() with the same generators.
+
+        Args:
+            texts: Original texts.
+            magnitude: Strength of variation (0-100).
+            rngs: Optional list with one NumPy random Generator per text.
+            plans: Ignored; the plan of a text is the text itself.
+        Returns:
+            List of transformed texts.
+        """
+        texts = [str(text) for text in texts]
+        error_rate = magnitude / 100.0
+        if error_rate <= 0:
+            return texts
+        rngs = [ensure_rng(rng) for rng in (rngs if rngs is not None else [None] * len(texts))]
+        if len(texts) < 2 or any(_SEPARATOR in text for text in texts):
+            return [self.apply(text, magnitude, rng) for text, rng in zip(texts, rngs)]
+        joined = _SEPARATOR.join(texts)
+        folded = joined.casefold()
+        for rule in RULES:
+            if not rule.may_match(folded):
+                continue
+            if error_rate >= 1:
+                substituted = rule.regex.sub(rule.rewrite, joined)
+            else:
+                matches = list(rule.regex.finditer(joined))
+                if not matches:
+                    continue
+                # Matches never span a separator, so each belongs to the text it starts in
+                codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+                text_starts = np.concatenate([[0], np.flatnonzero(codes == 0) + 1])
+                owners = np.searchsorted(text_starts, [match.start() for match in matches], side='right') - 1
+                counts = np.bincount(owners, minlength=len(texts))
+                draws = np.concatenate([rngs[i].random(counts[i]) for i in np.flatnonzero(counts)])
+                substituted = rule.rewrite_selected(joined, matches, draws < error_rate)
+            if substituted is not joined:
+                joined = substituted
+                folded = joined.casefold()
+        return joined.split(_SEPARATOR)
@@ -1,34 +1,40 @@
-import random
 import re
-import nltk
-from deep_translator import GoogleTranslator
 from .base import Variation
-
-# Translator instance 
-translator = GoogleTranslator(source='auto', target='es')
-phrase_cache = {}
+from ..annotations import current_annotations
+from ..rng import ensure_rng
+from ..translation import current_translator
 
 class SpanglishVariation(Variation):
     """
     Variation that mixes Spanish and English (Spanglish).
     """
-    def apply(self, text: str, magnitude: int) -> str:
+    translates = True
+
+    def apply(self, text: str, magnitude: int, rng=None) -> str:
         """
         Introduce Spanglish code-switching based on magnitude.
 
         Args:
             text: Original English text.
             magnitude: % of words to translate or mix (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
         Returns:
             Text with Spanglish modifications.
         """
-        CONJUNCTIONS = r'\b(?:and|or|but|because|so|yet|although|though|since|unless|whereas|while)\b'
+        return self.apply_plan(self.plan(text), magnitude, rng)
 
-        def translate_phrase(phrase):
-            return translator.translate(phrase)
+    def plan(self, text: str) -> tuple:
+        """
+        Split the text into sentences and phrases, and find the phrases that can be translated.
 
-        error_rate = magnitude / 100.0 
-        sentences = nltk.sent_tokenize(text) 
+        Args:
+            text: Original English text.
+        Returns:
+            (sentences, all_phrases, phrase_indices, letter_phrases).
+        """
+        CONJUNCTIONS = r'\b(?:and|or|but|because|so|yet|although|though|since|unless|whereas|while)\b'
+
+        sentences = current_annotations().sentences(text)
         all_phrases = []
         phrase_indices = []
 
@@ -39,21 +45,46 @@ class SpanglishVariation(Variation):
             phrase_indices.append(len(all_phrases))  
             all_phrases.extend(phrases) 
 
-        # Select global phrases for translation (only those with letters)
+        # Phrases that can be translated (only those with letters)
         letter_phrases = [i for i, phrase in enumerate(all_phrases) if any(c.isalpha() for c in phrase)]
+        return sentences, all_phrases, phrase_indices, letter_phrases
+
+    def translation_units(self, text: str) -> list:
+        """
+        Return the distinct phrases of the text that contain letters, the phrases
+        apply_plan() may translate.
+        """
+        _, all_phrases, _, letter_phrases = self.plan(text)
+        return list(dict.fromkeys(all_phrases[i] for i in letter_phrases))
+
+    def apply_plan(self, plan: tuple, magnitude: int, rng=None) -> str:
+        """
+        Translate a magnitude-dependent share of the planned phrases.
+
+        Args:
+            plan: Result of plan(text).
+            magnitude: % of words to translate or mix (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
+        Returns:
+            Text with Spanglish modifications.
+        """
+        sentences, all_phrases, phrase_indices, letter_phrases = plan
+        rng = ensure_rng(rng)
+        error_rate = magnitude / 100.0 
+
+        # Select global phrases for translation
         num_to_translate = max(1, int(len(letter_phrases) * error_rate))  
-        selected_indices = set(random.sample(letter_phrases, min(num_to_translate, len(letter_phrases)))) 
+        selected_indices = set(rng.choice(letter_phrases, min(num_to_translate, len(letter_phrases)), replace=False).tolist())
+
+        # Translate the selected phrases in one batch
+        selected = sorted(selected_indices)
+        translations = dict(zip(selected, current_translator().translate_batch([all_phrases[i] for i in selected])))
 
-        # Translate selected phrases
         translated_phrases = []
         for i, phrase in enumerate(all_phrases):
-            if i in selected_indices:
-                if phrase in phrase_cache:
-                    translated_phrase = phrase_cache[phrase]
-                else:
-                    translated_phrase = translate_phrase(phrase)
-                    phrase_cache[phrase] = translated_phrase
-                translated_phrases.append(translated_phrase)
+            # Phrases the translator has no translation for are kept
+            if i in selected_indices and translations[i] is not None:
+                translated_phrases.append(translations[i])
             else:
                 translated_phrases.append(phrase)
 
@@ -1,46 +1,109 @@
-import random
+import numpy as np
+from ..rng import ensure_rng
 from .base import Variation
 
+ERROR_TYPES = ("swap", "replace", "delete", "insert")
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
 class SpellingVariation(Variation):
     """
     Variation that introduces spelling errors into text.
     """
-    def apply(self, text: str, magnitude: int) -> str:
+    version = 2
+
+    def apply(self, text: str, magnitude: int, rng=None) -> str:
         """
         Introduce spelling errors into the text.
 
         Args:
             text: Original text.
             magnitude: % of characters to perturb (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
+        Returns:
+            Text with spelling errors.
+        """
+        return self.apply_plan(self.plan(text), magnitude, rng)
+
+    def plan(self, text: str) -> list:
+        """
+        Split the text into the words that may be misspelled.
+        """
+        return text.split()
+
+    def apply_plan(self, plan: list, magnitude: int, rng=None) -> str:
+        """
+        Misspell a magnitude-dependent share of the planned words.
+
+        Args:
+            plan: Words from plan(text).
+            magnitude: % of words to perturb (0-100).
+            rng: Optional NumPy random Generator; defaults to one seeded from the random module.
         Returns:
             Text with spelling errors.
         """
+        return self._misspell([plan], magnitude, [ensure_rng(rng)])[0]
+
+    def apply_batch(self, texts: list, magnitude: int, rngs: list = None, plans: list = None) -> list:
+        """
+        Introduce spelling errors into many texts, drawing the error positions and edits
+        of the whole batch with NumPy. Each text gives the same result as apply() with
+        the same generator.
+
+        Args:
+            texts: Original texts.
+            magnitude: % of words to perturb (0-100).
+            rngs: Optional list with one NumPy random Generator per text.
+            plans: Optional list with the plan(text) of each text.
+        Returns:
+            List of texts with spelling errors.
+        """
+        plans = plans if plans is not None else [self.plan(text) for text in texts]
+        rngs = [ensure_rng(rng) for rng in (rngs if rngs is not None else [None] * len(plans))]
+        return self._misspell(plans, magnitude, rngs)
+
+    @staticmethod
+    def _misspell(word_lists: list, magnitude: int, rngs: list) -> list:
         error_rate = magnitude / 100.0
-        words = text.split()
-        num_errors = int(len(words) * error_rate)
-        error_indices = random.sample(range(len(words)), num_errors)
-
-        def misspell_word(word):
-            if len(word) <= 1:  
-                return word
-            error_type = random.choice(["swap", "replace", "delete", "insert"])
-            if error_type == "swap" and len(word) > 1:
-                i = random.randint(0, len(word) - 2)
-                return word[:i] + word[i+1] + word[i] + word[i+2:]
-            elif error_type == "replace":
-                i = random.randint(0, len(word) - 1)
-                char = random.choice("abcdefghijklmnopqrstuvwxyz")
-                return word[:i] + char + word[i+1:]
-            elif error_type == "delete":
-                i = random.randint(0, len(word) - 1)
-                return word[:i] + word[i+1:]
-            elif error_type == "insert":
-                i = random.randint(0, len(word))
-                char = random.choice("abcdefghijklmnopqrstuvwxyz")
-                return word[:i] + char + word[i:]
-            return word
-
-        misspelled_words = [
-            misspell_word(word) if i in error_indices else word for i, word in enumerate(words)
-        ]
-        return " ".join(misspelled_words)
+        n_words = np.array([len(words) for words in word_lists], dtype=np.int64)
+        n_errors = np.array([int(len(words) * error_rate) for words in word_lists], dtype=np.int64)
+        if not n_errors.any():
+            return [" ".join(words) for words in word_lists]
+        # Each text draws one sort key per word, then (type, position, letter) per error
+        draws = [rng.random(n + 3 * k) for rng, n, k in zip(rngs, n_words, n_errors)]
+        keys = np.concatenate([d[:n] for d, n in zip(draws, n_words)])
+        edits = np.concatenate([d[n:] for d, n in zip(draws, n_words)]).reshape(-1, 3)
+        # The words with the n_errors smallest keys of each text are misspelled, so the
+        # misspelled words are a uniform sample without replacement
+        owners = np.repeat(np.arange(len(word_lists)), n_words)
+        word_starts = np.cumsum(n_words) - n_words
+        order = np.lexsort((keys, owners))
+        ranks = np.empty(len(keys), dtype=np.int64)
+        ranks[order] = np.arange(len(keys)) - word_starts[owners[order]]
+        chosen = np.flatnonzero(ranks < n_errors[owners])
+        edit_rows = (np.cumsum(n_errors) - n_errors)[owners[chosen]] + ranks[chosen]
+        error_types = (edits[edit_rows, 0] * len(ERROR_TYPES)).astype(np.int64)
+        letters = (edits[edit_rows, 2] * len(LETTERS)).astype(np.int64)
+
+        misspelled = [list(words) for words in word_lists]
+        for flat, owner, error_type, position, letter in zip(
+                chosen.tolist(), owners[chosen].tolist(), error_types.tolist(), edits[edit_rows, 1].tolist(),
+                letters.tolist()):
+            words = misspelled[owner]
+            i = flat - int(word_starts[owner])
+            word = words[i]
+            if len(word) <= 1:
+                continue
+            char = LETTERS[letter]
+            if error_type == 0:  # swap
+                j = int(position * (len(word) - 1))
+                words[i] = word[:j] + word[j+1] + word[j] + word[j+2:]
+            elif error_type == 1:  # replace
+                j = int(position * len(word))
+                words[i] = word[:j] + char + word[j+1:]
+            elif error_type == 2:  # delete
+                j = int(position * len(word))
+                words[i] = word[:j] + word[j+1:]
+            else:  # insert
+                j = int(position * (len(word) + 1))
+                words[i] = word[:j] + char + word[j:]
+        return [" ".join(words) for words in misspelled]
@@ -7,12 +7,17 @@ import json
 import traceback
 import math
 from typing import Dict, Any, List
-import importlib.util
 import os
-from openai import OpenAI
+import asyncio
+import hashlib
+from openai import AsyncOpenAI, OpenAI
 from ai_bias_audit.auditor import Auditor
+from ai_bias_audit.cache import GradeCache, TranslationCache
+from ai_bias_audit.grading import Grader, ScriptModel
+from ai_bias_audit.output import write_table
+from ai_bias_audit.rng import derive_rng
+from ai_bias_audit.translation import cached, get_translator, use_translator
 from ai_bias_audit.variations import get_variation
-import random
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -59,6 +64,19 @@ SMTP_USERNAME = os.environ.get('SMTP_USERNAME', '')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
 FROM_EMAIL = os.environ.get('FROM_EMAIL', 'noreply@biasaudit.com')
 
+# Number of concurrent grading requests for LLM-backed audits (network-bound)
+LLM_MAX_WORKERS = int(os.environ.get('LLM_MAX_WORKERS', '8'))
+
+# Optional persistent grade cache shared by all requests (LLM grading runs at temperature 0)
+GRADE_CACHE_DIR = os.environ.get('GRADE_CACHE_DIR')
+GRADE_CACHE = GradeCache(GRADE_CACHE_DIR, max_size_mb=float(os.environ.get('GRADE_CACHE_SIZE_MB', '512'))) if GRADE_CACHE_DIR else None
+
+# Translation backend of the translation-based variations: 'google', 'dictionary:PATH' or a server URL
+# Translations are cached in memory, or on disk (shared by all workers) with TRANSLATION_CACHE_DIR
+TRANSLATION_CACHE_DIR = os.environ.get('TRANSLATION_CACHE_DIR')
+TRANSLATOR = cached(get_translator(os.environ.get('TRANSLATOR', 'google')),
+                    TranslationCache(TRANSLATION_CACHE_DIR) if TRANSLATION_CACHE_DIR else None)
+
 api = Blueprint('api', __name__)
 
 def build_gpt_prompt(ai_prompt, rubric, text):
@@ -68,16 +86,31 @@ def build_gpt_prompt(ai_prompt, rubric, text):
     prompt += f"Respond with only a number\nText: {text}\nGrade:"
     return prompt
 
+def llm_model_id(model_type):
+    return 'gpt-4o-2024-08-06' if model_type == 'gpt-4o' else 'gpt-4.1-2025-04-14'
+
+def llm_fingerprint(model_type, ai_prompt, rubric):
+    """Identify an LLM grader for the grade cache by its model id and prompt template."""
+    template = build_gpt_prompt(ai_prompt, rubric, '')
+    return hashlib.sha256(f"{llm_model_id(model_type)}\n{template}".encode('utf-8')).hexdigest()
+
+def grade_texts(grade_fn, texts):
+    """Grade texts, reading and filling the shared grade cache when it is enabled.
+
+    Grades are coerced to floats, and texts whose grading fails come back as None,
+    whether or not the cache is enabled.
+    """
+    preds = Grader(grade_fn, cache=GRADE_CACHE).grade(texts)
+    return [None if math.isnan(pred) else pred for pred in preds]
+
 def make_grade_fn(model_type, ai_prompt, rubric, custom_model_path=None):
     if model_type == 'custom':
         if not custom_model_path or not os.path.exists(custom_model_path):
             raise RuntimeError("Custom model file not found.")
-        spec = importlib.util.spec_from_file_location("model_module", custom_model_path)
-        mod = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(mod)
-        if not hasattr(mod, "grade"):
+        try:
+            return ScriptModel(custom_model_path, 'grade')
+        except AttributeError:
             raise RuntimeError("Custom script must define grade(text)")
-        return mod.grade
     else:
         client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
         if not os.environ.get('OPENAI_API_KEY'):
@@ -89,7 +122,7 @@ def make_grade_fn(model_type, ai_prompt, rubric, custom_model_path=None):
             for attempt in range(max_retries):
                 try:
                     response = client.chat.completions.create(
-                        model='gpt-4o-2024-08-06' if model_type == 'gpt-4o' else 'gpt-4.1-2025-04-14',
+                        model=llm_model_id(model_type),
                         messages=[{"role": "user", "content": prompt}],
                         max_tokens=10,
                         temperature=0
@@ -101,18 +134,51 @@ def make_grade_fn(model_type, ai_prompt, rubric, custom_model_path=None):
                 except (ValueError, TypeError):
                     # If conversion fails, try again (up to max_retries)
                     if attempt == max_retries - 1:
-                        # On final attempt, return 0 instead of NaN
-                        return 0.0
+                        # On final attempt, return NaN so the failure is never cached as a grade
+                        return float('nan')
                     continue
                 except Exception:
-                    # For other exceptions (API errors, etc.), return 0 on final attempt
+                    # For other exceptions (API errors, etc.), return NaN on final attempt
                     if attempt == max_retries - 1:
-                        return 0.0
+                        return float('nan')
                     continue
             
             # This should never be reached, but just in case
-            return 0.0
+            return float('nan')
+        grade_fn.fingerprint = llm_fingerprint(model_type, ai_prompt, rubric)
         return grade_fn
+
+def make_async_grade_fn(model_type, ai_prompt, rubric, custom_model_path=None):
+    """Like make_grade_fn, but LLM graders are coroutines backed by AsyncOpenAI.
+
+    Custom scripts are returned unchanged; Auditor.audit_async runs them in worker threads.
+    """
+    if model_type == 'custom':
+        return make_grade_fn(model_type, ai_prompt, rubric, custom_model_path)
+    if not os.environ.get('OPENAI_API_KEY'):
+        raise RuntimeError("OpenAI API key not set")
+    client = AsyncOpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+    async def grade_fn(text: str) -> float:
+        prompt = build_gpt_prompt(ai_prompt, rubric, text)
+        max_retries = 5
+        for attempt in range(max_retries):
+            try:
+                response = await client.chat.completions.create(
+                    model=llm_model_id(model_type),
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=10,
+                    temperature=0
+                )
+                pred = response.choices[0].message.content.strip()
+                return float(pred)
+            except Exception:
+                # Unparseable replies and API errors are retried; give up with NaN like the sync grader
+                if attempt == max_retries - 1:
+                    return float('nan')
+                continue
+        return float('nan')
+    grade_fn.fingerprint = llm_fingerprint(model_type, ai_prompt, rubric)
+    return grade_fn
     
 
 @api.route('/api/variations', methods=['GET'])
@@ -239,7 +305,8 @@ def start_audit():
                 return jsonify({"error": str(e)}), 500
         else:
             try:
-                grade_fn = make_grade_fn(model_type, ai_prompt, rubric)
+                # LLM graders are coroutines so many requests can be in flight without a thread each
+                grade_fn = make_async_grade_fn(model_type, ai_prompt, rubric)
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         
@@ -260,9 +327,28 @@ def start_audit():
         if not variations:
             return jsonify({'error': 'No variations selected'}), 400
         
+        # Grade concurrently: LLM graders are network-bound, custom scripts run serially unless asked
+        max_workers = audit_state.get('maxWorkers')
+        if max_workers is not None:
+            max_workers = int(max_workers)
+        elif model_type != 'custom':
+            max_workers = LLM_MAX_WORKERS
+        
+        # CPU-bound custom scripts can be sharded across processes instead of threads
+        executor = audit_state.get('executor', 'thread')
+        
         # Create auditor and run audit
-        auditor = Auditor(model=grade_fn, data=df)
-        bias_df = auditor.audit(variations, magnitudes, score_cutoff=score_cutoff, group_col=group_col)
+        auditor = Auditor(model=grade_fn, data=df, max_workers=max_workers, executor=executor, grade_cache=GRADE_CACHE,
+                          translator=TRANSLATOR)
+        try:
+            if model_type == 'custom':
+                bias_df = auditor.audit(variations, magnitudes, score_cutoff=score_cutoff, group_col=group_col)
+            else:
+                bias_df = asyncio.run(auditor.audit_async(variations, magnitudes, score_cutoff=score_cutoff, group_col=group_col))
+        finally:
+            auditor.close()
+        if GRADE_CACHE is not None:
+            print(f"Grade cache stats: {GRADE_CACHE.stats()}")
         
         # Calculate moments during the initial audit
         moments = []
@@ -314,6 +400,7 @@ def start_audit():
         
         audit_sessions[session_id]['results'] = results
         audit_sessions[session_id]['moments'] = moments  # Store moments from initial audit
+        audit_sessions[session_id]['metadata'] = auditor.metadata
         audit_sessions[session_id]['status'] = 'completed'
         
         # Send email notification if email is provided
@@ -331,7 +418,8 @@ def start_audit():
                 'maxBiasMeasure': max_bias_measure,
                 'groupsAnalyzed': groups_analyzed,
             },
-            'moments': moments
+            'moments': moments,
+            'metadata': auditor.metadata
         })
         
     except Exception as e:
@@ -392,9 +480,37 @@ def get_results(session_id):
         traceback.print_exc()
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
 
+DOWNLOAD_FORMATS = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'feather': ('.feather', 'application/vnd.apache.arrow.file'),
+}
+
+def results_frame(results: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Build a typed DataFrame from the result records stored for a session."""
+    grouping_used = any('group' in r for r in results)
+    frame = pd.DataFrame({
+        'variation': pd.Categorical([r['variation'] for r in results]),
+        'magnitude': [int(r['magnitude']) for r in results],
+        'original_text': [r.get('original_text', '') for r in results],
+        'perturbed_text': [r.get('perturbed_text', '') for r in results],
+        'original_grade': [float(r['originalGrade']) for r in results],
+        'perturbed_grade': [float(r['perturbedGrade']) for r in results],
+    })
+    for col in ['bias_0', 'bias_1', 'bias_2', 'bias_3']:
+        frame[col] = [float(r['biasMeasures'][col]) for r in results]
+    if grouping_used:
+        frame['group'] = pd.Categorical([r.get('group', '') for r in results])
+    return frame
+
 @api.route('/api/download/<session_id>', methods=['GET'])
 def download_results(session_id):
-    """Download audit results as CSV."""
+    """
+    Download audit results (or, with table=moments, their moments).
+
+    Query parameters:
+        format: csv (default), parquet or feather. Parquet and Feather files are compressed and typed.
+        table: results (default) or moments.
+    """
     if session_id not in audit_sessions:
         return jsonify({'error': 'Session not found'}), 404
     
@@ -402,9 +518,32 @@ def download_results(session_id):
     
     if session_data['status'] != 'completed':
         return jsonify({'error': 'Audit not completed'}), 400
-    
+
+    fmt = request.args.get('format', 'csv').lower()
+    table = request.args.get('table', 'results').lower()
+    if fmt not in ('csv',) + tuple(DOWNLOAD_FORMATS):
+        return jsonify({'error': f"Unknown format '{fmt}'. Use csv, parquet or feather."}), 400
+    if table not in ('results', 'moments'):
+        return jsonify({'error': f"Unknown table '{table}'. Use results or moments."}), 400
+
     results = session_data['results']
 
+    if fmt != 'csv' or table == 'moments':
+        if table == 'moments':
+            frame = pd.DataFrame(session_data.get('moments', []))
+        else:
+            frame = results_frame(results)
+        suffix, mimetype = DOWNLOAD_FORMATS.get(fmt, ('.csv', 'text/csv'))
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+        temp_file.close()
+        write_table(frame, temp_file.name, fmt)
+        return send_file(
+            temp_file.name,
+            as_attachment=True,
+            download_name=f'audit_{table}_{session_id}{suffix}',
+            mimetype=mimetype
+        )
+
     # Determine if grouping was used (any result has a non-empty 'group' field)
     grouping_used = any('group' in r and r['group'] not in (None, '', 'default', 'unknown') for r in results)
 
@@ -498,9 +637,9 @@ def assess_performance():
             grade_fn = make_grade_fn(model_type, ai_prompt, rubric, model_path)
         except Exception as e:
             return jsonify({'error': f'Error loading custom model: {str(e)}'}), 500
-        for _, row in sample_df.iterrows():
+        preds = grade_texts(grade_fn, sample_df['text'].tolist())
+        for (_, row), pred in zip(sample_df.iterrows(), preds):
             text = row['text']
-            pred = grade_fn(text)
             pred_grades.append(pred)
             true = row['true_grade'] if 'true_grade' in row else None
             if true is not None:
@@ -511,9 +650,9 @@ def assess_performance():
             grade_fn = make_grade_fn(model_type, ai_prompt, rubric)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
-        for _, row in sample_df.iterrows():
+        preds = grade_texts(grade_fn, sample_df['text'].tolist())
+        for (_, row), pred in zip(sample_df.iterrows(), preds):
             text = row['text']
-            pred = grade_fn(text)
             pred_grades.append(pred)
             true = row['true_grade'] if 'true_grade' in row else None
             if true is not None:
@@ -608,9 +747,10 @@ def sample_variations():
         for variation_type in variation_types:
             try:
                 variation = get_variation(variation_type)
-                # Set a fixed seed for consistency across variations for this sample
-                random.seed(idx)
-                varied_text = variation.apply(original_text, magnitude)
+                # A generator keyed by the row keeps each sample's variation stable across requests
+                rng = derive_rng(0, idx, variation_type, magnitude, 0)
+                with use_translator(TRANSLATOR):
+                    varied_text = variation.apply(original_text, magnitude, rng)
                 row_data['variations'][variation_type] = varied_text
             except Exception as e:
                 row_data['variations'][variation_type] = f"Error: {str(e)}"
@@ -672,7 +812,7 @@ def preview_audit():
             return jsonify({'error': str(e)}), 500
 
     df_preview = pd.DataFrame({"text": sample_texts})
-    auditor = Auditor(model=grade_fn, data=df_preview)
+    auditor = Auditor(model=grade_fn, data=df_preview, grade_cache=GRADE_CACHE, translator=TRANSLATOR)
     bias_df = auditor.audit([variation], [magnitude])
     moments_df = auditor.audit_moments()
 
@@ -6,10 +6,15 @@ setup(
     packages=find_packages(),
     install_requires=[
         'pandas',
+        'numpy',
+        'scipy',
         'click',
         'nltk',
-        'deep-translator'
+        'requests'
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+    },
     author='',
     author_email='',
     description='A package to audit bias in essay grading models',
@@ -24,5 +29,5 @@ setup(
             'ai-bias-audit=ai_bias_audit.cli:main',
         ],
     },
-    python_requires='>=3.6',
+    python_requires='>=3.9',
 )
\ No newline at end of file
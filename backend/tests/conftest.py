@@ -1,6 +1,21 @@
 import pytest
 import pandas as pd
 from ai_bias_audit.auditor import Auditor
+from ai_bias_audit.translation import Translator, use_translator
+
+
+class IdentityTranslator(Translator):
+    name = 'identity'
+
+    def translate(self, text):
+        return text
+
+
+@pytest.fixture(autouse=True)
+def offline_translator():
+    # Translation-based variations and features make no HTTP calls in tests
+    with use_translator(IdentityTranslator()) as translator:
+        yield translator
 
 @pytest.fixture
 def sample_data():
@@ -0,0 +1,47 @@
+import math
+
+import pandas as pd
+
+import api
+from ai_bias_audit.auditor import Auditor
+from ai_bias_audit.cache import GradeCache
+
+
+class FailingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError('rate limited')
+
+
+class FailingClient:
+    def __init__(self, api_key=None):
+        self.chat = type('Chat', (), {'completions': FailingCompletions()})()
+
+
+def test_failed_llm_grading_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setattr(api, 'OpenAI', FailingClient)
+    grade_fn = api.make_grade_fn('gpt-4o', 'Grade this essay.', '')
+    cache = GradeCache(str(tmp_path / 'cache'))
+    scored = Auditor(grade_fn, pd.DataFrame({'text': ['one essay', 'another essay']}), grade_cache=cache).grade()
+    # Retries ran out: the grades are missing rather than 0, and nothing is cached
+    assert all(math.isnan(grade) for grade in scored['predicted_grade'])
+    assert cache.stats()['entries'] == 0
+    monkeypatch.setattr(api, 'GRADE_CACHE', cache)
+    assert api.grade_texts(grade_fn, ['one essay']) == [None]
+    assert cache.stats()['entries'] == 0
+
+
+def test_grade_texts_coerces_and_isolates_failures(monkeypatch):
+    def grade_fn(text):
+        if text == 'boom':
+            raise ValueError('bad essay')
+        return {'numeric': '3', 'empty': None}.get(text, 2)
+
+    texts = ['numeric', 'empty', 'boom', 'plain']
+    monkeypatch.setattr(api, 'GRADE_CACHE', None)
+    # Without the cache, outputs are coerced and failures isolated as with it
+    assert api.grade_texts(grade_fn, texts) == [3.0, None, None, 2.0]
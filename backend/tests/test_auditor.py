@@ -8,6 +8,7 @@ nltk.word_tokenize = lambda text: text.split()
 nltk.pos_tag = lambda tokens: [(w, 'NN') for w in tokens]
 nltk.sent_tokenize = lambda text: [text]
 from ai_bias_audit.auditor import Auditor
+from ai_bias_audit.translation import Translator
 from ai_bias_audit.variations import get_variation
 
 @pytest.fixture
@@ -32,13 +33,12 @@ def test_grade_and_accuracy(df):
 
 @pytest.mark.parametrize('varname', ['spelling', 'pio', 'cognates', 'noun_transfer', 'spanglish'])
 def test_perturb_and_audit(monkeypatch, df, varname):
-    variation = get_variation(varname)
-    # Stub out translation functions for deterministic output
-    if hasattr(variation, 'translate_word'):
-        monkeypatch.setattr(variation, 'translate_word', lambda w: w.upper())
-    if hasattr(variation, 'translate_phrase'):
-        monkeypatch.setattr(variation, 'translate_phrase', lambda p: p.upper())
-    aud = Auditor(dummy_model, df)
+    class UpperTranslator(Translator):
+        def translate(self, text):
+            return text.upper()
+
+    # Stub out translation for deterministic output
+    aud = Auditor(dummy_model, df, translator=UpperTranslator())
     pert_df = aud.perturb(varname, magnitude=50)
     # Should return a DataFrame with 'text' column
     assert isinstance(pert_df, pd.DataFrame)
@@ -52,7 +52,8 @@ def test_perturb_and_audit(monkeypatch, df, varname):
 def test_preview_variation(monkeypatch, df):
     # Stub the 'spelling' variation to apply a simple reversible transform (reverse text)
     variation = get_variation('spelling')
-    monkeypatch.setattr(variation, 'apply', lambda text, magnitude: text[::-1])
+    monkeypatch.setattr(variation, 'apply_batch',
+                        lambda texts, magnitude, rngs=None, plans=None: [t[::-1] for t in texts])
     aud = Auditor(dummy_model, df)
     # Preview two samples with a fixed random state for reproducibility
     samples = aud.preview_variation('spelling', magnitude=50, n_samples=2, random_state=0)
@@ -106,6 +107,98 @@ def test_audit_moments(auditor):
     assert set(moments['variation']) == {'spelling', 'cognates'}
     assert set(moments['magnitude']) == {10}
 
+def test_audit_moments_follow_replaced_results():
+    from ai_bias_audit.moments import grouped_moments
+    df = pd.DataFrame({'text': ['abc defg', 'hi there you', 'x', 'longer essay text here']})
+    aud = Auditor(lambda text: len(text) % 4, df)
+    aud.audit(['spelling'], [80], seed=1)
+    pd.testing.assert_frame_equal(aud.audit_moments(), grouped_moments(aud.results))
+    # Moments describe the results the auditor holds, not the accumulators of the last audit
+    aud.results = aud.results.iloc[:1]
+    pd.testing.assert_frame_equal(aud.audit_moments(), grouped_moments(aud.results))
+
+def _per_slice_moments(results, group_col=None):
+    # Moments as computed by filtering each slice, before they were aggregated by groupby
+    import warnings
+    from scipy.stats import skew
+    from ai_bias_audit.moments import BIAS_COLUMNS
+    groups = ['all'] + sorted(results['group'].unique()) if group_col is not None else [None]
+    rows = []
+    for variation in sorted(results['variation'].unique()):
+        for magnitude in sorted(results['magnitude'].unique()):
+            for group in groups:
+                mask = (results['variation'] == variation) & (results['magnitude'] == magnitude)
+                row = {'variation': variation, 'magnitude': magnitude}
+                if group is not None:
+                    row['group'] = group
+                    if group != 'all':
+                        mask &= results['group'] == group
+                for col in BIAS_COLUMNS:
+                    vals = results.loc[mask, col].dropna()
+                    row[f'{col}_mean'] = vals.mean() if len(vals) else np.nan
+                    row[f'{col}_var'] = (vals.var(ddof=1) if len(vals) > 1 else 0.0) if len(vals) else np.nan
+                    with warnings.catch_warnings():
+                        warnings.simplefilter('ignore', RuntimeWarning)
+                        skewness = skew(vals, bias=False) if len(vals) > 2 else 0.0
+                    row[f'{col}_skew'] = skewness if len(vals) else np.nan
+                rows.append(row)
+    expected = pd.DataFrame(rows)
+    for col in expected.columns:
+        if col.startswith('bias_'):
+            expected[col] = expected[col].round(3)
+    return expected
+
+def test_grouped_moments_round_like_per_slice_reductions():
+    from ai_bias_audit.moments import BIAS_COLUMNS, MomentTable, grouped_moments
+    rng = np.random.default_rng(4)
+    # The mean of these values is 1.4274999...; summed in another order it is 1.4275 and rounds up
+    boundary = [2.62, 1.27, 1.8, 2.46, 1.96, 0.06, 1.52, 0.33, 0.19, 2.21, 2.27, 2.27, 1.13, 1.15, 1.06, 2.28, 0.36,
+                2.44, 0.31, 0.86]
+    frames = []
+    for variation, magnitude in [('spelling', 80), ('spelling', 20), ('pio', 80)]:
+        for group in ['a', 'b']:
+            n = len(boundary) if (variation, magnitude, group) == ('spelling', 80, 'a') else int(rng.integers(1, 30))
+            frame = pd.DataFrame({col: np.round(rng.normal(size=n) * 2, 2) for col in BIAS_COLUMNS})
+            if n == len(boundary):
+                frame['bias_3'] = boundary
+            frame.loc[frame.index[::5], 'bias_1'] = np.nan
+            frames.append(frame.assign(variation=variation, magnitude=magnitude, group=group))
+    results = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0, ignore_index=True)
+    # Long slices are summed in blocks, and slices of equal values have no skew
+    for group, n in [('a', 300), ('b', 1500)]:
+        frame = pd.DataFrame({col: np.round(rng.normal(size=n) * 2, 2) for col in BIAS_COLUMNS})
+        frame.loc[frame.index[::7], 'bias_0'] = np.nan
+        frame['bias_2'] = 0.5
+        results = pd.concat([results, frame.assign(variation='pio', magnitude=20, group=group)], ignore_index=True)
+    expected = _per_slice_moments(results, 'group')
+    moments = grouped_moments(results, 'group')
+    assert moments.loc[(moments['variation'] == 'spelling') & (moments['magnitude'] == 80)
+                       & (moments['group'] == 'a'), 'bias_3_mean'].item() == 1.427
+    pd.testing.assert_frame_equal(moments, expected)
+    pd.testing.assert_frame_equal(grouped_moments(results), _per_slice_moments(results))
+    # Accumulators given each cell in one batch agree exactly too
+    table = MomentTable()
+    table.update(results)
+    pd.testing.assert_frame_equal(table.to_frame('group'), expected)
+
+def test_audit_moments_of_replicates_match_per_slice_reductions():
+    from ai_bias_audit.moments import MomentTable
+    df = pd.DataFrame({'text': [f'essay {i} ' + 'word other thing ' * (i % 7) for i in range(40)],
+                       'grp': ['a', 'b', 'c', 'd'] * 10})
+    aud = Auditor(lambda text: len(text) % 9 / 9, df)
+    results = aud.audit(['spelling', 'pio'], [50, 50], group_col='grp', n_replicates=3, seed=5)
+    expected = _per_slice_moments(results, 'group')
+    # Each cell's accumulator merged three replicate batches, but the moments of the kept results are exact
+    assert all(cell.accumulators['bias_0'].count == 30 for key, cell in aud._moment_table.cells.items() if key[2])
+    pd.testing.assert_frame_equal(aud.audit_moments(group_col='grp'), expected)
+    # Accumulators merged batch by batch agree up to the last rounded digit
+    table = MomentTable()
+    for replicate in range(3):
+        table.update(results[results['replicate'] == replicate])
+    merged = table.to_frame('grp')
+    assert np.allclose(merged.iloc[:, 3:].to_numpy(dtype=float), expected.iloc[:, 3:].to_numpy(dtype=float),
+                       atol=1.5e-3, equal_nan=True)
+
 def test_group_variable_analysis():
     # Create sample data with a group column
     df = pd.DataFrame({
@@ -120,3 +213,870 @@ def test_group_variable_analysis():
     moments = auditor.audit_moments(group_col='group')
     assert 'group' in moments.columns
     assert set(moments['group']) == {'A', 'B'}
+
+
+class BatchModel:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, text):
+        raise AssertionError('single-text call should not be used')
+
+    def grade_batch(self, texts):
+        self.batches.append(list(texts))
+        return [len(t) if t != 'bad' else 'n/a' for t in texts]
+
+
+def test_grade_batch_protocol():
+    df = pd.DataFrame({'text': ['a', 'bb', 'bad', 'dddd', 'eeeee']})
+    model = BatchModel()
+    aud = Auditor(model, df, batch_size=2)
+    preds = aud.grade()['predicted_grade'].tolist()
+    assert [len(b) for b in model.batches] == [2, 2, 1]
+    assert preds[:2] == [1.0, 2.0] and preds[3:] == [4.0, 5.0]
+    # Non-numeric values are still coerced to NaN per element
+    assert np.isnan(preds[2])
+
+
+def test_batch_size_with_list_callable():
+    df = pd.DataFrame({'text': ['a', 'bb', 'ccc']})
+    aud = Auditor(lambda texts: [len(t) for t in texts], df, batch_size=2)
+    assert aud.grade()['predicted_grade'].tolist() == [1.0, 2.0, 3.0]
+    report = aud.audit(['spelling'], [0])
+    assert report['perturbed_grade'].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_batch_size_with_per_text_callable_grades_text_by_text(capsys):
+    import asyncio
+    from ai_bias_audit.grading import Grader
+    calls = []
+
+    def model(text):
+        calls.append(text)
+        return len(text.split())
+
+    texts = ['a b', 'c', 'd e f', 'g h', 'i']
+    grader = Grader(model, batch_size=2)
+    assert grader.grade(texts) == [2.0, 1.0, 3.0, 2.0, 1.0]
+    # Only the first chunk is tried as a list; the model is then called per text
+    assert calls == [['a b', 'c'], 'a b', 'c', 'd e f', 'g h', 'i']
+    assert grader.grade(['j k']) == [2.0] and calls[-1] == 'j k'
+    assert capsys.readouterr().out.count('grading one text at a time') == 1
+
+    async def async_model(text):
+        return len(text)
+
+    assert asyncio.run(Grader(async_model, batch_size=2).grade_async(texts)) == [3.0, 1.0, 5.0, 3.0, 1.0]
+
+
+def test_script_model_exposes_grade_batch(tmp_path):
+    import pickle
+    from ai_bias_audit.grading import ScriptModel
+    script = tmp_path / 'model.py'
+    script.write_text('batches = []\n\ndef grade(text):\n    return len(text)\n\n'
+                      'def grade_batch(texts):\n    batches.append(list(texts))\n    return [len(t) * 10 for t in texts]\n')
+    model = ScriptModel(str(script))
+    aud = Auditor(model, pd.DataFrame({'text': ['a', 'bb', 'ccc']}), batch_size=2)
+    assert aud.grade()['predicted_grade'].tolist() == [10.0, 20.0, 30.0]
+    assert model._batch_function.__globals__['batches'] == [['a', 'bb'], ['ccc']]
+    # The batch function survives pickling, e.g. into a worker process
+    assert pickle.loads(pickle.dumps(model)).grade_batch(['dddd']) == [40]
+    plain = tmp_path / 'plain.py'
+    plain.write_text('def grade(text):\n    return len(text)\n')
+    assert not hasattr(ScriptModel(str(plain)), 'grade_batch')
+    assert not hasattr(pickle.loads(pickle.dumps(ScriptModel(str(plain)))), 'grade_batch')
+
+
+def test_threaded_grading_preserves_order_and_isolates_failures():
+    import time
+
+    def slow_model(text):
+        time.sleep(0.01 * (len(text) % 3))
+        if text == 'boom':
+            raise RuntimeError('API error')
+        return len(text)
+
+    texts = ['a', 'bb', 'boom', 'cccc', 'ddddd', 'eeeeee']
+    aud = Auditor(slow_model, pd.DataFrame({'text': texts}), max_workers=4)
+    preds = aud.grade()['predicted_grade'].tolist()
+    assert preds[:2] == [1.0, 2.0] and preds[3:] == [4.0, 5.0, 6.0]
+    assert np.isnan(preds[2])
+
+
+def test_process_pool_grading(tmp_path):
+    from ai_bias_audit.grading import ScriptModel
+    script = tmp_path / 'model.py'
+    script.write_text('def grade(text):\n    if text == "boom":\n        raise ValueError("bad")\n    return len(text)\n')
+    texts = ['a', 'bb', 'boom', 'cccc', 'ddddd', 'eeeeee', 'f']
+    aud = Auditor(ScriptModel(str(script)), pd.DataFrame({'text': texts}), max_workers=2, executor='process')
+    try:
+        preds = aud.grade()['predicted_grade'].tolist()
+    finally:
+        aud.close()
+    assert preds[:2] == [1.0, 2.0] and preds[3:] == [4.0, 5.0, 6.0, 1.0]
+    assert np.isnan(preds[2])
+
+
+def test_loaded_model_scripts_are_bounded(tmp_path, monkeypatch):
+    import os
+    from collections import OrderedDict
+    from ai_bias_audit import grading
+
+    monkeypatch.setattr(grading, '_loaded_functions', OrderedDict())
+    monkeypatch.setattr(grading, 'MAX_LOADED_SCRIPTS', 2)
+
+    def upload(name, body):
+        # Each upload lands in a new directory, as in the API server
+        path = tmp_path / name / 'model.py'
+        path.parent.mkdir()
+        path.write_text(body)
+        return grading.ScriptModel(str(path))
+
+    first = upload('first', 'def grade(text):\n    return 1\n')
+    # The same script uploaded again shares the loaded function
+    again = upload('again', 'def grade(text):\n    return 1\n')
+    assert len(grading._loaded_functions) == 1
+    models = [upload(f'model{i}', f'def grade(text):\n    return {i}\n') for i in range(2, 5)]
+    assert len(grading._loaded_functions) == 2
+    assert first.fingerprint not in grading._loaded_functions
+    # Models keep their own function once it was evicted, even if the script is gone
+    os.remove(first.path)
+    assert [first('x'), again('x')] + [model('x') for model in models] == [1, 1, 2, 3, 4]
+
+
+def test_model_scripts_load_outside_the_cache_lock(tmp_path, monkeypatch):
+    import threading
+    import time
+    from collections import OrderedDict
+    from ai_bias_audit import grading
+
+    monkeypatch.setattr(grading, '_loaded_functions', OrderedDict())
+    imports = tmp_path / 'imports.log'
+    slow = tmp_path / 'slow.py'
+    slow.write_text(f'import time\nwith open({str(imports)!r}, "a") as f:\n    f.write("import\\n")\n'
+                    'time.sleep(1)\n\ndef grade(text):\n    return 1\n')
+    fast = tmp_path / 'fast.py'
+    fast.write_text('def grade(text):\n    return 2\n')
+    loaded = []
+    threads = [threading.Thread(target=lambda: loaded.append(grading.load_model_script(str(slow))))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    # Another script loads while the slow one is still importing
+    start = time.perf_counter()
+    assert grading.load_model_script(str(fast))('x') == 2
+    assert time.perf_counter() - start < 0.5
+    for thread in threads:
+        thread.join()
+    # Concurrent loads of the same script share one import
+    assert imports.read_text() == 'import\n'
+    assert len(loaded) == 3 and all(function is loaded[0] for function in loaded)
+    assert not grading._loading_locks
+
+
+def test_process_pool_rejects_unpicklable_model(df):
+    with pytest.raises(ValueError):
+        Auditor(lambda text: 1, df, max_workers=2, executor='process')
+
+
+def test_audit_async_with_async_model(df):
+    import asyncio
+    in_flight = []
+    peak = []
+
+    async def async_model(text):
+        in_flight.append(text)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(text)
+        return len(text)
+
+    aud = Auditor(async_model, df, max_workers=2)
+    report = asyncio.run(aud.audit_async(['spelling'], [0]))
+    assert report['original_grade'].tolist() == [3, 3]
+    assert report['perturbed_grade'].tolist() == [3, 3]
+    assert max(peak) <= 2
+    # The synchronous API also accepts async models
+    assert aud.grade()['predicted_grade'].tolist() == [3.0, 3.0]
+
+    # Except from a running event loop, where grading must be awaited
+    async def grade_in_loop():
+        return Auditor(async_model, df).grade()
+
+    with pytest.raises(RuntimeError, match='grade_async'):
+        asyncio.run(grade_in_loop())
+
+
+def test_grade_cache_skips_model_on_hits(tmp_path, df):
+    from ai_bias_audit.cache import GradeCache
+    calls = []
+
+    def model(text):
+        calls.append(text)
+        return len(text)
+
+    cache = GradeCache(str(tmp_path / 'cache'))
+    Auditor(model, df, grade_cache=cache, model_fingerprint='len-v1').grade()
+    assert calls == ['abc', 'def']
+    scored = Auditor(model, df, grade_cache=cache, model_fingerprint='len-v1').grade()
+    assert calls == ['abc', 'def']
+    assert scored['predicted_grade'].tolist() == [3.0, 3.0]
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+    # A different fingerprint does not share entries
+    Auditor(model, df, grade_cache=cache, model_fingerprint='len-v2').grade()
+    assert len(calls) == 4
+    with pytest.raises(ValueError):
+        Auditor(model, df, grade_cache=cache)
+
+
+def test_perturbation_cache_skips_planning_on_hits(tmp_path, monkeypatch):
+    import asyncio
+    from ai_bias_audit.cache import PerturbationCache
+
+    class SuffixTranslator(Translator):
+        name = 'suffix'
+
+        def translate(self, word):
+            return word + 'o'
+
+    suffix = SuffixTranslator()
+    df = pd.DataFrame({'text': [f'essay {i} with several words' for i in range(6)], 'num_cognates': 4})
+    variation = get_variation('cognates')
+    planned = []
+    original_plan = variation.plan
+    monkeypatch.setattr(variation, 'plan', lambda text: planned.append(text) or original_plan(text))
+    cache = PerturbationCache(str(tmp_path / 'cache'))
+
+    def auditor(model):
+        return Auditor(model, df, perturbation_cache=cache, translator=suffix)
+
+    first = auditor(lambda text: len(text)).audit(['cognates'], [[20, 60]], seed=3)
+    assert len(planned) == len(df)
+    # A new model graded against the same seeded perturbations costs no perturbation work
+    second = auditor(lambda text: len(text) % 5).audit(['cognates'], [[20, 60]], seed=3)
+    assert len(planned) == len(df)
+    assert second['perturbed_text'].tolist() == first['perturbed_text'].tolist()
+    assert cache.stats()['hits'] == 2 * len(df)
+    # Another seed or variation version misses the cache
+    auditor(lambda text: 0).audit(['cognates'], [20], seed=4)
+    assert len(planned) == 2 * len(df)
+    monkeypatch.setattr(variation, 'version', 2)
+    perturbed = auditor(lambda text: 0).perturb('cognates', 20, seed=3)
+    assert len(planned) == 3 * len(df)
+    assert perturbed['text'].tolist() == first['perturbed_text'].tolist()[:len(df)]
+    # So does another translator
+    Auditor(lambda text: 0, df, perturbation_cache=cache).perturb('cognates', 20, seed=3)
+    assert len(planned) == 4 * len(df)
+    # Unseeded audits neither read nor write the cache
+    entries = cache.stats()['entries']
+    auditor(lambda text: 0).audit(['cognates'], [20])
+    pd.concat(auditor(lambda text: 0).audit_iter(['cognates'], [20], chunk_size=4))
+    asyncio.run(auditor(lambda text: 0).audit_async(['cognates'], [20]))
+    assert len(planned) == 7 * len(df)
+    assert cache.stats()['entries'] == entries
+
+
+def test_perturbation_cache_prefetches_and_annotates_misses_only(tmp_path):
+    from ai_bias_audit.cache import PerturbationCache
+
+    class SuffixTranslator(Translator):
+        name = 'suffix'
+
+        def translate(self, word):
+            return word + 'o'
+
+    topics = ['lions', 'tigers', 'bears', 'wolves', 'otters', 'eagles']
+    df = pd.DataFrame({'text': [f'essay about {topic} and plants' for topic in topics], 'num_cognates': 4})
+    cache = PerturbationCache(str(tmp_path / 'cache'))
+    Auditor(len, df.iloc[:4], perturbation_cache=cache, translator=SuffixTranslator()).audit(['cognates'], [50],
+                                                                                           seed=2)
+    aud = Auditor(len, df, perturbation_cache=cache, translator=SuffixTranslator())
+    annotated, prefetched = [], []
+    annotate, prefetch = aud.annotations.annotate, aud.translator.prefetch
+    aud.annotations.annotate = lambda texts, **kwargs: annotated.append(list(texts)) or annotate(texts, **kwargs)
+    aud.translator.prefetch = lambda units, **kwargs: prefetched.append(list(units)) or prefetch(units, **kwargs)
+    aud.audit(['cognates'], [50], seed=2)
+    # The cache is looked up first; only the two missing rows are annotated and prefetched, in one batch
+    assert annotated == [df['text'].tolist()[4:]]
+    assert len(prefetched) == 1
+    assert set(prefetched[0]) == {'essay', 'about', 'otters', 'eagles', 'and', 'plants'}
+    assert cache.stats()['hits'] == 4
+
+
+def test_translation_backends(tmp_path):
+    import threading
+    from ai_bias_audit.translation import (DictionaryTranslator, GoogleTranslator, ServerTranslator,
+                                           get_translator, make_server)
+
+    words = tmp_path / 'words.tsv'
+    words.write_text('# english\tspanish\nhouse\tcasa\nred\trojo\nthank you\tgracias\n')
+    dictionary = get_translator(f'dictionary:{words}')
+    assert isinstance(dictionary, DictionaryTranslator)
+    assert dictionary.translate_batch(['House', 'the red house!', 'Thank you', 'RED']) == \
+        ['Casa', 'the rojo casa!', 'Gracias', 'ROJO']
+    assert dictionary.fingerprint != DictionaryTranslator(entries={'house': 'hogar'}).fingerprint
+    with pytest.raises(ValueError):
+        get_translator('babelfish')
+
+    # The stub server answers ServerTranslator requests in batches
+    server = make_server(dictionary, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/translate'
+        client = get_translator(url)
+        assert isinstance(client, ServerTranslator)
+        client.batch_size = 2
+        assert client.translate_batch(['house', 'red', 'blue']) == ['casa', 'rojo', None]
+        assert client.translate('thank you') == 'gracias'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Google packs many texts into one request, one per line
+    class Response:
+        def __init__(self, text):
+            self.text = f'<div class="result-container">{text.upper()}</div>'
+
+        def raise_for_status(self):
+            pass
+
+    requested = []
+    google = GoogleTranslator(batch_chars=12)
+    google.session.get = lambda url, params, timeout: requested.append(params['q']) or Response(params['q'])
+    assert google.translate_batch(['cat', '', 'dog', 'horse', 'a\nb']) == ['CAT', '', 'DOG', 'HORSE', 'A\nB']
+    assert requested == ['cat\ndog', 'horse', 'a\nb']
+
+
+def test_words_missing_from_word_list_are_not_cognates(capsys):
+    from ai_bias_audit.features import count_cognates
+    from ai_bias_audit.translation import DictionaryTranslator, TranslationNotFound, cached, use_translator
+
+    dictionary = DictionaryTranslator(entries={'doctor': 'doctor', 'house': 'casa'})
+    text = 'the doctor visited my house last week'
+    assert dictionary.translate('zebra') is None and dictionary.translate('red house') == 'red casa'
+    translations, errors = dictionary.translate_each(['doctor', 'house', 'week'])
+    assert translations == {'doctor': 'doctor', 'house': 'casa'}
+    assert isinstance(errors['week'], TranslationNotFound)
+    translator = cached(dictionary)
+    with use_translator(translator):
+        # Only 'doctor' is a cognate; untranslated words are not compared with themselves
+        assert count_cognates(text) == 1
+        plan = get_variation('cognates').plan(text)
+        assert [plan[1][i] for i in plan[2]] == ['doctor']
+        assert get_variation('noun_transfer').apply(text, 100, np.random.default_rng(0)) == \
+            'the doctor visited my casa last week'
+        assert get_variation('spanglish').apply('my house. the week', 100, np.random.default_rng(0)) == \
+            'my casa. the week'
+    # Misses are neither reported as errors nor cached
+    assert capsys.readouterr().out == ''
+    assert translator.cache.get_many(translator.fingerprint, 'es', ['the', 'week', 'visited']) == {}
+    assert translator.cache.get_many(translator.fingerprint, 'es', ['doctor']) == {'doctor': 'doctor'}
+
+
+def test_failed_translations_only_lose_failing_words(capsys):
+    import requests
+    from ai_bias_audit.features import count_cognates
+    from ai_bias_audit.translation import GoogleTranslator, use_translator
+
+    class FlakyTranslator(Translator):
+        name = 'flaky'
+
+        def translate(self, word):
+            if word == 'zebra':
+                raise RuntimeError('unavailable')
+            return word + 'o'
+
+        def translate_batch(self, texts):
+            if 'zebra' in texts:
+                raise RuntimeError('batch rejected')
+            return [self.translate(text) for text in texts]
+
+    with pytest.raises(TypeError):
+        Translator()
+    text = 'the doctor and the zebra visit the museum'
+    translations, errors = FlakyTranslator().translate_each(['doctor', 'zebra', 'doctor'])
+    assert translations == {'doctor': 'doctoro'} and list(errors) == ['zebra']
+    with use_translator(FlakyTranslator()):
+        assert count_cognates(text) == 7
+        # Every word but the failing one is still a cognate candidate
+        plan = get_variation('cognates').plan(text)
+        assert set(plan[3].values()) == {'theo', 'doctoro', 'ando', 'visito', 'museumo'}
+        assert 'zebra' not in [plan[1][i] for i in plan[2]]
+        # noun_transfer translates the other selected nouns and keeps the failing one
+        assert get_variation('noun_transfer').apply(text, 100, np.random.default_rng(0)) == \
+            'theo doctoro ando theo zebra visito theo museumo'
+    assert capsys.readouterr().out.count("Error translating 'zebra': unavailable") == 2
+
+    # A failed Google request is retried one text at a time
+    class Response:
+        def __init__(self, text):
+            self.text = f'<div class="result-container">{text.upper()}</div>'
+
+        def raise_for_status(self):
+            pass
+
+    def get(url, params, timeout):
+        if '\n' in params['q']:
+            raise requests.ConnectionError('reset')
+        return Response(params['q'])
+
+    google = GoogleTranslator()
+    google.session.get = get
+    assert google.translate_batch(['cat', 'dog']) == ['CAT', 'DOG']
+
+
+def test_translation_cache_shared_and_persistent(tmp_path):
+    from ai_bias_audit.cache import TranslationCache
+
+    class CountingTranslator(Translator):
+        name = 'counting'
+
+        def __init__(self):
+            super().__init__()
+            self.translated = []
+
+        def translate_batch(self, texts):
+            self.translated.extend(texts)
+            return [text + 'o' for text in texts]
+
+        def translate(self, text):
+            return self.translate_batch([text])[0]
+
+    df = pd.DataFrame({'text': ['the cat sat, and the dog ran', 'the cat ran'] * 3})
+    translator = CountingTranslator()
+    cache = TranslationCache(str(tmp_path))
+    aud = Auditor(lambda text: len(text), df, translator=translator, translation_cache=cache)
+    aud.audit(['cognates', 'noun_transfer', 'spanglish'], [[30, 100], [30, 100], 100], seed=1)
+    # num_cognates, cognates, noun_transfer and spanglish share one cache: each text is translated once
+    assert len(translator.translated) == len(set(translator.translated))
+    assert cache.stats()['hits'] > 0
+    # Another process reading the same directory translates nothing
+    translator.translated.clear()
+    shared = TranslationCache(str(tmp_path))
+    again = Auditor(lambda text: len(text), df, translator=translator, translation_cache=shared)
+    again.audit(['cognates', 'spanglish'], [30, 100], seed=2)
+    assert translator.translated == []
+    assert shared.stats()['misses'] == 0
+    # Entries are keyed by backend and target language
+    assert shared.get_many('counting:auto:fr', 'fr', ['cat']) == {}
+    assert shared.get_many(translator.fingerprint, 'es', ['cat']) == {'cat': 'cato'}
+
+
+def test_prefetch_translations_before_perturbing():
+    import threading
+    import time
+    from ai_bias_audit.translation import CachedTranslator
+
+    class SlowTranslator(Translator):
+        name = 'slow'
+
+        def __init__(self):
+            super().__init__()
+            self.batches = []
+            self.in_flight = 0
+            self.peak = 0
+            self.lock = threading.Lock()
+
+        def translate_batch(self, texts):
+            with self.lock:
+                self.batches.append(list(texts))
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            time.sleep(0.02)
+            with self.lock:
+                self.in_flight -= 1
+            return [text + 'o' for text in texts]
+
+        def translate(self, text):
+            return self.translate_batch([text])[0]
+
+    df = pd.DataFrame({'text': [f'word{i} and noun{i} here, or there' for i in range(40)], 'num_cognates': 1})
+    translator = SlowTranslator()
+    progress = []
+    aud = Auditor(lambda text: len(text), df, translator=translator, translation_workers=3,
+                  prefetch_progress=lambda done, total: progress.append((done, total)))
+    aud.audit(['cognates', 'noun_transfer', 'spanglish'], [50, 50, 50], seed=0)
+    # Every unit was translated up front, in one batch, and never again while perturbing
+    units = [text for batch in translator.batches for text in batch]
+    assert len(translator.batches) == 1
+    assert len(units) == len(set(units))
+    assert progress == [(len(units), len(units))]
+    # Large vocabularies are split into batches translated concurrently, at most max_workers at once
+    translator = SlowTranslator()
+    cached_translator = CachedTranslator(translator)
+    assert cached_translator.prefetch(units, max_workers=3, batch_size=10) == len(units)
+    assert all(len(batch) <= 10 for batch in translator.batches)
+    assert 1 < translator.peak <= 3
+    assert cached_translator.prefetch(units) == 0
+    # Without prefetching, texts are translated as they are perturbed
+    lazy = SlowTranslator()
+    Auditor(lambda text: len(text), df, translator=lazy, translation_workers=0).audit(['spanglish'], [50], seed=0)
+    assert len(lazy.batches) > 1
+
+
+def test_annotations_tag_each_text_once(monkeypatch):
+    from ai_bias_audit.annotations import AnnotationStore
+    from ai_bias_audit.variations import noun_transfer
+
+    class UpperTranslator(Translator):
+        def translate(self, word):
+            return word.upper()
+
+    tagged = []
+
+    def tagger(tokens):
+        tagged.append(tokens)
+        return [(w, 'NN') for w in tokens]
+
+    df = pd.DataFrame({'text': ['the cat sat', 'a dog ran', 'the cat sat']})
+    aud = Auditor(lambda text: len(text), df, annotations=AnnotationStore(tagger=tagger), translator=UpperTranslator())
+    report = aud.audit(['noun_transfer'], [[30, 100]], seed=0)
+    # num_nouns and every planned perturbation share one tagging of each unique text
+    assert len(tagged) == 2
+    assert aud.data['num_nouns'].tolist() == [3, 3, 3]
+    assert report['perturbed_text'].str.isupper().any()
+    store = AnnotationStore(tagger=tagger, max_texts=1)
+    store.tags('one two')
+    store.tags('three')
+    assert len(store) == 1
+
+
+def _noun_tagger(tokens):
+    return [(w, 'NN' if w.isalpha() else '.') for w in tokens]
+
+
+def test_annotate_corpus_in_batches_and_processes():
+    from ai_bias_audit.annotations import AnnotationStore, regex_tokenize
+    assert regex_tokenize("Don't stop, it's well-known!") == ["Don't", 'stop', ',', "it's", 'well-known', '!']
+    texts = [f'essay {i}, with words.' for i in range(10)] * 2
+    serial = AnnotationStore(tagger=_noun_tagger, tokenizer='regex', batch_size=3)
+    serial.annotate(texts, sentences=True)
+    assert len(serial) == 10
+    pooled = AnnotationStore(tagger=_noun_tagger, tokenizer='regex', batch_size=3, n_jobs=2)
+    pooled.annotate(texts, sentences=True)
+    for text in texts:
+        assert pooled.tags(text) == serial.tags(text)
+        assert pooled.sentences(text) == serial.sentences(text)
+    # The worker pool is started once, reused by later calls and shut down by the auditor
+    pool = pooled._pool
+    pooled.annotate([f'other essay {i}.' for i in range(7)])
+    assert pooled._pool is pool and len(pooled) == 17
+    aud = Auditor(lambda text: len(text), pd.DataFrame({'text': texts}), annotations=pooled)
+    aud.close()
+    assert pooled._pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(len, 'closed')
+    assert serial.tags(texts[0]) == [('essay', 'NN'), ('0', '.'), (',', '.'), ('with', 'NN'), ('words', 'NN'), ('.', '.')]
+    with pytest.raises(ValueError):
+        AnnotationStore(tokenizer='whitespace')
+
+
+def test_annotation_store_is_bounded_under_threads():
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+    from ai_bias_audit.annotations import AnnotationStore
+    texts = [f'essay {i % 40} words' for i in range(4000)]
+    # Switch threads often, so that evictions of concurrent calls interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for _ in range(10):
+            store = AnnotationStore(tokenizer='regex', max_texts=5)
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                tokens = list(pool.map(store.tokens, texts))
+            assert tokens == [text.split() for text in texts]
+            assert len(store._tokens) == 5
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def test_pio_engine_rules_and_batch_mode():
+    from ai_bias_audit.rng import derive_rng
+    variation = get_variation('pio')
+    # Rules apply in order, and only rewrite matches that fit the rule's case
+    assert variation.apply('The theory of Everything', 100) == 'The teory of iberyting'
+    assert variation.apply('Stella spent the cycle in the balloon', 100) == 'Stela espent te sykle in te balun'
+    assert variation.apply('Ooo, a quick phone!', 100) == 'Ooo, a kik fone!'
+    assert variation.apply('The theory', 0) == 'The theory'
+    texts = [f'essay {i}: the quick phonics teacher whispers "{i % 3}" knowledge.\nSecond line' for i in range(40)]
+    for magnitude in (30, 100):
+        one_by_one = [variation.apply(text, magnitude, derive_rng(0, i, magnitude)) for i, text in enumerate(texts)]
+        batched = variation.apply_batch(texts, magnitude, [derive_rng(0, i, magnitude) for i in range(len(texts))])
+        assert batched == one_by_one
+
+
+def test_apply_batch_default_and_spelling():
+    from ai_bias_audit.rng import derive_rng
+    from ai_bias_audit.variations import Variation
+
+    class Shout(Variation):
+        def apply(self, text, magnitude):
+            return text.upper()
+
+    assert Shout().apply_batch(['ab', 'cd'], 50) == ['AB', 'CD']
+    spelling = get_variation('spelling')
+    texts = [' '.join(f'word{j}' for j in range(i % 7 + 5)) for i in range(30)] + ['', 'a']
+    batched = spelling.apply_batch(texts, 40, [derive_rng(2, i) for i in range(len(texts))])
+    assert batched == [spelling.apply(text, 40, derive_rng(2, i)) for i, text in enumerate(texts)]
+    for text, misspelled in zip(texts, batched):
+        words, changed = text.split(), misspelled.split()
+        assert len(changed) == len(words)
+        assert sum(a != b for a, b in zip(words, changed)) <= int(len(words) * 0.4)
+    assert spelling.apply_batch(texts, 0) == [' '.join(text.split()) for text in texts]
+
+
+def test_audit_grades_identical_texts_once():
+    calls = []
+
+    def model(text):
+        calls.append(text)
+        return len(text)
+
+    df = pd.DataFrame({'text': ['same essay', 'same essay', 'other essay']})
+    aud = Auditor(model, df)
+    # Magnitude 0 leaves every text unchanged, so perturbed texts reuse the original grades
+    report = aud.audit(['spelling'], [0])
+    assert sorted(calls) == ['other essay', 'same essay']
+    assert report['perturbed_grade'].tolist() == [10, 10, 11]
+    assert aud.metadata['texts'] == 6
+    assert aud.metadata['graded'] == 2
+    assert aud.metadata['duplicates_skipped'] == 4
+
+
+def test_audit_iter_matches_audit():
+    df = pd.DataFrame({
+        'text': ['one two three', 'four five', 'six', 'seven eight nine ten', 'eleven twelve', 'thirteen'],
+        'group': ['A', 'B', 'A', 'B', 'A', 'B'],
+    })
+    aud = Auditor(dummy_model, df)
+    full = aud.audit(['spelling'], [0], group_col='group')
+    expected = aud.audit_moments(group_col='group')
+
+    chunks = list(aud.audit_iter(['spelling'], [0], chunk_size=4, group_col='group'))
+    assert [len(c) for c in chunks] == [4, 2]
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, full)
+    assert aud.results is None
+    pd.testing.assert_frame_equal(aud.audit_moments(group_col='group'), expected)
+
+
+def test_moment_accumulator_matches_scipy():
+    from scipy.stats import skew
+    from ai_bias_audit.moments import MomentAccumulator
+    values = np.random.default_rng(0).normal(size=101) ** 3
+    acc = MomentAccumulator()
+    for start in range(0, len(values), 17):
+        acc.update(values[start:start + 17])
+    mean, var, sk = acc.result()
+    assert np.isclose(mean, values.mean())
+    assert np.isclose(var, values.var(ddof=1))
+    assert np.isclose(sk, skew(values, bias=False))
+
+
+def test_moment_accumulators_merge_and_update_live():
+    from scipy.stats import skew
+    from ai_bias_audit.moments import MomentAccumulator, grouped_moments
+    values = np.random.default_rng(1).normal(size=60) ** 3
+    left, right = MomentAccumulator(), MomentAccumulator()
+    left.update(values[:25])
+    right.update(values[25:])
+    mean, var, sk = left.merge(right).result()
+    assert np.isclose(mean, values.mean())
+    assert np.isclose(var, values.var(ddof=1))
+    assert np.isclose(sk, skew(values, bias=False))
+
+    df = pd.DataFrame({'text': [f'essay {i} ' + 'word ' * i for i in range(12)], 'grp': ['a', 'b'] * 6})
+    aud = Auditor(lambda text: len(text) % 7, df)
+    live = []
+    original_record = aud._record_task
+
+    def record_task(*args, **kwargs):
+        results = original_record(*args, **kwargs)
+        live.append(aud.audit_moments(group_col='grp'))
+        return results
+
+    aud._record_task = record_task
+    results = aud.audit(['spelling', 'spelling'], [0, 100], group_col='grp')
+    # Moments are available after the first variation, before the audit returns
+    assert list(live[0]['magnitude'].unique()) == [0]
+    pd.testing.assert_frame_equal(aud.audit_moments(group_col='grp'), grouped_moments(results, 'grp'))
+
+
+def test_magnitude_sweep_reuses_plans(monkeypatch):
+    from ai_bias_audit.variations import get_variation
+    variation = get_variation('spelling')
+    planned = []
+    original_plan = variation.plan
+    monkeypatch.setattr(variation, 'plan', lambda text: planned.append(text) or original_plan(text))
+    df = pd.DataFrame({'text': [f'essay {i}' + ' word other' * i for i in range(5)]})
+    aud = Auditor(lambda text: len(text), df)
+    results = aud.audit(['spelling'], [[0, 50, 100]])
+    assert len(planned) == len(df)
+    assert results['magnitude'].tolist() == [0] * 5 + [50] * 5 + [100] * 5
+    assert (results[results['magnitude'] == 0]['bias_0'] == 0).all()
+
+
+def test_seeded_replicates_and_bootstrap_ci():
+    df = pd.DataFrame({'text': [f'essay {i}' + ' word other thing' * (i + 3) for i in range(20)]})
+    model = lambda text: len(text) % 7 / 7
+    first = Auditor(model, df)
+    results = first.audit(['spelling', 'pio'], [50, 50], n_replicates=3, seed=11)
+    again = Auditor(model, df).audit(['spelling', 'pio'], [50, 50], n_replicates=3, seed=11)
+    pd.testing.assert_frame_equal(results, again)
+    assert len(results) == 2 * 3 * len(df)
+    assert results['replicate'].tolist()[:2 * len(df)] == [0] * len(df) + [1] * len(df)
+    # Replicates draw different perturbations
+    spelling = results[results['variation'] == 'spelling']
+    assert (spelling[spelling['replicate'] == 0]['perturbed_text'].values
+            != spelling[spelling['replicate'] == 1]['perturbed_text'].values).any()
+
+    moments = first.audit_moments(confidence=0.9, n_boot=200, seed=0)
+    assert {'bias_0_ci_low', 'bias_0_ci_high'} <= set(moments.columns)
+    assert (moments['bias_0_ci_low'] <= moments['bias_0_mean']).all()
+    assert (moments['bias_0_mean'] <= moments['bias_0_ci_high']).all()
+    pd.testing.assert_frame_equal(moments, first.audit_moments(confidence=0.9, n_boot=200, seed=0))
+
+
+def test_perturbations_independent_of_chunking_and_order():
+    import asyncio
+    df = pd.DataFrame({'text': [f'essay {i}' + ' word other thing' * (i % 5 + 3) for i in range(30)]})
+    model = lambda text: len(text) % 7 / 7
+    results = Auditor(model, df).audit(['spelling', 'pio'], [[30, 60], 40], seed=5)
+    chunked = pd.concat(Auditor(model, df).audit_iter(['spelling', 'pio'], [[30, 60], 40], chunk_size=7, seed=5),
+                        ignore_index=True)
+    pd.testing.assert_frame_equal(chunked.sort_values(['variation', 'magnitude', 'index'], ignore_index=True),
+                                  results.sort_values(['variation', 'magnitude', 'index'], ignore_index=True))
+    # Task order and the number of grading workers do not change a row's perturbation
+    reordered = Auditor(model, df, max_workers=4).audit(['pio', 'spelling'], [40, [60, 30]], seed=5)
+    key = ['variation', 'magnitude', 'index']
+    pd.testing.assert_frame_equal(reordered.sort_values(key, ignore_index=True),
+                                  results.sort_values(key, ignore_index=True))
+    concurrent = asyncio.run(Auditor(model, df).audit_async(['spelling', 'pio'], [[30, 60], 40], seed=5))
+    pd.testing.assert_frame_equal(concurrent, results)
+    # Without a seed, the drawn seed is recorded and reproduces the audit
+    aud = Auditor(model, df)
+    unseeded = aud.audit(['spelling'], [50])
+    again = Auditor(model, df).audit(['spelling'], [50], seed=aud.metadata['seed'])
+    pd.testing.assert_frame_equal(unseeded, again)
+
+
+def test_perturbations_independent_of_score_cutoff():
+    import asyncio
+    df = pd.DataFrame({'text': [f'essay {i}' + ' word other thing' * (i % 5 + 3) for i in range(30)]})
+    # Two models keep different rows above the cutoff; the texts both keep are perturbed alike
+    first = lambda text: float(text.count('e') % 2)
+    second = lambda text: float(len(text) % 3 > 0)
+    cutoff = dict(score_cutoff=0.5, seed=3)
+    runs = [Auditor(first, df).audit(['spelling'], [60], **cutoff),
+            Auditor(second, df).audit(['spelling'], [60], **cutoff),
+            pd.concat(Auditor(second, df).audit_iter(['spelling'], [60], chunk_size=7, **cutoff)),
+            asyncio.run(Auditor(second, df).audit_async(['spelling'], [60], **cutoff))]
+    perturbed = [dict(zip(run['original_text'], run['perturbed_text'])) for run in runs]
+    shared = set(perturbed[0]) & set(perturbed[1])
+    assert shared and set(perturbed[0]) != set(perturbed[1])
+    assert {text: perturbed[0][text] for text in shared} == {text: perturbed[1][text] for text in shared}
+    assert perturbed[1] == perturbed[2] == perturbed[3]
+    # And the same as perturbing the whole data with that seed
+    full = Auditor(first, df).perturb('spelling', 60, seed=3)
+    full_map = dict(zip(df['text'], full['text']))
+    assert all(full_map[text] == perturbed[0][text] for text in perturbed[0])
+
+
+def test_group_significance():
+    from scipy.stats import ttest_ind
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'text': [f'essay {i}' for i in range(90)], 'grp': ['a', 'b', 'c'] * 30,
+                       'score': rng.normal(size=90)})
+    df.loc[df['grp'] == 'a', 'score'] += 3
+    scores = dict(zip(df['text'], df['score']))
+    aud = Auditor(lambda text: 0.0, df)
+    aud.audit(['spelling'], [0], group_col='grp')
+    # Give the perturbed grades a group-dependent shift so bias_0 differs between groups
+    aud.results['bias_0'] = aud.results['original_text'].map(scores)
+
+    welch = aud.group_significance(method='welch', comparison='pairwise')
+    row = welch[(welch['group'] == 'a') & (welch['other'] == 'b') & (welch['measure'] == 'bias_0')].iloc[0]
+    expected = ttest_ind(df.loc[df['grp'] == 'a', 'score'], df.loc[df['grp'] == 'b', 'score'], equal_var=False)
+    assert np.isclose(row['p_value'], expected.pvalue)
+
+    perm = aud.group_significance(comparison='all', n_permutations=2000, seed=0)
+    bias_0 = perm[perm['measure'] == 'bias_0'].set_index('group')
+    assert bias_0.loc['a', 'p_value'] < 0.01
+    assert bias_0.loc['a', 'difference'] > 0 > bias_0.loc['b', 'difference']
+    # bias_1 is identical for every row, so no group differs
+    assert (perm[perm['measure'] == 'bias_1']['p_value'] == 1).all()
+    pd.testing.assert_frame_equal(perm, aud.group_significance(comparison='all', n_permutations=2000, seed=0))
+
+    # Each group is compared with the remaining rows, and missing values only drop rows of their measure
+    aud.results.loc[aud.results.index[:9], 'bias_2'] = np.nan
+    welch = aud.group_significance(method='welch', comparison='all')
+    row = welch[(welch['group'] == 'a') & (welch['measure'] == 'bias_0')].iloc[0]
+    a_scores, rest_scores = df.loc[df['grp'] == 'a', 'score'], df.loc[df['grp'] != 'a', 'score']
+    assert row['other'] == 'rest' and (row['n'], row['n_other']) == (30, 60)
+    assert np.isclose(row['p_value'], ttest_ind(a_scores, rest_scores, equal_var=False).pvalue)
+    assert row['difference'] == round(a_scores.mean() - rest_scores.mean(), 3)
+    perm = aud.group_significance(comparison='all', n_permutations=200, seed=0)
+    assert (perm['difference'].to_numpy() == welch['difference'].to_numpy()).all()
+    assert welch.groupby('measure')['n'].sum().to_dict() == {'bias_0': 90, 'bias_1': 90, 'bias_2': 81, 'bias_3': 90}
+
+
+def test_compact_results():
+    df = pd.DataFrame({'text': [f'essay {i} ' + 'word other ' * i for i in range(12)], 'grp': ['a', 'b'] * 6})
+    model = lambda text: len(text) % 5 / 5
+    full_aud = Auditor(model, df)
+    full = full_aud.audit(['spelling', 'spelling'], [0, 0], group_col='grp')
+    aud = Auditor(model, df, compact_results=True, float32_results=True)
+    compact = aud.audit(['spelling', 'spelling'], [0, 0], group_col='grp')
+    assert 'original_text' not in compact.columns
+    assert isinstance(compact['variation'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact['group'].dtype, pd.CategoricalDtype)
+    assert compact['magnitude'].dtype == np.int16
+    assert compact['bias_0'].dtype == np.float32
+    expanded = aud.expand_results()
+    assert list(expanded.columns) == list(full.columns)
+    assert (expanded['original_text'] == full['original_text']).all()
+    assert np.allclose(expanded['perturbed_grade'], full['perturbed_grade'])
+    pd.testing.assert_frame_equal(aud.audit_moments(group_col='grp'), full_aud.audit_moments(group_col='grp'))
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_checkpointed_audit_resumes(tmp_path):
+    df = pd.DataFrame({'text': [f'essay number {i} with some words' for i in range(10)]})
+    ckpt = str(tmp_path / 'audit.ckpt')
+    calls = []
+
+    def crashing_model(text):
+        if len(calls) == 14:
+            raise Interrupted()
+        calls.append(text)
+        return len(text)
+
+    aud = Auditor(crashing_model, df)
+    with pytest.raises(Interrupted):
+        aud.audit(['spelling', 'pio'], [50, 50], checkpoint=ckpt, checkpoint_every=3)
+    graded_before_crash = len(calls)
+
+    calls.clear()
+    aud = Auditor(lambda text: calls.append(text) or len(text), df)
+    resumed = aud.audit(['spelling', 'pio'], [50, 50], checkpoint=ckpt, resume=True, checkpoint_every=3)
+    # Original grades and the completed perturbation blocks are not graded again
+    assert len(calls) < 20
+    assert graded_before_crash + len(calls) >= 20
+    assert len(resumed) == 20
+    # The unseeded run recorded its seed, so resumed rows drew from the same generators
+    fresh = Auditor(lambda text: len(text), df).audit(['spelling', 'pio'], [50, 50], seed=aud.metadata['seed'])
+    pd.testing.assert_frame_equal(fresh, resumed)
+
+    # Everything is recorded now, so resuming again reproduces the results without grading
+    calls.clear()
+    again = aud.audit(['spelling', 'pio'], [50, 50], checkpoint=ckpt, resume=True, checkpoint_every=3)
+    assert calls == []
+    pd.testing.assert_frame_equal(again, resumed)
+
+    with pytest.raises(ValueError):
+        aud.audit(['spelling'], [10], checkpoint=ckpt, resume=True)
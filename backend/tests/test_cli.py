@@ -13,17 +13,6 @@ import nltk
 nltk.word_tokenize = lambda text: text.split()
 nltk.pos_tag = lambda tokens: [(w, 'NN') for w in tokens]
 nltk.sent_tokenize = lambda text: [text]
-import ai_bias_audit.variations.cognates as cognates_mod
-import ai_bias_audit.variations.noun_transfer as noun_mod
-import ai_bias_audit.variations.spanglish as spang_mod
-
-class DummyTranslator:
-    def translate(self, text):
-        return text  # identity
-
-# Monkey-patch translators to avoid HTTP calls
-for mod in (cognates_mod, noun_mod, spang_mod):
-    mod.translator = DummyTranslator()
 
 @pytest.mark.parametrize('variation,magnitude', [
     ('spelling', 10),
@@ -39,6 +28,9 @@ def test_cli_end_to_end(tmp_path, monkeypatch, variation, magnitude):
     # Create dummy model script
     model_file = tmp_path / 'model.py'
     model_file.write_text('def grade(text):\n    return len(text)\n')
+    # Offline word list, so translation-based variations make no HTTP calls
+    words_file = tmp_path / 'words.tsv'
+    words_file.write_text('hello\thola\nworld\tmundo\n')
     # Run CLI
     runner = CliRunner()
     result = runner.invoke(main, [
@@ -47,6 +39,7 @@ def test_cli_end_to_end(tmp_path, monkeypatch, variation, magnitude):
         '--model-func', 'grade',
         '--variations', variation,
         '--magnitudes', str(magnitude),
+        '--translator', f'dictionary:{words_file}',
         '--output', str(tmp_path / 'out.csv'),
     ])
     assert result.exit_code == 0, result.output
@@ -82,4 +75,117 @@ def test_cli_integration(tmp_path):
     assert result.returncode == 0, result.stderr
     assert output_path.exists()
     df = pd.read_csv(output_path)
-    assert not df.empty
\ No newline at end of file
+    assert not df.empty
+
+def test_cli_chunked(tmp_path):
+    data_file = tmp_path / 'texts.csv'
+    pd.DataFrame({'text': [f'essay number {i}' for i in range(7)]}).to_csv(data_file, index=False)
+    model_file = tmp_path / 'model.py'
+    model_file.write_text('def grade(text):\n    return len(text)\n')
+    runner = CliRunner()
+    result = runner.invoke(main, [
+        '--data', str(data_file),
+        '--model-script', str(model_file),
+        '--variations', 'spelling',
+        '--magnitudes', '0',
+        '--chunk-size', '3',
+        '--output', str(tmp_path / 'out.csv'),
+    ])
+    assert result.exit_code == 0, result.output
+    out_df = pd.read_csv(tmp_path / 'out.csv')
+    assert out_df['index'].tolist() == list(range(7))
+    assert (out_df['original_grade'] == out_df['perturbed_grade']).all()
+
+
+def test_cli_resume(tmp_path):
+    data_file = tmp_path / 'texts.csv'
+    pd.DataFrame({'text': [f'essay number {i}' for i in range(4)]}).to_csv(data_file, index=False)
+    model_file = tmp_path / 'model.py'
+    model_file.write_text('def grade(text):\n    return len(text)\n')
+    args = [
+        '--data', str(data_file),
+        '--model-script', str(model_file),
+        '--variations', 'spelling',
+        '--magnitudes', '50',
+        '--output', str(tmp_path / 'out.csv'),
+        '--resume',
+    ]
+    runner = CliRunner()
+    first = runner.invoke(main, args)
+    assert first.exit_code == 0, first.output
+    assert (tmp_path / 'out.csv.checkpoint').exists()
+    first_df = pd.read_csv(tmp_path / 'out.csv')
+    second = runner.invoke(main, args)
+    assert second.exit_code == 0, second.output
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'), first_df)
+
+
+def test_cli_resume_after_interruption(tmp_path, monkeypatch):
+    data_file = tmp_path / 'texts.csv'
+    texts = [f'essay number {i} has several words in it' for i in range(250)]
+    pd.DataFrame({'text': texts}).to_csv(data_file, index=False)
+    model_file = tmp_path / 'model.py'
+    # Counts its calls in a file and, past a limit, raises KeyboardInterrupt as if stopped with Ctrl-C
+    model_file.write_text(
+        'import os\n\n'
+        'def grade(text):\n'
+        '    with open(os.environ["CALLS_LOG"], "a") as f:\n'
+        '        f.write("x")\n'
+        '    limit = os.environ.get("INTERRUPT_AFTER")\n'
+        '    if limit and os.path.getsize(os.environ["CALLS_LOG"]) > int(limit):\n'
+        '        raise KeyboardInterrupt\n'
+        '    return len(text) % 7\n'
+    )
+    calls = tmp_path / 'calls.log'
+    monkeypatch.setenv('CALLS_LOG', str(calls))
+
+    def args(output, *extra):
+        return ['--data', str(data_file), '--model-script', str(model_file), '--variations', 'spelling',
+                '--magnitudes', '50', '--seed', '7', '--output', str(output)] + list(extra)
+
+    runner = CliRunner()
+    clean = runner.invoke(main, args(tmp_path / 'clean.csv'))
+    assert clean.exit_code == 0, clean.output
+    clean_calls = calls.stat().st_size
+    calls.unlink()
+    # Interrupted mid-task: after the original grades and one block of 100 perturbed rows
+    monkeypatch.setenv('INTERRUPT_AFTER', '400')
+    interrupted = runner.invoke(main, args(tmp_path / 'out.csv', '--resume'))
+    assert interrupted.exit_code == 1 and 'Aborted' in interrupted.output
+    checkpoint = (tmp_path / 'out.csv.checkpoint').read_text()
+    assert '"type": "original"' in checkpoint and '"type": "rows"' in checkpoint
+    assert not (tmp_path / 'out.csv').exists()
+    monkeypatch.delenv('INTERRUPT_AFTER')
+    calls.unlink()
+    resumed = runner.invoke(main, args(tmp_path / 'out.csv', '--resume'))
+    assert resumed.exit_code == 0, resumed.output
+    assert calls.stat().st_size < clean_calls - 250
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'), pd.read_csv(tmp_path / 'clean.csv'))
+    # A checkpoint is not resumed with another model
+    model_file.write_text('def grade(text):\n    return 0\n')
+    other = runner.invoke(main, args(tmp_path / 'out.csv', '--resume'))
+    assert isinstance(other.exception, ValueError) and 'different audit configuration' in str(other.exception)
+
+
+def test_cli_parquet_output(tmp_path):
+    pytest.importorskip('pyarrow')
+    data_file = tmp_path / 'texts.csv'
+    pd.DataFrame({'text': [f'essay number {i}' for i in range(7)]}).to_csv(data_file, index=False)
+    model_file = tmp_path / 'model.py'
+    model_file.write_text('def grade(text):\n    return len(text)\n')
+    runner = CliRunner()
+    for extra in ([], ['--chunk-size', '3']):
+        result = runner.invoke(main, [
+            '--data', str(data_file),
+            '--model-script', str(model_file),
+            '--variations', 'spelling',
+            '--magnitudes', '0',
+            '--output', str(tmp_path / 'out.parquet'),
+            '--moments-output', str(tmp_path / 'moments.feather'),
+        ] + extra)
+        assert result.exit_code == 0, result.output
+        out_df = pd.read_parquet(tmp_path / 'out.parquet', filters=[('index', '<', 3)])
+        assert out_df['index'].tolist() == [0, 1, 2]
+        assert out_df['original_grade'].dtype == float
+        moments = pd.read_feather(tmp_path / 'moments.feather')
+        assert moments['bias_0_mean'].tolist() == [0.0]
@@ -74,9 +74,14 @@ export const auditAPI = {
     return response.data;
   },
 
-  // Download results as CSV
-  downloadResults: async (auditId: string): Promise<Blob> => {
+  // Download results (or moments) as CSV, Parquet or Feather
+  downloadResults: async (
+    auditId: string,
+    format: 'csv' | 'parquet' | 'feather' = 'csv',
+    table: 'results' | 'moments' = 'results'
+  ): Promise<Blob> => {
     const response = await api.get(`/api/download/${auditId}`, {
+      params: { format, table },
       responseType: 'blob',
     });
     return response.data;
@@ -58,6 +58,8 @@ export interface AuditState {
   
   // Step 5: Magnitudes
   variationMagnitudes: Record<string, number>;
+  maxWorkers?: number;  // Concurrent grading workers (defaults server-side)
+  executor?: 'thread' | 'process';  // Worker pool type for grading
   
   // Step 6: Grouping
   useGrouping: boolean | null;